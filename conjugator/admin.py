@@ -1,29 +1,132 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import router, transaction
+from django.http import Http404, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from . import read_model, store
 from .models import Conjugation, Mood, Tense, Verb
+from .store import PERSONS, mood_sort_key
 
 
-class ConjugationInline(admin.StackedInline):
-    model = Conjugation
-    extra = 0
+class ConjugationGridForm(forms.Form):
+    """
+    Every person form of every conjugation of one verb, as one field per
+    cell named '<conjugation id>-<person>'.
+    """
+
+    def __init__(self, conjugations, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conjugations = conjugations
+        max_length = Conjugation._meta.get_field('ich').max_length
+        for conjugation in conjugations:
+            for person in PERSONS:
+                self.fields[f'{conjugation.id}-{person}'] = forms.CharField(
+                    max_length=max_length, required=False, initial=getattr(conjugation, person),
+                    label=f'{conjugation.mood_id} {conjugation.tense_id} {person}',
+                    widget=forms.TextInput(attrs={'size': 16}))
+
+    def rows(self):
+        """Yields (conjugation, [bound field per person]) in display order."""
+        for conjugation in self.conjugations:
+            yield conjugation, [self[f'{conjugation.id}-{person}'] for person in PERSONS]
+
+    def changed_conjugations(self):
+        """Returns the conjugations with edited forms, updated in place."""
+        changed = []
+        for conjugation in self.conjugations:
+            values = {person: self.cleaned_data[f'{conjugation.id}-{person}'] for person in PERSONS}
+            if any(getattr(conjugation, person) != value for person, value in values.items()):
+                for person, value in values.items():
+                    setattr(conjugation, person, value)
+                changed.append(conjugation)
+        return changed
 
 
 class ConjugationAdmin(admin.ModelAdmin):
     ordering = ['id']
     search_fields = ['verb__infinitive']
+    list_display = ('verb', 'mood', 'tense') + PERSONS
+    list_filter = ('mood', 'tense')
+    list_per_page = 50
+    # Skips the second COUNT(*) over the whole table on filtered pages.
+    show_full_result_count = False
+    autocomplete_fields = ['verb', 'mood', 'tense']
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('verb', 'mood', 'tense')
 
 
+class NameAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+
 class VerbAdmin(admin.ModelAdmin):
     list_display = ('infinitive', 'frequency', 'translation')
     search_fields = ['infinitive']
-    inlines = [ConjugationInline]
+    show_full_result_count = False
+    readonly_fields = ['conjugations']
+
+    def get_urls(self):
+        urls = [
+            path('<path:object_id>/conjugations/', self.admin_site.admin_view(self.conjugation_grid_view),
+                 name='conjugator_verb_conjugations'),
+        ]
+        return urls + super().get_urls()
+
+    def conjugations(self, verb):
+        if verb.pk is None:
+            return '-'
+        return format_html('<a href="{}">Edit all conjugations</a>',
+                           reverse('admin:conjugator_verb_conjugations', args=[verb.pk]))
+
+    def conjugation_grid_view(self, request, object_id):
+        """
+        Edits every conjugation of a verb in one grid. The rows are loaded
+        with one query and the edited ones saved with one bulk update, so
+        neither the page nor the query count grows with the number of verbs.
+        """
+        verb = self.get_object(request, object_id)
+        if verb is None:
+            raise Http404(f'No verb {object_id!r}.')
+        if not self.has_change_permission(request, verb):
+            raise PermissionDenied
+
+        conjugations = sorted(Conjugation.objects.filter(verb=verb),
+                              key=lambda conjugation: (mood_sort_key(conjugation.mood_id), conjugation.id))
+        form = ConjugationGridForm(conjugations, request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            changed = form.changed_conjugations()
+            if changed:
+                with transaction.atomic(using=router.db_for_write(Conjugation)):
+                    Conjugation.objects.bulk_update(changed, PERSONS)
+                    self.log_change(request, verb, [{'changed': {
+                        'name': 'conjugations',
+                        'fields': [f'{conjugation.mood_id} {conjugation.tense_id}' for conjugation in changed],
+                    }}])
+                # Bulk writes don't send model signals.
+                store.dataset_changed()
+                read_model.schedule([verb.infinitive])
+            self.message_user(request, f'Updated {len(changed)} conjugations of {verb}.', messages.SUCCESS)
+            return HttpResponseRedirect(request.path)
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=f'Conjugations of {verb}',
+            opts=self.model._meta,
+            original=verb,
+            form=form,
+            persons=PERSONS,
+            add_url=reverse('admin:conjugator_conjugation_add') + f'?verb={verb.pk}',
+        )
+        return TemplateResponse(request, 'admin/conjugator/verb/conjugation_grid.html', context)
 
 
 admin.site.register(Verb, VerbAdmin)
-admin.site.register(Mood)
-admin.site.register(Tense)
+admin.site.register(Mood, NameAdmin)
+admin.site.register(Tense, NameAdmin)
 admin.site.register(Conjugation, ConjugationAdmin)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ConjugatorConfig(AppConfig):
     name = 'conjugator'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,129 @@
+document.querySelector('.search-bar').addEventListener('mousedown', (e) => {
+  if (e.target.classList.contains('letter')) {
+      e.preventDefault();
+      const inputEl = document.querySelector('#search');
+      inputEl.value += e.target.innerHTML;
+      inputEl.focus();
+  }
+});
+
+// The whole vocabulary comes once from /autocomplete/ and is kept in
+// localStorage under its ETag. It is revalidated with If-None-Match once per
+// browser session, and prefixes are matched here, as the server's
+// ConjugationStore.complete() does, without any further request.
+const VOCABULARY_CACHE_KEY = 'autocomplete-vocabulary';
+const VOCABULARY_VALIDATED_KEY = 'autocomplete-validated';
+const AUTOCOMPLETE_LIMIT = 10;
+
+// The server side normalize_infinitive(): case, umlauts and ß folded.
+const UMLAUT_FOLDING = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'};
+
+function foldTerm(term) {
+    return term.normalize('NFC').toLowerCase().replace(/[äöüß]/g, c => UMLAUT_FOLDING[c]);
+}
+
+function readStorage(storage, key) {
+    try {
+        return storage.getItem(key);
+    } catch (e) {
+        // Storage disabled.
+        return null;
+    }
+}
+
+function writeStorage(storage, key, value) {
+    try {
+        storage.setItem(key, value);
+    } catch (e) {
+        // Storage full or disabled: the in-memory copy is still used.
+    }
+}
+
+function loadCachedVocabulary() {
+    try {
+        const cached = JSON.parse(readStorage(localStorage, VOCABULARY_CACHE_KEY));
+        if (cached && cached.etag && Array.isArray(cached.infinitives)) {
+            return cached;
+        }
+    } catch (e) {
+        // Unreadable: fetch it again.
+    }
+    return null;
+}
+
+// The infinitives, most frequent first, with their folded spelling.
+function indexVocabulary(infinitives) {
+    return infinitives.map(infinitive => [foldTerm(infinitive), infinitive]);
+}
+
+function fetchVocabulary() {
+    const cached = loadCachedVocabulary();
+    if (cached && readStorage(sessionStorage, VOCABULARY_VALIDATED_KEY) === cached.etag) {
+        return Promise.resolve(indexVocabulary(cached.infinitives));
+    }
+    return new Promise((resolve, reject) => {
+        const xhr = new XMLHttpRequest();
+        xhr.open('GET', location.origin + '/autocomplete/', true);
+        xhr.responseType = 'json';
+        if (cached) {
+            xhr.setRequestHeader('If-None-Match', cached.etag);
+        }
+        xhr.onreadystatechange = function() {
+            if (this.readyState !== 4) {
+                return;
+            }
+            if (this.status === 304) {
+                writeStorage(sessionStorage, VOCABULARY_VALIDATED_KEY, cached.etag);
+                resolve(indexVocabulary(cached.infinitives));
+            } else if (this.status === 200 && Array.isArray(this.response)) {
+                const etag = this.getResponseHeader('ETag');
+                if (etag) {
+                    writeStorage(localStorage, VOCABULARY_CACHE_KEY,
+                                 JSON.stringify({etag: etag, infinitives: this.response}));
+                    writeStorage(sessionStorage, VOCABULARY_VALIDATED_KEY, etag);
+                }
+                resolve(indexVocabulary(this.response));
+            } else if (cached) {
+                // Offline or failing: suggest from the copy we have.
+                resolve(indexVocabulary(cached.infinitives));
+            } else {
+                reject(this.status);
+            }
+        }
+        xhr.send();
+    });
+}
+
+let vocabulary = null;
+
+function getVocabulary() {
+    if (vocabulary === null) {
+        vocabulary = fetchVocabulary().catch(() => {
+            // Try again on the next keystroke.
+            vocabulary = null;
+            return [];
+        });
+    }
+    return vocabulary;
+}
+
+function completeTerm(entries, term) {
+    const key = foldTerm(term);
+    const matches = [];
+    for (const [folded, infinitive] of entries) {
+        if (folded.startsWith(key)) {
+            matches.push(infinitive);
+            if (matches.length === AUTOCOMPLETE_LIMIT) {
+                break;
+            }
+        }
+    }
+    return matches;
+}
+
+const verbAutoComplete = new autoComplete({
+    selector: 'input[id="search"]',
+    source: function(term, suggest) {
+        getVocabulary().then(entries => suggest(completeTerm(entries, term)));
+    }
+});
@@ -0,0 +1,12 @@
+// Stands in for the two Bootstrap plugins the pages use, without jQuery:
+// the navbar toggler and dismissable alerts.
+document.addEventListener('click', (e) => {
+    const toggler = e.target.closest('[data-toggle="collapse"]');
+    if (toggler) {
+        document.querySelector(toggler.dataset.target).classList.toggle('show');
+    }
+    const dismiss = e.target.closest('[data-dismiss="alert"]');
+    if (dismiss) {
+        dismiss.closest('.alert').remove();
+    }
+});
@@ -0,0 +1,117 @@
+"""
+Bundles and minifies the front-end sources in conjugator/asset_src into the
+files the pages load. The critical CSS is written to a template that
+base.html inlines; the rest goes to conjugator/static/dist, from where
+collectstatic fingerprints and precompresses it like any other static file.
+"""
+import os
+import re
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(APP_DIR, 'asset_src')
+
+# Output path (relative to the app) and sources (relative to SOURCE_DIR). The
+# page chrome, cards and tables are all above the fold, so only the
+# autocomplete styles are loaded asynchronously.
+CRITICAL_CSS = ('templates/conjugator/critical_css.html', ('css/base.css', 'css/components.css', 'css/style.css'))
+BUNDLES = (
+    ('static/dist/site.css', ('css/auto-complete.css',)),
+    ('static/dist/site.js', ('js/auto-complete.js', 'js/ui.js', 'js/searchbar.js')),
+)
+
+CSS_STRING_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+CSS_COMMENT_RE = re.compile(CSS_STRING_RE.pattern + r'|/\*.*?\*/', re.DOTALL)
+CSS_TIGHT_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def _minify_css(css):
+    """
+    Drops comments and collapses whitespace around punctuation, leaving
+    quoted strings (such as data URLs) untouched.
+    """
+    css = CSS_COMMENT_RE.sub(lambda match: match.group(1) or '', css)
+    # Strings land at the odd indices.
+    parts = CSS_STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        code = CSS_TIGHT_RE.sub(r'\1', re.sub(r'\s+', ' ', parts[i]))
+        parts[i] = re.sub(r':\s+', ':', code).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def _minify_js(js):
+    """
+    Drops indentation, blank lines and whole-line // comments. Line breaks
+    are kept, so automatic semicolon insertion behaves as in the sources.
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def minify_css(css):
+    return rcssmin.cssmin(css) if rcssmin else _minify_css(css)
+
+
+def minify_js(js):
+    if rjsmin:
+        # Keeps /*! and license comments.
+        return rjsmin.jsmin(js, keep_bang_comments=True)
+    return _minify_js(js)
+
+
+def read_sources(sources):
+    contents = []
+    for source in sources:
+        with open(os.path.join(SOURCE_DIR, source), encoding='utf-8') as f:
+            contents.append(f.read())
+    return contents
+
+
+def build_css(sources):
+    return '\n'.join(minify_css(css) for css in read_sources(sources)) + '\n'
+
+
+def build_js(sources):
+    # Each file is its own statement list; the semicolon guards against a
+    # source that ends without one.
+    return ';\n'.join(minify_js(js) for js in read_sources(sources)) + '\n'
+
+
+def build():
+    """Returns {output path: contents} for every generated file."""
+    path, sources = CRITICAL_CSS
+    outputs = {path: '{% verbatim %}<style>' + build_css(sources).strip() + '</style>{% endverbatim %}\n'}
+    for path, sources in BUNDLES:
+        outputs[path] = build_js(sources) if path.endswith('.js') else build_css(sources)
+    return outputs
+
+
+def stale_outputs():
+    """Returns the output paths whose contents differ from a fresh build."""
+    stale = []
+    for path, contents in build().items():
+        try:
+            with open(os.path.join(APP_DIR, path), encoding='utf-8') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current != contents:
+            stale.append(path)
+    return stale
+
+
+def write(outputs):
+    for path, contents in outputs.items():
+        full_path = os.path.join(APP_DIR, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(contents)
@@ -0,0 +1,543 @@
+import gzip
+import json
+import os
+import platform
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from contextlib import contextmanager, nullcontext
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import django
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import urlencode
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+from german_verb_project.databases import read_only_database
+
+from . import cache, read_model, store
+from .models import Conjugation, Mood, Tense, Verb, normalize_infinitive
+from .store import PERSONS
+
+DATASET_SIZES = (100, 1000, 10000, 100000)
+# How the benchmarked views connect to the database, see database_mode().
+DATABASE_MODES = ('read-write', 'read-only')
+# Startup phases this much slower than the baseline are noise, not regressions.
+STARTUP_NOISE_MS = 10
+
+# (mood, tense) pairs of the fixture, in fixture order.
+MOOD_TENSES = (
+    ('indicative', 'present'), ('indicative', 'present perfect'), ('indicative', 'preterite'),
+    ('indicative', 'plusquamperfect'), ('indicative', 'future'), ('indicative', 'future perfect'),
+    ('subjunctive I', 'present'), ('subjunctive I', 'present perfect'), ('subjunctive I', 'future'),
+    ('subjunctive I', 'future perfect'), ('subjunctive II', 'preterite'),
+    ('subjunctive II', 'plusquamperfect'), ('subjunctive II', 'future'), ('subjunctive II', 'future perfect'),
+)
+# Assets a page makes the browser fetch, and inline stylesheets. Assets in
+# <noscript> are ignored, as a browser with scripting enabled does.
+ASSET_RE = re.compile(r'<(?:link|script)\b[^>]*?\b(?:href|src)="([^"]+)"')
+STYLE_RE = re.compile(r'<style\b[^>]*>(.*?)</style>', re.DOTALL)
+NOSCRIPT_RE = re.compile(r'<noscript>.*?</noscript>', re.DOTALL)
+
+SYLLABLES = ('b', 'd', 'f', 'g', 'h', 'k', 'l', 'm', 'n', 'r', 's', 't', 'w', 'sch', 'st', 'br', 'fl', 'kl')
+VOWELS = ('a', 'e', 'i', 'o', 'u', 'ä', 'ö', 'ü', 'ei', 'au')
+
+
+def synthetic_infinitive(index):
+    """Returns a unique, pronounceable pseudo-German infinitive for index."""
+    parts = []
+    while True:
+        index, syllable = divmod(index, len(SYLLABLES) * len(VOWELS))
+        consonant, vowel = divmod(syllable, len(VOWELS))
+        parts.append(SYLLABLES[consonant] + VOWELS[vowel])
+        if not index:
+            break
+        index -= 1
+    return ''.join(parts) + 'en'
+
+
+def generate_dataset(size, batch_size=2000):
+    """
+    Replaces the verb tables' contents with size synthetic verbs, each with
+    the 14 mood/tense conjugations of the real fixture. Only ever run this
+    against a throwaway database.
+    """
+    Conjugation.objects.all().delete()
+    Verb.objects.all().delete()
+    for model, names in ((Mood, {mood for mood, _ in MOOD_TENSES}), (Tense, {tense for _, tense in MOOD_TENSES})):
+        model.objects.bulk_create([model(name=name) for name in sorted(names)], ignore_conflicts=True)
+
+    for start in range(0, size, batch_size):
+        verbs = []
+        conjugations = []
+        for index in range(start, min(start + batch_size, size)):
+            infinitive = synthetic_infinitive(index)
+            stem = infinitive[:-2]
+            verbs.append(Verb(infinitive=infinitive, lookup_key=normalize_infinitive(infinitive),
+                              frequency=index + 1, translation=f'to {stem}',
+                              present_participle=infinitive + 'd', past_participle='ge' + stem + 't'))
+            for mood, tense in MOOD_TENSES:
+                forms = {person: f'{stem}{person}' for person in PERSONS}
+                conjugations.append(Conjugation(verb_id=infinitive, mood_id=mood, tense_id=tense, **forms))
+        Verb.objects.bulk_create(verbs)
+        Conjugation.objects.bulk_create(conjugations)
+    store.invalidate()
+    cache.bump_dataset_version()
+    read_model.refresh()
+
+
+def benchmark_urls(size, requests, seed=0):
+    """Returns {view name: [url, ...]} with requests sample URLs per view."""
+    rng = random.Random(seed)
+    infinitives = [synthetic_infinitive(rng.randrange(size)) for _ in range(requests)]
+    return {
+        'home': [reverse('home')] * requests,
+        'index_page': [reverse('home_after', kwargs={'after': rng.randrange(size)}) for _ in range(requests)],
+        'conjugation': [reverse('conjugation', kwargs={'infinitive': infinitive}) for infinitive in infinitives],
+        'search': [reverse('search') + '?' + urlencode({'q': infinitive.upper()}) for infinitive in infinitives],
+        # A typo: the second letter dropped.
+        'fuzzy_search': [reverse('search') + '?' + urlencode({'q': infinitive[0] + infinitive[2:]})
+                         for infinitive in infinitives],
+        'autocomplete': [reverse('autocomplete') + '?' + urlencode({'q': infinitive[:3]})
+                         for infinitive in infinitives],
+        # The conjugation pages again, from the VerbPage read model.
+        'read_model': [reverse('conjugation', kwargs={'infinitive': infinitive}) for infinitive in infinitives],
+        'drill': [reverse('drill_api') + '?' + urlencode({'count': 100, 'weighted': 1, 'seed': seed})
+                  for seed in range(requests)],
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(latencies):
+    """Returns latency percentiles in milliseconds and throughput."""
+    total = sum(latencies)
+    return {
+        'requests': len(latencies),
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p90_ms': percentile(latencies, 0.9) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': max(latencies) * 1000,
+        'throughput_rps': len(latencies) / total if total else 0,
+    }
+
+
+def reset_caches():
+    store.invalidate()
+    cache.get_cache().clear()
+
+
+def benchmark_test_client(urls, allocation_samples=20):
+    """
+    Requests every url through the Django test client, recording latency,
+    queries per request and, for the first allocation_samples requests, peak
+    memory allocated per request.
+    """
+    client = Client(HTTP_HOST='127.0.0.1')
+    reset_caches()
+    start = time.perf_counter()
+    client.get(urls[0])
+    first_request = time.perf_counter() - start
+
+    latencies = []
+    queries = []
+    for url in urls:
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - start)
+        queries.append(len(context.captured_queries))
+
+    allocations = []
+    for url in urls[:allocation_samples]:
+        tracemalloc.start()
+        client.get(url)
+        allocations.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    result = summarize(latencies)
+    result.update({
+        'first_request_ms': first_request * 1000,
+        'queries_per_request': statistics.mean(queries),
+        'peak_alloc_kib': statistics.mean(allocations) / 1024 if allocations else None,
+    })
+    return result
+
+
+def page_weight(url):
+    """
+    Returns the weight of the page at url: its HTML, its inline CSS and the
+    stylesheets, scripts and icons it makes the browser fetch, raw and
+    gzipped. Assets on other origins can't be measured offline, so they are
+    only counted and listed.
+    """
+    html = Client(HTTP_HOST='127.0.0.1').get(url).content
+    page = NOSCRIPT_RE.sub('', html.decode())
+    assets = []
+    external = []
+    for asset_url in ASSET_RE.findall(page):
+        if asset_url.startswith(settings.STATIC_URL):
+            with staticfiles_storage.open(asset_url[len(settings.STATIC_URL):]) as f:
+                assets.append(f.read())
+        else:
+            external.append(asset_url)
+    return {
+        'url': url,
+        'requests': 1 + len(assets) + len(external),
+        'html_bytes': len(html),
+        'html_gzip_bytes': len(gzip.compress(html)),
+        'inline_css_bytes': sum(len(style.encode()) for style in STYLE_RE.findall(page)),
+        'asset_bytes': sum(len(asset) for asset in assets),
+        'asset_gzip_bytes': sum(len(gzip.compress(asset)) for asset in assets),
+        'external_assets': external,
+    }
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def load_test(base, urls, concurrency):
+    """
+    Requests every url from the server at base over HTTP from concurrency
+    client threads, after one warmup request.
+    """
+    opener = urllib.request.build_opener(NoRedirect)
+    latencies = []
+    lock = threading.Lock()
+
+    def fetch(url):
+        try:
+            opener.open(base + url).read()
+        except urllib.error.HTTPError as e:
+            e.read()
+
+    def worker(worker_urls):
+        for url in worker_urls:
+            start = time.perf_counter()
+            fetch(url)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    fetch(urls[0])
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(urls[i::concurrency],)) for i in range(concurrency)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    wall_time = time.perf_counter() - start
+
+    result = summarize(latencies)
+    result['throughput_rps'] = len(latencies) / wall_time if wall_time else 0
+    result['concurrency'] = concurrency
+    return result
+
+
+def benchmark_wsgi_server(urls, concurrency=4):
+    """
+    Serves the project through a real (wsgiref) WSGI server on a random port
+    and requests every url over HTTP from concurrency client threads.
+    """
+    server = make_server('127.0.0.1', 0, WSGIHandler(), server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    reset_caches()
+    try:
+        return load_test(f'http://127.0.0.1:{server.server_port}', urls, concurrency)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def benchmark_asgi_server(urls, concurrency=4):
+    """
+    Serves the project through uvicorn with its ASGI application on a random
+    port and requests every url over HTTP from concurrency client threads.
+    """
+    if uvicorn is None:
+        raise RuntimeError('The ASGI benchmark requires uvicorn.')
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    config = uvicorn.Config(get_asgi_application(), lifespan='off', log_level='warning', access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('The ASGI server failed to start.')
+        time.sleep(0.01)
+    reset_caches()
+    try:
+        return load_test(f'http://127.0.0.1:{sock.getsockname()[1]}', urls, concurrency)
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Measures the search redirect itself rather than the page it points to."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+@contextmanager
+def database_mode(mode):
+    """
+    Opens the default database read-only for the duration, like
+    CONJUGATOR_READ_ONLY does (see read_only_database()), if mode is
+    'read-only'. Connections opened by other threads follow too, since they
+    share the settings.
+    """
+    if mode == 'read-write':
+        yield
+        return
+    original = dict(connection.settings_dict)
+    connection.close()
+    connection.settings_dict.update(read_only_database(original))
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(original)
+
+
+def startup_time(database='read-write', runs=3):
+    """
+    Starts manage.py warmup in runs fresh processes against the current
+    database, opened read-only if database is 'read-only', and returns the
+    median milliseconds of the whole process and of each warm-up phase, or
+    None if the database is an in-memory SQLite one that a subprocess can't
+    open.
+    """
+    name = connection.settings_dict['NAME']
+    if connection.vendor != 'sqlite' or connection.creation.is_in_memory_db(name):
+        return None
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.abspath(name)}',
+               CONJUGATOR_READ_ONLY='1' if database == 'read-only' else '')
+    command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'warmup', '--json']
+    process_times = []
+    phase_times = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        process_times.append(time.perf_counter() - start)
+        for phase in json.loads(output):
+            phase_times.setdefault(phase['name'], []).append(phase['seconds'])
+    return {
+        'process_ms': statistics.median(process_times) * 1000,
+        'phases_ms': {name: statistics.median(times) * 1000 for name, times in phase_times.items()},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, requests, servers=('client', 'wsgi'), concurrency=4, seed=0, databases=('read-write',), log=None):
+    """
+    Benchmarks every view at every dataset size, connecting to the database
+    in each of the databases modes (see database_mode()), and returns the
+    results as a JSON serializable dict.
+    """
+    results = []
+    weights = []
+    startups = []
+    for size in sizes:
+        start = time.perf_counter()
+        generate_dataset(size)
+        if log:
+            log(f'Generated {size} verbs in {time.perf_counter() - start:.1f}s')
+        read_model.rebuild()
+        for database in databases:
+            startup = startup_time(database)
+            if startup:
+                startups.append(dict(startup, size=size, database=database))
+                if log:
+                    log(format_startup(startups[-1]))
+        if not weights:
+            infinitive = synthetic_infinitive(0)
+            for url in (reverse('home'), reverse('conjugation', kwargs={'infinitive': infinitive})):
+                weights.append(page_weight(url))
+                if log:
+                    log(format_page_weight(weights[-1]))
+        for database in databases:
+            with database_mode(database):
+                for view, urls in benchmark_urls(size, requests, seed).items():
+                    with override_settings(CONJUGATOR_READ_MODEL=True) if view == 'read_model' else nullcontext():
+                        for server in ('client', 'wsgi', 'asgi'):
+                            if server not in servers:
+                                continue
+                            if server == 'client':
+                                result = benchmark_test_client(urls)
+                            elif server == 'wsgi':
+                                result = benchmark_wsgi_server(urls, concurrency)
+                            else:
+                                result = benchmark_asgi_server(urls, concurrency)
+                            results.append(dict(result, size=size, view=view, server=server, database=database))
+                            if log:
+                                log(format_result(results[-1]))
+    if log and len(databases) > 1:
+        for line in compare_databases(results):
+            log(line)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': requests,
+            'seed': seed,
+        },
+        'results': results,
+        'page_weight': weights,
+        'startup': startups,
+    }
+
+
+def format_result(result):
+    line = (f"{result['size']:>7} {result['view']:<13} {result['server']:<6} "
+            f"{result.get('database', 'read-write'):<10} "
+            f"p50 {result['p50_ms']:8.3f}ms  p99 {result['p99_ms']:8.3f}ms  "
+            f"{result['throughput_rps']:9.1f} req/s")
+    if 'queries_per_request' in result:
+        line += f"  {result['queries_per_request']:.1f} queries  {result['peak_alloc_kib']:.0f} KiB"
+    return line
+
+
+def format_page_weight(weight):
+    line = (f"{weight['url']:<30} {weight['requests']:>2} requests  html {weight['html_gzip_bytes']:>6} B gz  "
+            f"assets {weight['asset_gzip_bytes']:>7} B gz  inline css {weight['inline_css_bytes']:>5} B")
+    if weight['external_assets']:
+        line += f"  + {len(weight['external_assets'])} external"
+    return line
+
+
+def format_startup(startup):
+    database = startup.get('database', 'read-write')
+    return f"{startup['size']:>7} startup {database:<10} process {startup['process_ms']:8.1f}ms  " + '  '.join(
+        f'{name} {ms:.1f}ms' for name, ms in startup['phases_ms'].items())
+
+
+def compare_databases(results):
+    """
+    Returns a line per size, view and server comparing the throughput of
+    each database mode with the read-write one.
+    """
+    def key(result):
+        return result['size'], result['view'], result['server']
+
+    read_write = {key(result): result for result in results if result.get('database', 'read-write') == 'read-write'}
+    lines = []
+    for result in results:
+        base = read_write.get(key(result))
+        if base is None or result is base:
+            continue
+        change = (result['throughput_rps'] / base['throughput_rps'] - 1) * 100 if base['throughput_rps'] else 0
+        lines.append('{:>7} {:<13} {:<6} '.format(*key(result))
+                     + f"{result['database']} {result['throughput_rps']:9.1f} req/s vs read-write "
+                       f"{base['throughput_rps']:9.1f} req/s ({change:+.0f}%)")
+    return lines
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Returns a list of regressions of current against baseline: any p50
+    latency more than threshold slower, or any increase in queries per
+    request, for the same size, view and server, any page more than
+    threshold heavier or making more requests, and any startup phase more
+    than threshold (and STARTUP_NOISE_MS) slower for the same size.
+    """
+    def key(result):
+        return result['size'], result['view'], result['server'], result.get('database', 'read-write')
+
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        size, view, server, database = key(result)
+        label = f'{size} {view} {server}' + ('' if database == 'read-write' else f' {database}')
+        if result['p50_ms'] > old['p50_ms'] * (1 + threshold):
+            regressions.append(f"{label}: p50 {old['p50_ms']:.3f}ms -> {result['p50_ms']:.3f}ms")
+        if result.get('queries_per_request', 0) > old.get('queries_per_request', 0):
+            regressions.append(f"{label}: queries {old['queries_per_request']} -> {result['queries_per_request']}")
+
+    def total(weight):
+        return weight['html_gzip_bytes'] + weight['asset_gzip_bytes']
+
+    previous_weights = {weight['url']: weight for weight in baseline.get('page_weight', [])}
+    for weight in current.get('page_weight', []):
+        old = previous_weights.get(weight['url'])
+        if old is None:
+            continue
+        if total(weight) > total(old) * (1 + threshold):
+            regressions.append(f"{weight['url']}: page weight {total(old)} B -> {total(weight)} B gzipped")
+        if weight['requests'] > old['requests']:
+            regressions.append(f"{weight['url']}: requests {old['requests']} -> {weight['requests']}")
+
+    def startup_times(startup):
+        return dict(startup['phases_ms'], process=startup['process_ms'])
+
+    def startup_key(startup):
+        return startup['size'], startup.get('database', 'read-write')
+
+    previous_startups = {startup_key(startup): startup for startup in baseline.get('startup', [])}
+    for startup in current.get('startup', []):
+        old = previous_startups.get(startup_key(startup))
+        if old is None:
+            continue
+        old_times = startup_times(old)
+        for name, ms in startup_times(startup).items():
+            old_ms = old_times.get(name)
+            if old_ms is not None and ms > old_ms * (1 + threshold) and ms - old_ms > STARTUP_NOISE_MS:
+                size, database = startup_key(startup)
+                label = f'{size} startup' + ('' if database == 'read-write' else f' {database}')
+                regressions.append(f'{label} {name}: {old_ms:.1f}ms -> {ms:.1f}ms')
+    return regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
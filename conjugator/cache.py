@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import DatasetVersion
+
+CACHE_ALIAS = 'conjugator'
+
+# (dataset version, time.monotonic() it was read from the database at)
+_version = None
+_version_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_dataset_version_current():
+    """Returns True if get_dataset_version() won't query."""
+    version = _version
+    return version is not None and time.monotonic() - version[1] < settings.CONJUGATOR_DATASET_CHECK_INTERVAL
+
+
+def get_dataset_version():
+    """
+    Returns the dataset version: the timestamp of the last write to the verb
+    tables, from the DatasetVersion row every worker shares, so all workers
+    agree on it and on the Last-Modified of the pages. The row is read at
+    most once per CONJUGATOR_DATASET_CHECK_INTERVAL seconds, so a write made
+    through another worker shows up within that time.
+    """
+    global _version
+    if not is_dataset_version_current():
+        with _version_lock:
+            if not is_dataset_version_current():
+                modified = DatasetVersion.objects.values_list('modified', flat=True).first()
+                _version = (modified.timestamp() if modified else 0.0, time.monotonic())
+    return _version[0]
+
+
+def bump_dataset_version():
+    """Marks every cached page and every worker's store as stale."""
+    global _version
+    modified = timezone.now()
+    DatasetVersion.objects.update_or_create(pk=1, defaults={'modified': modified})
+    _version = (modified.timestamp(), time.monotonic())
+
+
+def get_fragment(name, key, render):
+    """
+    Returns the fragment cached under name and key for the current dataset
+    version, calling render() to produce and cache it on a miss.
+    """
+    cache = get_cache()
+    cache_key = 'conjugator:fragment:%s:%s:%s' % (name, get_dataset_version(), hashlib.md5(key.encode()).hexdigest())
+    fragment = cache.get(cache_key)
+    if fragment is None:
+        fragment = render()
+        cache.set(cache_key, fragment, timeout=None)
+    return fragment
+
+
+def is_cacheable(request):
+    """
+    Pages may carry flash messages or per-user content once a messages or
+    session cookie is present, so such requests bypass the cache.
+    """
+    return (request.method in ('GET', 'HEAD')
+            and CookieStorage.cookie_name not in request.COOKIES
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+def is_private(response):
+    return 'private' in response.get('Cache-Control', '')
+
+
+def cached_page(view):
+    """
+    Caches the full response of view keyed by URL and dataset version. Cached
+    responses carry a strong ETag and Last-Modified, and conditional GETs are
+    answered with 304 straight from the cache, without calling the view.
+    Responses the view marks private are not cached.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        version = get_dataset_version()
+        key = 'conjugator:page:%s:%s' % (version, hashlib.md5(request.get_full_path().encode()).hexdigest())
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or is_private(response):
+                return response
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.sha1(response.content).hexdigest()),
+            }
+            cache.set(key, entry, timeout=None)
+
+        response = get_conditional_response(request, etag=entry['etag'], last_modified=int(version))
+        if response is None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(version)
+        patch_cache_control(response, public=True, max_age=settings.CONJUGATOR_CACHE_MAX_AGE)
+        return response
+
+    return wrapper
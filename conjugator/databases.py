@@ -0,0 +1,66 @@
+"""
+Database connection handling for serving. With CONJUGATOR_READ_ONLY the
+default database is opened read-only and writes go through a separate WRITER
+alias to the same database (see german_verb_project.databases), which
+ReadOnlyRouter routes them to. Persistent connections can also be checked
+when a request first uses them, see check_connections().
+"""
+from django.conf import settings
+from django.db import connections
+
+from german_verb_project.databases import WRITER
+
+
+class ReadOnlyRouter:
+    """Sends writes to WRITER, if configured, and reads to the default database."""
+
+    def db_for_write(self, model, **hints):
+        return WRITER if WRITER in settings.DATABASES else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Only through WRITER, the default alias can't write.
+        return db == WRITER if WRITER in settings.DATABASES else None
+
+
+def configure_connection(connection):
+    """Runs the PRAGMAS of a new SQLite connection's settings, if any."""
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if pragmas and connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections():
+    """
+    Marks the persistent connections to databases with CONN_HEALTH_CHECKS set
+    as unchecked, so that the request about to use them checks them on its
+    first query, and reconnects instead of failing if they no longer work
+    (as Django 4.1's CONN_HEALTH_CHECKS does). Requests that don't query a
+    database don't pay for the check.
+    """
+    for connection in connections.all():
+        if connection.settings_dict.get('CONN_HEALTH_CHECKS') and connection.connection is not None:
+            if '_cursor' not in vars(connection):
+                connection._cursor = _checked_cursor(connection, connection._cursor)
+            connection.health_check_done = False
+
+
+def _checked_cursor(connection, cursor):
+    """
+    Wraps the connection's cursor factory to close the connection before
+    its first use since check_connections(), if it no longer works, so that
+    it reconnects. Connections inside a transaction are left alone.
+    """
+    def checked_cursor(name=None):
+        if not connection.health_check_done:
+            if (connection.connection is not None and not connection.in_atomic_block
+                    and not connection.is_usable()):
+                connection.close()
+            connection.health_check_done = True
+        return cursor(name)
+    return checked_cursor
@@ -0,0 +1,122 @@
+"""
+Random conjugation drills. Every non-empty (verb, mood, tense, person) cell
+of the store is laid out once in flat arrays of verb ranks and answer ids,
+one segment per (mood, tense, person), so that a draw is a couple of array
+lookups rather than a query. Answers are only read from the store, e.g. the
+snapshot, when drawn.
+"""
+import bisect
+import threading
+from array import array
+from collections import namedtuple
+
+Drill = namedtuple('Drill', ['verb', 'mood', 'tense', 'person', 'answer'])
+
+
+def alias_table(weights):
+    """
+    Returns Vose's alias table (probabilities, aliases) for drawing index i
+    with probability weights[i] / sum(weights) in constant time.
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    probabilities = array('d', [1.0]) * count
+    aliases = array('I', range(count))
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probabilities[less] = scaled[less]
+        aliases[less] = more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    return probabilities, aliases
+
+
+class Segment:
+    """The cells of one (mood, tense, person): verb ranks and answer ids."""
+
+    def __init__(self):
+        self.ranks = array('I')
+        self.answers = array('I')
+        self._alias = None
+
+    def alias(self, verb_weights):
+        """Returns (total weight, alias table) of the cells, built on first use."""
+        if self._alias is None:
+            weights = [verb_weights[rank] for rank in self.ranks]
+            self._alias = sum(weights), alias_table(weights)
+        return self._alias
+
+    def draw(self, rng, verb_weights, weighted):
+        """Returns the index of a random cell, by verb weight if weighted."""
+        index = int(rng.random() * len(self.ranks))
+        if weighted:
+            _, (probabilities, aliases) = self.alias(verb_weights)
+            if rng.random() >= probabilities[index]:
+                index = aliases[index]
+        return index
+
+
+class Deck:
+    """Every drillable cell of a conjugation store."""
+
+    def __init__(self, conjugation_store):
+        self.store = conjugation_store
+        # A verb's use is roughly inversely proportional to its frequency
+        # rank (Zipf's law).
+        self.verb_weights = array('d', (1 / max(frequency, 1) for frequency in conjugation_store.frequencies()))
+        segments = {}
+        for rank, mood, tense, person, answer_id in conjugation_store.drill_cells():
+            segment = segments.get((mood, tense, person))
+            if segment is None:
+                segment = segments[mood, tense, person] = Segment()
+            segment.ranks.append(rank)
+            segment.answers.append(answer_id)
+        # Keys in insertion order, so that a seed always draws the same cells.
+        self.segments = segments
+
+    def draw(self, rng, count, moods=None, tenses=None, persons=None, weighted=False):
+        """
+        Returns count random Drills from the cells matching the filters, or
+        an empty list if none do. Cells are drawn uniformly, or by their
+        verb's frequency if weighted.
+        """
+        selected = [
+            (key, segment) for key, segment in self.segments.items()
+            if (moods is None or key[0] in moods) and (tenses is None or key[1] in tenses)
+            and (persons is None or key[2] in persons)
+        ]
+        if not selected:
+            return []
+        cumulative = []
+        total = 0
+        for _, segment in selected:
+            total += segment.alias(self.verb_weights)[0] if weighted else len(segment.ranks)
+            cumulative.append(total)
+        last = len(selected) - 1
+        drills = []
+        for _ in range(count):
+            position = min(bisect.bisect_right(cumulative, rng.random() * total), last)
+            (mood, tense, person), segment = selected[position]
+            index = segment.draw(rng, self.verb_weights, weighted)
+            drills.append(Drill(self.store.verbs[segment.ranks[index]], mood, tense, person,
+                                self.store.drill_answer(segment.answers[index])))
+        return drills
+
+
+_deck = None
+_lock = threading.Lock()
+
+
+def get_deck(conjugation_store):
+    """Returns the deck of conjugation_store, building it on first use."""
+    global _deck
+    deck = _deck
+    if deck is None or deck[0] is not conjugation_store:
+        with _lock:
+            if _deck is None or _deck[0] is not conjugation_store:
+                _deck = (conjugation_store, Deck(conjugation_store))
+            deck = _deck
+    return deck[1]
@@ -0,0 +1,482 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from .models import Conjugation, Mood, Tense, Verb
+from .store import PERSONS, group_by_mood
+
+# Strong, mixed and otherwise irregular verbs, one per line: infinitive, the
+# du/er present stem if it changes (a trailing * marks the preterite-present
+# singular of the modals and wissen, used without endings for ich and er),
+# the preterite stem (or its ich form for weak preterites, ending in e), the
+# subjunctive II ich form and the past participle. '-' means regular.
+STEM_TABLE = """
+befehlen befiehl befahl befähle befohlen
+beginnen - begann - begonnen
+beißen - biss - gebissen
+bergen birg barg - geborgen
+biegen - bog - gebogen
+bieten - bot - geboten
+binden - band - gebunden
+bitten - bat - gebeten
+blasen bläs blies - geblasen
+bleiben - blieb - geblieben
+braten brät briet - gebraten
+brechen brich brach - gebrochen
+brennen - brannte brennte gebrannt
+bringen - brachte brächte gebracht
+denken - dachte dächte gedacht
+dringen - drang - gedrungen
+dürfen darf* durfte dürfte gedurft
+empfehlen empfiehl empfahl empföhle empfohlen
+essen iss aß - gegessen
+fahren fähr fuhr - gefahren
+fallen fäll fiel - gefallen
+fangen fäng fing - gefangen
+finden - fand - gefunden
+fliegen - flog - geflogen
+fliehen - floh - geflohen
+fließen - floss - geflossen
+fressen friss fraß - gefressen
+frieren - fror - gefroren
+geben gib gab - gegeben
+gehen - ging - gegangen
+gelingen - gelang - gelungen
+gelten gilt galt - gegolten
+genießen - genoss - genossen
+geschehen geschieh geschah - geschehen
+gewinnen - gewann - gewonnen
+gießen - goss - gegossen
+gleichen - glich - geglichen
+gleiten - glitt - geglitten
+graben gräb grub - gegraben
+greifen - griff - gegriffen
+haben - hatte hätte gehabt
+halten hält hielt - gehalten
+heben - hob - gehoben
+heißen - hieß - geheißen
+helfen hilf half - geholfen
+kennen - kannte kennte gekannt
+klingen - klang - geklungen
+kommen - kam - gekommen
+können kann* konnte könnte gekonnt
+kriechen - kroch - gekrochen
+laden läd lud - geladen
+lassen läss ließ - gelassen
+laufen läuf lief - gelaufen
+leiden - litt - gelitten
+leihen - lieh - geliehen
+lesen lies las - gelesen
+liegen - lag - gelegen
+lügen - log - gelogen
+meiden - mied - gemieden
+messen miss maß - gemessen
+mögen mag* mochte möchte gemocht
+müssen muss* musste müsste gemusst
+nehmen nimm nahm - genommen
+nennen - nannte nennte genannt
+pfeifen - pfiff - gepfiffen
+raten rät riet - geraten
+reiben - rieb - gerieben
+reißen - riss - gerissen
+reiten - ritt - geritten
+rennen - rannte rennte gerannt
+riechen - roch - gerochen
+rufen - rief - gerufen
+schaffen - schuf - geschaffen
+scheiden - schied - geschieden
+scheinen - schien - geschienen
+schieben - schob - geschoben
+schießen - schoss - geschossen
+schlafen schläf schlief - geschlafen
+schlagen schläg schlug - geschlagen
+schleichen - schlich - geschlichen
+schließen - schloss - geschlossen
+schmelzen schmilz schmolz - geschmolzen
+schneiden - schnitt - geschnitten
+schreiben - schrieb - geschrieben
+schreien - schrie - geschrien
+schweigen - schwieg - geschwiegen
+schwimmen - schwamm - geschwommen
+sehen sieh sah - gesehen
+sein - war wäre gewesen
+singen - sang - gesungen
+sinken - sank - gesunken
+sitzen - saß - gesessen
+sollen soll* sollte sollte gesollt
+sprechen sprich sprach - gesprochen
+springen - sprang - gesprungen
+stechen stich stach - gestochen
+stehen - stand - gestanden
+stehlen stiehl stahl - gestohlen
+steigen - stieg - gestiegen
+sterben stirb starb stürbe gestorben
+stoßen stöß stieß - gestoßen
+streichen - strich - gestrichen
+streiten - stritt - gestritten
+tragen träg trug - getragen
+treffen triff traf - getroffen
+treiben - trieb - getrieben
+treten tritt trat - getreten
+trinken - trank - getrunken
+tun - tat - getan
+verderben verdirb verdarb verdürbe verdorben
+vergessen vergiss vergaß - vergessen
+verlieren - verlor - verloren
+verzeihen - verzieh - verziehen
+wachsen wächs wuchs - gewachsen
+waschen wäsch wusch - gewaschen
+weichen - wich - gewichen
+weisen - wies - gewiesen
+werben wirb warb würbe geworben
+werden - wurde würde geworden
+werfen wirf warf würfe geworfen
+wiegen - wog - gewogen
+wissen weiß* wusste wüsste gewusst
+wollen will* wollte wollte gewollt
+ziehen - zog - gezogen
+zwingen - zwang - gezwungen
+"""
+
+
+# Simple tenses that no rule produces, as (ich, du, er, wir, ihr, sie).
+IRREGULAR_FORMS = {
+    ('sein', 'indicative', 'present'): ('bin', 'bist', 'ist', 'sind', 'seid', 'sind'),
+    ('sein', 'subjunctive I', 'present'): ('sei', 'seiest', 'sei', 'seien', 'seiet', 'seien'),
+    ('haben', 'indicative', 'present'): ('habe', 'hast', 'hat', 'haben', 'habt', 'haben'),
+    ('werden', 'indicative', 'present'): ('werde', 'wirst', 'wird', 'werden', 'werdet', 'werden'),
+    ('sein', 'imperative', 'present'): ('', 'sei', '', 'seien wir', 'seid', 'seien Sie'),
+    ('werden', 'imperative', 'present'): ('', 'werde', '', 'werden wir', 'werdet', 'werden Sie'),
+}
+
+# Verbs whose perfect tenses take sein. Verbs with a separable prefix take
+# the auxiliary of their base verb, verbs with an inseparable prefix take
+# haben unless listed here themselves.
+SEIN_VERBS = frozenset("""
+begegnen bleiben entstehen erscheinen fahren fallen fliegen fliehen folgen gehen gelingen geschehen gleiten
+kommen kriechen laufen passieren reisen reiten rennen schleichen schwimmen sein sinken springen stehen steigen
+sterben treten vergehen wachsen wandern weichen werden ziehen
+""".split())
+
+# Common weak verbs that separable verbs are formed from. Together with the
+# verbs of STEM_TABLE and UNPREFIXED they are the only base verbs a separable
+# prefix is split off from, so that words such as ankern or angeln are left
+# whole.
+WEAK_VERBS = frozenset("""
+arbeiten bauen brauchen danken decken drehen drücken fassen folgen führen fühlen füllen hören holen
+kaufen kehren klären kochen lachen leben legen lehren lernen machen malen melden merken nutzen öffnen packen
+passen planen prüfen putzen räumen reden reichen reisen richten rücken sagen schalten schauen schicken setzen
+sorgen spielen stellen stimmen stören suchen teilen wachen wählen wandern warten wecken wechseln wohnen zahlen
+zählen zeigen
+""".split())
+
+SEPARABLE_PREFIXES = tuple(sorted("""
+ab an auf aus bei dar ein fern fest fort heim her heraus herein hin hinaus hinzu hoch los mit nach statt teil
+vor vorbei weg weiter zu zurück zusammen
+""".split(), key=len, reverse=True))
+# These are separable in some verbs and inseparable in others (ich setze
+# über, but ich übersetze). They are taken as inseparable, as in most of the
+# verbs they form, except in the verbs of SEPARABLE_DUAL_VERBS.
+DUAL_PREFIXES = ('durch', 'hinter', 'über', 'um', 'unter', 'wider')
+SEPARABLE_DUAL_VERBS = frozenset("""
+durchfallen durchführen durchhalten durchlesen durchsetzen überkochen umbauen umbringen umdrehen umfallen
+umkehren umsteigen umziehen unterbringen untergehen
+""".split())
+INSEPARABLE_PREFIXES = DUAL_PREFIXES + ('miss', 'emp', 'ent', 'ver', 'zer', 'be', 'er', 'ge')
+
+# Words that merely look like they start with a prefix.
+UNPREFIXED = frozenset(['antworten', 'beichten', 'beten', 'betteln', 'erben', 'ernten', 'hindern', 'zaubern'])
+
+# Consonant clusters a base verb after a prefix may start with.
+ONSETS = ('bl', 'br', 'ch', 'dr', 'fl', 'fr', 'gl', 'gn', 'gr', 'kl', 'kn', 'kr', 'pf', 'ph', 'pl', 'pr', 'qu',
+          'sch', 'sk', 'sl', 'sm', 'sn', 'sp', 'st', 'str', 'sw', 'th', 'tr', 'wr', 'zw')
+
+VOWELS = 'aeiouäöüy'
+UMLAUTS = {'a': 'ä', 'o': 'ö', 'u': 'ü'}
+
+INFINITIVE_RE = re.compile(r'[a-zäöüß]{2,}(?:en|eln|ern)|tun|sein')
+
+# (mood, tense) of every table, in the order of the fixture and the
+# conjugation page.
+MOOD_TENSES = (
+    ('indicative', 'present'), ('indicative', 'present perfect'), ('indicative', 'preterite'),
+    ('indicative', 'plusquamperfect'), ('indicative', 'future'), ('indicative', 'future perfect'),
+    ('subjunctive I', 'present'), ('subjunctive I', 'present perfect'), ('subjunctive I', 'future'),
+    ('subjunctive I', 'future perfect'), ('subjunctive II', 'preterite'),
+    ('subjunctive II', 'plusquamperfect'), ('subjunctive II', 'future'), ('subjunctive II', 'future perfect'),
+    ('imperative', 'present'),
+)
+
+# Generated verbs are kept as tuples of strings, so the cache stays small.
+CACHE_SIZE = 4096
+
+Stems = namedtuple('Stems', ['present', 'preterite', 'subjunctive', 'participle'])
+Analysis = namedtuple('Analysis', ['separable', 'inseparable', 'base'])
+GeneratedVerb = namedtuple('GeneratedVerb', ['infinitive', 'present_participle', 'past_participle', 'tables'])
+
+
+def is_plausible_base(word):
+    """Returns True if word could be a verb left after stripping a prefix."""
+    if word.endswith(('eln', 'ern')):
+        stem = word[:-1]
+    elif word.endswith('en'):
+        stem = word[:-2]
+    else:
+        return False
+    if not any(letter in VOWELS for letter in stem):
+        return False
+    return word[0] in VOWELS or word[1] in VOWELS or word.startswith(ONSETS)
+
+
+def split_inseparable(infinitive):
+    if infinitive not in KNOWN_VERBS:
+        for prefix in INSEPARABLE_PREFIXES:
+            base = infinitive[len(prefix):]
+            if infinitive.startswith(prefix) and is_plausible_base(base):
+                return Analysis('', prefix, base)
+    return Analysis('', '', infinitive)
+
+
+def analyze(infinitive):
+    """
+    Splits infinitive into a separable prefix, an inseparable prefix and the
+    base verb, any of the prefixes possibly empty. A separable prefix is only
+    split off if what remains is a known verb, possibly with an inseparable
+    prefix (anerkennen).
+    """
+    if infinitive in KNOWN_VERBS:
+        return Analysis('', '', infinitive)
+    if infinitive in SEPARABLE_DUAL_VERBS:
+        prefixes = DUAL_PREFIXES
+    else:
+        prefixes = SEPARABLE_PREFIXES
+    for prefix in prefixes:
+        if infinitive.startswith(prefix):
+            analysis = split_inseparable(infinitive[len(prefix):])
+            if analysis.base in KNOWN_VERBS:
+                return analysis._replace(separable=prefix)
+    return split_inseparable(infinitive)
+
+
+def can_conjugate(infinitive):
+    """Returns True if infinitive looks like a German infinitive."""
+    return INFINITIVE_RE.fullmatch(infinitive) is not None
+
+
+def word_stem(infinitive):
+    if infinitive.endswith(('eln', 'ern')) or infinitive in ('tun', 'sein'):
+        return infinitive[:-1]
+    return infinitive[:-2]
+
+
+def needs_e(stem):
+    """Returns True if endings starting with s or t need an e before them."""
+    if stem.endswith(('d', 't')):
+        return True
+    # atmen, rechnen, but not lernen, kommen or wohnen.
+    if not stem.endswith(('m', 'n')) or len(stem) < 3 or stem[-2] in VOWELS + 'lrmn':
+        return False
+    return stem[-2] != 'h' or stem[-3] not in VOWELS
+
+
+def umlaut(stem):
+    if 'au' in stem:
+        index = stem.rindex('au')
+        return stem[:index] + 'äu' + stem[index + 2:]
+    for index in range(len(stem) - 1, -1, -1):
+        if stem[index] in UMLAUTS:
+            return stem[:index] + UMLAUTS[stem[index]] + stem[index + 1:]
+    return stem
+
+
+def parse_stem_table(table):
+    """
+    Returns {infinitive: Stems} for STEM_TABLE, with the subjunctive II of
+    strong verbs derived from their preterite stem where it isn't given.
+    """
+    stems = {}
+    for line in table.strip().splitlines():
+        infinitive, present, preterite, subjunctive, participle = (
+            None if field == '-' else field for field in line.split())
+        if subjunctive is None and preterite is not None:
+            subjunctive = preterite if preterite.endswith('e') else umlaut(preterite) + 'e'
+        stems[infinitive] = Stems(present, preterite, subjunctive, participle)
+    return stems
+
+
+STEMS = parse_stem_table(STEM_TABLE)
+KNOWN_VERBS = frozenset(STEMS) | {verb for verb, _, _ in IRREGULAR_FORMS} | WEAK_VERBS | UNPREFIXED
+
+
+def weak_forms(stem):
+    """Forms of a weak preterite or subjunctive II ending in e."""
+    return (stem, stem + 'st', stem, stem + 'n', stem + 't', stem + 'n')
+
+
+def present(infinitive, stems):
+    stem = word_stem(infinitive)
+    e = 'e' if needs_e(stem) else ''
+    s = '' if stem.endswith(('s', 'ß', 'z', 'x')) else 's'
+    ich = stem[:-2] + 'le' if infinitive.endswith('eln') else stem + 'e'
+    du, er = stem + e + s + 't', stem + e + 't'
+    if stems and stems.present:
+        changed = stems.present.rstrip('*')
+        s = '' if changed.endswith(('s', 'ß', 'z', 'x')) else 's'
+        du = changed + s + 't'
+        er = changed if changed.endswith('t') else changed + 't'
+        if stems.present.endswith('*'):
+            ich = er = changed
+    return ich, du, er, infinitive, stem + e + 't', infinitive
+
+
+def subjunctive_i(infinitive):
+    stem = word_stem(infinitive)
+    if infinitive.endswith(('eln', 'ern')):
+        ich = stem[:-2] + 'le' if infinitive.endswith('eln') else stem + 'e'
+        return ich, stem + 'st', ich, infinitive, stem + 't', infinitive
+    return stem + 'e', stem + 'est', stem + 'e', stem + 'en', stem + 'et', stem + 'en'
+
+
+def preterite(infinitive, stems):
+    if stems is None or stems.preterite is None:
+        stem = word_stem(infinitive)
+        return weak_forms(stem + ('ete' if needs_e(stem) else 'te'))
+    stem = stems.preterite
+    if stem.endswith('e'):
+        return weak_forms(stem)
+    if stem.endswith(('s', 'ß', 'z', 'x')):
+        du, ihr = stem + 'est', stem + 't'
+    elif stem.endswith(('d', 't')):
+        du, ihr = stem + 'st', stem + 'et'
+    else:
+        du, ihr = stem + 'st', stem + 't'
+    return stem, du, stem, stem + 'en', ihr, stem + 'en'
+
+
+def subjunctive_ii(infinitive, stems):
+    if stems is None or stems.preterite is None:
+        return preterite(infinitive, stems)
+    return weak_forms(stems.subjunctive)
+
+
+def imperative(infinitive, stems):
+    """
+    Returns the imperative, which has no ich and er forms, or None for the
+    modals.
+    """
+    if stems and stems.present and stems.present.endswith('*'):
+        return None
+    stem = word_stem(infinitive)
+    if stems and stems.present and stems.present != umlaut(stem):
+        # e/i change (gib, lies), but no umlaut (fahr, lauf).
+        du = stems.present
+    elif infinitive.endswith(('eln', 'ern')) or needs_e(stem):
+        du = present(infinitive, None)[0]
+    else:
+        du = stem
+    return '', du, '', infinitive + ' wir', present(infinitive, stems)[4], infinitive + ' Sie'
+
+
+def past_participle(analysis, stems):
+    base = analysis.base
+    if stems and stems.participle:
+        participle = stems.participle
+        if analysis.inseparable and participle.startswith('ge'):
+            participle = participle[2:]
+    else:
+        stem = word_stem(base)
+        participle = stem + ('et' if needs_e(stem) else 't')
+        if not analysis.inseparable and not base.endswith('ieren'):
+            participle = 'ge' + participle
+    return analysis.separable + analysis.inseparable + participle
+
+
+def auxiliary(infinitive, analysis):
+    if infinitive in SEIN_VERBS:
+        return 'sein'
+    if analysis.inseparable:
+        return 'haben'
+    return 'sein' if analysis.base in SEIN_VERBS else 'haben'
+
+
+def simple_tenses(infinitive):
+    """Returns {(mood, tense): forms} of the simple tenses of infinitive."""
+    analysis = analyze(infinitive)
+    stems = STEMS.get(analysis.base)
+    if stems and analysis.inseparable:
+        stems = Stems(*(analysis.inseparable + stem if stem else None for stem in stems[:3]), stems.participle)
+    base = analysis.inseparable + analysis.base
+    tenses = {
+        ('indicative', 'present'): present(base, stems),
+        ('indicative', 'preterite'): preterite(base, stems),
+        ('subjunctive I', 'present'): subjunctive_i(base),
+        ('subjunctive II', 'preterite'): subjunctive_ii(base, stems),
+    }
+    imperative_forms = imperative(base, stems)
+    if imperative_forms is not None:
+        tenses['imperative', 'present'] = imperative_forms
+    for (verb, mood, tense), forms in IRREGULAR_FORMS.items():
+        if verb == analysis.base:
+            tenses[mood, tense] = forms
+    if analysis.separable:
+        tenses = {key: tuple(f'{form} {analysis.separable}' if form else '' for form in forms)
+                  for key, forms in tenses.items()}
+    return tenses
+
+
+def compound(auxiliary_forms, rest):
+    return tuple(f'{form} {rest}' for form in auxiliary_forms)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def generate(infinitive):
+    """
+    Returns a GeneratedVerb with the conjugation tables of infinitive, as
+    (mood, tense, forms) in MOOD_TENSES order, or None if infinitive doesn't
+    look like a German infinitive. Separable and inseparable prefixes are
+    recognized, irregular stems come from STEM_TABLE and everything else is
+    conjugated as a weak verb.
+    """
+    if not can_conjugate(infinitive):
+        return None
+    analysis = analyze(infinitive)
+    participle = past_participle(analysis, STEMS.get(analysis.base))
+    aux = auxiliary(infinitive, analysis)
+    own = simple_tenses(infinitive)
+    aux_tenses = simple_tenses(aux)
+    werden = simple_tenses('werden')
+    perfect = f'{participle} {aux}'
+    tenses = dict(own)
+    tenses.update({
+        ('indicative', 'present perfect'): compound(aux_tenses['indicative', 'present'], participle),
+        ('indicative', 'plusquamperfect'): compound(aux_tenses['indicative', 'preterite'], participle),
+        ('indicative', 'future'): compound(werden['indicative', 'present'], infinitive),
+        ('indicative', 'future perfect'): compound(werden['indicative', 'present'], perfect),
+        ('subjunctive I', 'present perfect'): compound(aux_tenses['subjunctive I', 'present'], participle),
+        ('subjunctive I', 'future'): compound(werden['subjunctive I', 'present'], infinitive),
+        ('subjunctive I', 'future perfect'): compound(werden['subjunctive I', 'present'], perfect),
+        ('subjunctive II', 'plusquamperfect'): compound(aux_tenses['subjunctive II', 'preterite'], participle),
+        ('subjunctive II', 'future'): compound(werden['subjunctive II', 'preterite'], infinitive),
+        ('subjunctive II', 'future perfect'): compound(werden['subjunctive II', 'preterite'], perfect),
+    })
+    present_participle = 'seiend' if infinitive == 'sein' else infinitive + 'd'
+    tables = tuple((mood, tense, tenses[mood, tense]) for mood, tense in MOOD_TENSES if (mood, tense) in tenses)
+    return GeneratedVerb(infinitive, present_participle, participle, tables)
+
+
+def conjugate(infinitive):
+    """
+    Returns (verb, conjugations_grouped_by_mood) for infinitive like the
+    conjugation store does, built from unsaved Verb and Conjugation
+    instances, or None if it can't be conjugated.
+    """
+    generated = generate(infinitive)
+    if generated is None:
+        return None
+    verb = Verb(infinitive=generated.infinitive, present_participle=generated.present_participle,
+                past_participle=generated.past_participle, frequency=None)
+    conjugations = [
+        Conjugation(verb=verb, mood=Mood(name=mood), tense=Tense(name=tense), **dict(zip(PERSONS, forms)))
+        for mood, tense, forms in generated.tables
+    ]
+    return verb, group_by_mood(conjugations)
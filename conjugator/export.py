@@ -0,0 +1,64 @@
+import csv
+import json
+
+from .models import Verb
+
+EXPORT_FIELDS = (
+    'infinitive', 'frequency', 'translation', 'present_participle', 'past_participle',
+    'mood', 'tense', 'ich', 'du', 'er', 'wir', 'ihr', 'sie',
+)
+EXPORT_FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 2000
+
+
+def export_rows(mood=None, tense=None, min_frequency=None, max_frequency=None):
+    """
+    Returns an iterator over every Conjugation row joined with its Verb as
+    tuples of EXPORT_FIELDS. A verb without conjugations gets a single row
+    whose mood, tense and forms are None, unless mood or tense is given.
+    Rows are fetched from a server-side cursor in chunks, so memory use stays
+    constant regardless of dataset size.
+    """
+    # One filter() call, so that mood and tense apply to the same conjugation.
+    filters = {}
+    if mood:
+        filters['conjugation__mood'] = mood
+    if tense:
+        filters['conjugation__tense'] = tense
+    if min_frequency is not None:
+        filters['frequency__gte'] = min_frequency
+    if max_frequency is not None:
+        filters['frequency__lte'] = max_frequency
+    verbs = Verb.objects.filter(**filters).order_by('frequency', 'conjugation__id').values_list(
+        'infinitive', 'frequency', 'translation', 'present_participle', 'past_participle',
+        'conjugation__mood', 'conjugation__tense', 'conjugation__ich', 'conjugation__du', 'conjugation__er',
+        'conjugation__wir', 'conjugation__ihr', 'conjugation__sie',
+    )
+    return verbs.iterator(chunk_size=CHUNK_SIZE)
+
+
+def ndjson_lines(rows):
+    """Yields each row as one line of newline delimited JSON."""
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class Echo:
+    """File-like object whose write() returns the written value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Yields a header line followed by each row as one line of CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(export_format, rows):
+    if export_format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
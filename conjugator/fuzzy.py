@@ -0,0 +1,97 @@
+"""
+Typo tolerant lookup of infinitives through a symmetric deletion index.
+
+Every normalized infinitive (see normalize_infinitive(), which folds case,
+umlauts and ß) is indexed under itself and each string obtained by deleting
+one of its characters. A query is looked up the same way, so any infinitive
+within one insertion, deletion, substitution or swap of two adjacent
+characters shares an entry with it, as do some two edits away. Only those
+candidates are compared with the query, never the whole vocabulary.
+
+The index is a sorted sequence of integers, (crc32 of the entry << 32) |
+verb rank, so it can be held in an array or read straight from a snapshot
+file. Hash collisions only add candidates, which the comparison rejects.
+"""
+import bisect
+import zlib
+from array import array
+
+from .models import normalize_infinitive
+
+# Queries shorter than this match too many infinitives to be useful.
+MIN_LENGTH = 3
+# Longer than any lookup key, see Verb.lookup_key.
+MAX_LENGTH = 40
+
+
+def max_distance(key):
+    """Short words only tolerate one edit."""
+    return 1 if len(key) < 6 else 2
+
+
+def deletions(key):
+    """Returns key and every string with one of its characters deleted."""
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def entry_hash(entry):
+    return zlib.crc32(entry.encode())
+
+
+def build_index(keys):
+    """Returns the index of keys, a sequence of lookup keys in rank order."""
+    return array('Q', sorted(entry_hash(entry) << 32 | rank
+                             for rank, key in enumerate(keys) for entry in deletions(key)))
+
+
+def candidate_ranks(index, key):
+    """Returns the ranks of the keys sharing an index entry with key."""
+    ranks = set()
+    for entry in deletions(key):
+        start = entry_hash(entry) << 32
+        position = bisect.bisect_left(index, start)
+        while position < len(index) and index[position] >> 32 == start >> 32:
+            ranks.add(index[position] & 0xffffffff)
+            position += 1
+    return ranks
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the optimal string alignment distance between a and b (the
+    Levenshtein distance, with a swap of adjacent characters counting as one
+    edit), or limit + 1 if it is more than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def suggest(index, lookup_key, query, limit):
+    """
+    Returns the ranks of up to limit verbs whose lookup key is close to the
+    normalized query, closest first and then most frequent first. lookup_key
+    returns the lookup key of a rank.
+    """
+    key = normalize_infinitive(query.strip())
+    if not MIN_LENGTH <= len(key) <= MAX_LENGTH:
+        return []
+    tolerance = max_distance(key)
+    scored = []
+    for rank in candidate_ranks(index, key):
+        distance = edit_distance(key, lookup_key(rank), tolerance)
+        if distance <= tolerance:
+            scored.append((distance, rank))
+    return [rank for _, rank in sorted(scored)[:limit]]
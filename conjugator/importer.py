@@ -0,0 +1,262 @@
+import csv
+import gzip
+import json
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models import Max
+
+from . import read_model, store
+from .models import Conjugation, Mood, Tense, Verb, normalize_infinitive
+from .store import PERSONS
+
+IMPORT_FORMATS = ('fixture', 'ndjson', 'csv')
+VERB_FIELDS = ('frequency', 'translation', 'present_participle', 'past_participle')
+BATCH_SIZE = 1000
+
+
+def detect_format(path):
+    """Guesses the import format from a file name, ignoring a .gz suffix."""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'fixture'
+
+
+def open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def iter_json_array(f, chunk_size=65536):
+    """
+    Yields the elements of the JSON array in text file f one at a time,
+    reading it in chunks instead of parsing the whole document at once.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if not buffer.startswith('['):
+                raise ValidationError('Fixture must be a JSON array.')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValidationError('Fixture is not valid JSON.')
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        # A number at the end of the buffer may continue in the next chunk.
+        if end == len(buffer) and not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield obj
+
+
+def fixture_records(f):
+    """
+    Yields (kind, data) records from a Django fixture as written by dumpdata.
+    """
+    for obj in iter_json_array(f):
+        if not isinstance(obj, dict):
+            raise ValidationError('Fixture entries must be objects.')
+        model = obj.get('model')
+        fields = obj.get('fields', {})
+        if model == 'conjugator.verb':
+            yield 'verb', dict(fields, infinitive=obj.get('pk'))
+        elif model == 'conjugator.mood':
+            yield 'mood', {'name': obj.get('pk')}
+        elif model == 'conjugator.tense':
+            yield 'tense', {'name': obj.get('pk')}
+        elif model == 'conjugator.conjugation':
+            yield 'conjugation', fields
+        else:
+            raise ValidationError(f'Unsupported model: {model}')
+
+
+def row_records(rows):
+    """
+    Yields (kind, data) records from flat rows as written by
+    export_conjugations, one Verb and Conjugation per row. Rows without a
+    mood and tense only hold a verb that has no conjugations.
+    """
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValidationError('Rows must be objects.')
+        infinitive = row.get('infinitive')
+        yield 'verb', {field: row[field] for field in ('infinitive',) + VERB_FIELDS if field in row}
+        if not row.get('mood') and not row.get('tense'):
+            continue
+        yield 'mood', {'name': row.get('mood')}
+        yield 'tense', {'name': row.get('tense')}
+        conjugation = {person: row[person] for person in PERSONS if person in row}
+        yield 'conjugation', dict(conjugation, verb=infinitive, mood=row.get('mood'), tense=row.get('tense'))
+
+
+def read_records(f, import_format):
+    if import_format == 'csv':
+        return row_records(csv.DictReader(f))
+    if import_format == 'ndjson':
+        return row_records(json.loads(line) for line in f if line.strip())
+    return fixture_records(f)
+
+
+def clean(model, name, value):
+    """Validates and converts value against the model field name."""
+    field = model._meta.get_field(name)
+    if field.is_relation:
+        field = field.target_field
+    if value is None:
+        value = field.get_default()
+    return field.clean(value, None)
+
+
+def clean_record(kind, data):
+    """Returns the record's data validated against the model schema."""
+    if kind == 'verb':
+        return {name: clean(Verb, name, data.get(name)) for name in ('infinitive',) + VERB_FIELDS}
+    if kind in ('mood', 'tense'):
+        model = Mood if kind == 'mood' else Tense
+        return {'name': clean(model, 'name', data.get('name'))}
+    cleaned = {name: clean(Conjugation, name, data.get(name)) for name in ('verb', 'mood', 'tense')}
+    cleaned.update({person: clean(Conjugation, person, data.get(person, '')) for person in PERSONS})
+    return cleaned
+
+
+class ConjugationImporter:
+    """
+    Imports verb data in batches: each batch is validated, diffed against the
+    rows already in the database and written with bulk_create/bulk_update in
+    its own transaction, so unchanged rows are never written. Counts of
+    created, updated and unchanged rows per model are kept in stats.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, using=None):
+        self.batch_size = batch_size
+        self.using = using or router.db_for_write(Verb)
+        self.stats = Counter()
+
+    def run(self, records):
+        batch = []
+        try:
+            for number, (kind, data) in enumerate(records, 1):
+                try:
+                    batch.append((kind, clean_record(kind, data)))
+                except ValidationError as e:
+                    raise ValidationError(f'Record {number} ({kind}): {"; ".join(e.messages)}')
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch)
+                    batch = []
+            if batch:
+                self.write_batch(batch)
+        finally:
+            # Bulk writes don't send model signals.
+            store.dataset_changed()
+            read_model.refresh()
+        return self.stats
+
+    def write_batch(self, batch):
+        verbs, moods, tenses, conjugations = {}, set(), set(), {}
+        for kind, data in batch:
+            self.stats['records'] += 1
+            if kind == 'verb':
+                verbs[data['infinitive']] = data
+            elif kind == 'mood':
+                moods.add(data['name'])
+            elif kind == 'tense':
+                tenses.add(data['name'])
+            else:
+                conjugations[data['verb'], data['mood'], data['tense']] = data
+
+        with transaction.atomic(using=self.using):
+            self.write_names(Mood, moods | {key[1] for key in conjugations})
+            self.write_names(Tense, tenses | {key[2] for key in conjugations})
+            self.write_verbs(verbs)
+            self.write_conjugations(conjugations)
+
+    def write_names(self, model, names):
+        """Creates any Mood or Tense in names that doesn't exist yet."""
+        existing = set(model.objects.using(self.using).filter(name__in=names).values_list('name', flat=True))
+        missing = names - existing
+        model.objects.using(self.using).bulk_create([model(name=name) for name in sorted(missing)])
+        self.stats[f'{model._meta.model_name} created'] += len(missing)
+
+    def write_verbs(self, verbs):
+        existing = Verb.objects.using(self.using).in_bulk(list(verbs))
+        created, updated, moved = [], [], []
+        for infinitive, data in verbs.items():
+            verb = existing.get(infinitive)
+            if verb is None:
+                created.append(Verb(lookup_key=normalize_infinitive(infinitive), **data))
+            elif any(getattr(verb, field) != data[field] for field in VERB_FIELDS):
+                if verb.frequency != data['frequency']:
+                    moved.append(verb)
+                for field in VERB_FIELDS:
+                    setattr(verb, field, data[field])
+                updated.append(verb)
+        if moved:
+            # Frequencies are unique and checked row by row, so verbs swapping
+            # them would collide: first move them past the highest frequency
+            # (not below zero, the column is positive).
+            highest = Verb.objects.using(self.using).aggregate(highest=Max('frequency'))['highest']
+            Verb.objects.using(self.using).bulk_update(
+                [Verb(infinitive=verb.infinitive, frequency=highest + i) for i, verb in enumerate(moved, 1)],
+                ['frequency'])
+        Verb.objects.using(self.using).bulk_create(created)
+        Verb.objects.using(self.using).bulk_update(updated, VERB_FIELDS)
+        self.stats['verb created'] += len(created)
+        self.stats['verb updated'] += len(updated)
+        self.stats['verb unchanged'] += len(verbs) - len(created) - len(updated)
+
+    def write_conjugations(self, conjugations):
+        infinitives = {key[0] for key in conjugations}
+        known = set(Verb.objects.using(self.using).filter(infinitive__in=infinitives)
+                    .values_list('infinitive', flat=True))
+        missing = infinitives - known
+        if missing:
+            raise ValidationError(f"Conjugations reference unknown verbs: {', '.join(sorted(missing))}")
+
+        existing = {
+            (conjugation.verb_id, conjugation.mood_id, conjugation.tense_id): conjugation
+            for conjugation in Conjugation.objects.using(self.using).filter(verb__in=infinitives)
+        }
+        created, updated = [], []
+        for key, data in conjugations.items():
+            conjugation = existing.get(key)
+            if conjugation is None:
+                created.append(Conjugation(verb_id=key[0], mood_id=key[1], tense_id=key[2],
+                                           **{person: data[person] for person in PERSONS}))
+            elif any(getattr(conjugation, person) != data[person] for person in PERSONS):
+                for person in PERSONS:
+                    setattr(conjugation, person, data[person])
+                updated.append(conjugation)
+        Conjugation.objects.using(self.using).bulk_create(created)
+        Conjugation.objects.using(self.using).bulk_update(updated, PERSONS)
+        self.stats['conjugation created'] += len(created)
+        self.stats['conjugation updated'] += len(updated)
+        self.stats['conjugation unchanged'] += len(conjugations) - len(created) - len(updated)
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from conjugator import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the conjugator views against synthetic datasets in a throwaway test '
+            'database and writes the results as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(benchmarks.DATASET_SIZES),
+                            help='Dataset sizes in verbs. Sizes above 32767 need SQLite, since '
+                                 'Verb.frequency is a small integer.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per view and size.')
+        parser.add_argument('--servers', nargs='+', choices=('client', 'wsgi', 'asgi'),
+                            default=['client', 'wsgi'], help='asgi serves through uvicorn, which must be installed.')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Client threads for the WSGI and ASGI server benchmarks.')
+        parser.add_argument('--databases', nargs='+', choices=benchmarks.DATABASE_MODES, default=['read-write'],
+                            help='read-only opens the database like CONJUGATOR_READ_ONLY does. With both, '
+                                 'their throughput is compared.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('-o', '--output', help='File to write the JSON results to.')
+        parser.add_argument('--compare', help='Baseline JSON results to check for regressions.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative p50 slowdown against the baseline.')
+
+    def handle(self, *args, **options):
+        if 'asgi' in options['servers'] and benchmarks.uvicorn is None:
+            raise CommandError('The ASGI benchmark requires uvicorn: pip install uvicorn')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if connection.vendor == 'sqlite':
+                # A file database, unlike the in-memory default, can be shared
+                # with the WSGI and ASGI servers' threads.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmp_dir, 'benchmark.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                results = benchmarks.run(
+                    options['sizes'], options['requests'], servers=options['servers'],
+                    concurrency=options['concurrency'], seed=options['seed'], databases=options['databases'],
+                    log=self.stdout.write,
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote results to {options['output']}")
+
+        if options['compare']:
+            regressions = benchmarks.compare(benchmarks.load(options['compare']), results, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against {}:\n{}'.format(options['compare'], '\n'.join(regressions)))
+            self.stdout.write(f"No regressions against {options['compare']}")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from conjugator import assets
+
+
+class Command(BaseCommand):
+    help = ('Bundles and minifies the CSS and JavaScript in conjugator/asset_src. '
+            'Run collectstatic afterwards to fingerprint and precompress the bundles.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Exit with an error if the built files are out of date, without writing them.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = assets.stale_outputs()
+            if stale:
+                raise CommandError(f'Out of date, run build_assets: {", ".join(stale)}')
+            self.stdout.write('Assets are up to date.')
+            return
+        outputs = assets.build()
+        assets.write(outputs)
+        for path, contents in outputs.items():
+            self.stdout.write(f'Wrote {path} ({len(contents.encode())} bytes)')
@@ -0,0 +1,22 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from conjugator import snapshot
+
+
+class Command(BaseCommand):
+    help = ('Writes the Verb and Conjugation tables to a snapshot file that workers memory map, '
+            'atomically replacing any previous one.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Snapshot file. Defaults to CONJUGATOR_SNAPSHOT_PATH.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.CONJUGATOR_SNAPSHOT_PATH
+        if not path:
+            raise CommandError('Give a path or set CONJUGATOR_SNAPSHOT_PATH.')
+        snapshot.write_snapshot_from_database(path)
+        store = snapshot.SnapshotStore(path)
+        self.stdout.write(f'Wrote {len(store.verbs)} verbs to {path} ({os.path.getsize(path)} bytes)')
@@ -0,0 +1,36 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conjugator import export
+
+
+class Command(BaseCommand):
+    help = 'Streams every Verb and Conjugation row as NDJSON or CSV in constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help='File to write to. Defaults to stdout.')
+        parser.add_argument('--format', choices=export.EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output file.')
+        parser.add_argument('--mood')
+        parser.add_argument('--tense')
+        parser.add_argument('--min-frequency', type=int)
+        parser.add_argument('--max-frequency', type=int)
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['output']:
+            raise CommandError('--gzip requires --output.')
+        rows = export.export_rows(
+            mood=options['mood'],
+            tense=options['tense'],
+            min_frequency=options['min_frequency'],
+            max_frequency=options['max_frequency'],
+        )
+        lines = export.export_lines(options['format'], rows)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        open_output = gzip.open if options['gzip'] else open
+        with open_output(options['output'], 'wt', encoding='utf-8', newline='') as output:
+            output.writelines(lines)
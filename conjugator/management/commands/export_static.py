@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.template.loader import get_template
+from django.templatetags.static import static
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from conjugator import cache, store, views
+from conjugator.store import PERSONS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+TEMPLATES = ('conjugator/base.html', 'conjugator/critical_css.html', 'conjugator/home.html',
+             'conjugator/conjugation.html', 'conjugator/conjugation_tables.html')
+# Pages link to these by their fingerprinted names.
+STATIC_FILES = ('dist/site.css', 'dist/site.js', 'img/favicon.ico')
+
+
+def templates_fingerprint():
+    """
+    Hashes the page templates and static file URLs so template or asset
+    edits force a full rebuild.
+    """
+    digest = hashlib.sha1()
+    for name in TEMPLATES:
+        digest.update(get_template(name).template.source.encode())
+    for name in STATIC_FILES:
+        digest.update(static(name).encode())
+    return digest.hexdigest()
+
+
+def index_pages(conjugation_store, letters):
+    """Yields (url, IndexPage) for every page of the verb index, per letter."""
+    for letter in [None] + letters:
+        after = None
+        while True:
+            page = store.index_page(conjugation_store, letter, after, views.HOME_PAGE_SIZE)
+            yield views.index_url(letter, after), page
+            if page.next_after is None:
+                break
+            after = page.next_after
+
+
+def index_fingerprint(page, letters, base):
+    """Hashes everything an index page is rendered from: its verbs and links."""
+    digest = hashlib.sha1(f'{base}\0{"".join(letters)}\0{page.has_previous}\0{page.previous_after}\0'
+                          f'{page.next_after}\0'.encode())
+    for verb in page.verbs:
+        digest.update(f'{verb.infinitive}\0{verb.frequency}\0'.encode())
+    return digest.hexdigest()
+
+
+def conjugation_fingerprint(conjugation_store, verb, base):
+    """
+    Hashes everything a conjugation page is rendered from: the verb, its
+    prev/next neighbours and its Conjugation rows.
+    """
+    fields = [base, verb.infinitive, str(verb.frequency), verb.translation,
+              verb.present_participle, verb.past_participle]
+    fields.extend(conjugation_store.neighbours(verb))
+    for mood, conjugations in conjugation_store.conjugations_grouped_by_mood(verb):
+        for conjugation in conjugations:
+            fields.append(f'{conjugation.mood_id}/{conjugation.tense_id}')
+            fields.extend(getattr(conjugation, person) for person in PERSONS)
+        fields.append('')
+    return hashlib.sha1('\0'.join(fields).encode()).hexdigest()
+
+
+def render_page(url):
+    """Renders the page at url through its view, bypassing the page cache."""
+    request = RequestFactory().get(url)
+    match = resolve(unquote(url))
+    response = match.func.__wrapped__(request, *match.args, **match.kwargs)
+    return url, response.content
+
+
+def init_worker():
+    django.setup()
+
+
+def page_path(output_dir, url):
+    return os.path.join(output_dir, *unquote(url).strip('/').split('/'), 'index.html')
+
+
+def write_page(output_dir, url, content):
+    """Writes content and its precompressed variants, returning their paths."""
+    path = page_path(output_dir, url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = {path: content, path + '.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[path + '.br'] = brotli.compress(content)
+    for variant_path, data in variants.items():
+        tmp_path = variant_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, variant_path)
+    return [os.path.relpath(variant_path, output_dir) for variant_path in variants]
+
+
+class Command(BaseCommand):
+    help = ('Renders every page of the verb index and every conjugation page, with gzip and brotli '
+            'variants, to a directory that any static file server can serve.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to export the site to.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of rendering processes (1 renders in-process).')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every page even if its data is unchanged.')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        old_pages = {}
+        if not options['force'] and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                old_pages = json.load(f)['pages']
+
+        # Rows may have changed without sending signals, so don't trust any
+        # cached fragment.
+        cache.bump_dataset_version()
+        conjugation_store = store.reload()
+        base = templates_fingerprint()
+        letters = views.index_letters(conjugation_store)
+        fingerprints = {url: index_fingerprint(page, letters, base)
+                        for url, page in index_pages(conjugation_store, letters)}
+        for verb in conjugation_store.verbs:
+            url = reverse('conjugation', kwargs={'infinitive': verb.infinitive})
+            fingerprints[url] = conjugation_fingerprint(conjugation_store, verb, base)
+
+        pages = {url: old_pages[url] for url in fingerprints
+                 if url in old_pages and old_pages[url]['fingerprint'] == fingerprints[url]}
+        stale = [url for url in fingerprints if url not in pages]
+
+        for url, content in self.render(stale, options['workers']):
+            pages[url] = {
+                'fingerprint': fingerprints[url],
+                'etag': hashlib.sha1(content).hexdigest(),
+                'files': write_page(output_dir, url, content),
+            }
+
+        for url in old_pages.keys() - fingerprints.keys():
+            shutil.rmtree(os.path.dirname(page_path(output_dir, url)), ignore_errors=True)
+
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump({'pages': pages}, f, indent=2, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        self.stdout.write(f'Rendered {len(stale)} of {len(fingerprints)} pages to {output_dir}.')
+        if brotli is None:
+            self.stdout.write('brotli is not installed; skipped .br variants.')
+
+    def render(self, urls, workers):
+        if workers <= 1 or len(urls) <= 1:
+            return [render_page(url) for url in urls]
+        # Forked workers inherit the loaded store but must not share DB connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            return list(executor.map(render_page, urls, chunksize=max(1, len(urls) // (workers * 4))))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from conjugator import importer
+
+
+class Command(BaseCommand):
+    help = ('Imports verbs and conjugations from a Django fixture, NDJSON or CSV file (optionally '
+            'gzipped), streaming it in batches and only writing rows that changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=importer.IMPORT_FORMATS,
+                            help='Input format. Guessed from the file name by default.')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+        parser.add_argument('--database', help='Database alias to write to. The one writes are routed to by default.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or importer.detect_format(path)
+        conjugation_importer = importer.ConjugationImporter(options['batch_size'], using=options['database'])
+        start = time.perf_counter()
+        try:
+            with importer.open_text(path) as f:
+                stats = conjugation_importer.run(importer.read_records(f, import_format))
+        except (OSError, ValueError, ValidationError, IntegrityError) as e:
+            message = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            raise CommandError(f'Import of {path} failed: {message}')
+        elapsed = time.perf_counter() - start
+
+        for key in sorted(stats):
+            if key != 'records':
+                self.stdout.write(f'{key}: {stats[key]}')
+        rate = stats['records'] / elapsed if elapsed else 0
+        self.stdout.write(f"Imported {stats['records']} records in {elapsed:.2f}s ({rate:.0f} records/s).")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from conjugator import cache, read_model
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the VerbPage read model, one row per verb with its whole conjugation page, '
+            'from the Verb and Conjugation tables.')
+
+    def handle(self, *args, **options):
+        count = read_model.rebuild()
+        cache.bump_dataset_version()
+        self.stdout.write(f'Wrote {count} verb pages')
@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from conjugator import warmup
+
+
+class Command(BaseCommand):
+    help = ('Warms the process up like the WSGI module does before serving (URL patterns, templates, '
+            'database connection, store, first pages) and reports the time each phase took.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Write the report as JSON.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        application = get_wsgi_application()
+        phases = [warmup.Phase('application', time.perf_counter() - start, None)] + warmup.warm_up(application)
+        if options['json']:
+            self.stdout.write(json.dumps([phase._asdict() for phase in phases]))
+        else:
+            for phase in phases:
+                self.stdout.write(f'{phase.name:<10} {phase.seconds * 1000:8.1f}ms'
+                                  + (f'  failed: {phase.error}' if phase.error else ''))
+            self.stdout.write(f"{'total':<10} {sum(phase.seconds for phase in phases) * 1000:8.1f}ms")
+        failed = [phase.name for phase in phases if phase.error]
+        if failed:
+            raise CommandError(f'Warm-up failed: {", ".join(failed)}')
@@ -0,0 +1,59 @@
+# Generated by Django 3.0 on 2026-10-18 08:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mood',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tense',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Verb',
+            fields=[
+                ('infinitive', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('frequency', models.PositiveSmallIntegerField(unique=True)),
+                ('translation', models.CharField(blank=True, max_length=50)),
+                ('present_participle', models.CharField(blank=True, max_length=30)),
+                ('past_participle', models.CharField(blank=True, max_length=30)),
+            ],
+            options={
+                'ordering': ['frequency'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Conjugation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ich', models.CharField(blank=True, max_length=30)),
+                ('du', models.CharField(blank=True, max_length=30)),
+                ('er', models.CharField(blank=True, max_length=30)),
+                ('wir', models.CharField(blank=True, max_length=30)),
+                ('ihr', models.CharField(blank=True, max_length=30)),
+                ('sie', models.CharField(blank=True, max_length=30)),
+                ('mood', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='conjugator.Mood')),
+                ('tense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='conjugator.Tense')),
+                ('verb', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='conjugator.Verb')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='conjugation',
+            constraint=models.UniqueConstraint(fields=('verb', 'mood', 'tense'), name='unique_conjugation'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.0 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+from conjugator.models import normalize_infinitive
+
+
+def fill_lookup_keys(apps, schema_editor):
+    """Sets the lookup key of the verbs that existed before the field did."""
+    Verb = apps.get_model('conjugator', 'Verb')
+    verbs = list(Verb.objects.using(schema_editor.connection.alias).all())
+    for verb in verbs:
+        verb.lookup_key = normalize_infinitive(verb.infinitive)
+    Verb.objects.using(schema_editor.connection.alias).bulk_update(verbs, ['lookup_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conjugator', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verb',
+            name='lookup_key',
+            field=models.CharField(default='', editable=False, max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='verb',
+            index=models.Index(fields=['lookup_key'], name='verb_lookup_key_idx'),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+    ]
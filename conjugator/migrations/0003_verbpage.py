@@ -0,0 +1,22 @@
+# Generated by Django 3.0 on 2026-10-18 08:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conjugator', '0002_verb_lookup_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerbPage',
+            fields=[
+                ('verb', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='conjugator.Verb')),
+                ('lookup_key', models.CharField(db_index=True, max_length=40)),
+                ('payload', models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.0 on 2026-10-18 08:51
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_version(apps, schema_editor):
+    """Creates the dataset version row, dating the existing data to now."""
+    DatasetVersion = apps.get_model('conjugator', 'DatasetVersion')
+    DatasetVersion.objects.using(schema_editor.connection.alias).create(pk=1, modified=timezone.now())
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conjugator', '0003_verbpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modified', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
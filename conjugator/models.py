@@ -1,9 +1,22 @@
+import unicodedata
+
 from django.db import models
 
+UMLAUT_FOLDING = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue'})
+
+
+def normalize_infinitive(infinitive):
+    """
+    Returns the lookup key for an infinitive: NFC-normalized, casefolded (which
+    also folds ß to ss) and with umlauts spelled out as ae/oe/ue.
+    """
+    return unicodedata.normalize('NFC', infinitive).casefold().translate(UMLAUT_FOLDING)
+
 
 class Verb(models.Model):
     """Table representing the top 100 German verbs"""
     infinitive = models.CharField(primary_key=True, max_length=30)
+    lookup_key = models.CharField(max_length=40, editable=False, default='')
     frequency = models.PositiveSmallIntegerField(unique=True)
     translation = models.CharField(max_length=50, blank=True)
     present_participle = models.CharField(max_length=30, blank=True)
@@ -11,10 +24,29 @@ class Verb(models.Model):
 
     class Meta:
         ordering = ['frequency']
+        indexes = [
+            models.Index(fields=['lookup_key'], name='verb_lookup_key_idx')
+        ]
 
     def __str__(self):
         return self.infinitive
 
+    @classmethod
+    def lookup(cls, query, queryset=None):
+        """
+        Returns the verb whose infinitive matches query, ignoring case and
+        umlaut/ß spelling, or None. Resolved with a single seek on the
+        lookup_key index; an exact infinitive match wins over other verbs
+        sharing the same key.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        candidates = list(queryset.filter(lookup_key=normalize_infinitive(query)))
+        for verb in candidates:
+            if verb.infinitive == query:
+                return verb
+        return candidates[0] if candidates else None
+
 
 class Mood(models.Model):
     """Table representing grammatical mood"""
@@ -51,3 +83,30 @@ class Conjugation(models.Model):
 
     def __str__(self):
         return f'{self.verb} {self.mood} {self.tense}'
+
+
+class DatasetVersion(models.Model):
+    """
+    Single row holding the time of the last write to the verb tables. It
+    versions the page cache and the in-memory store of every worker (see
+    conjugator.cache), so that a write made through one worker reaches all.
+    """
+    modified = models.DateTimeField()
+
+    def __str__(self):
+        return self.modified.isoformat()
+
+
+class VerbPage(models.Model):
+    """
+    Denormalized read model of a verb's conjugation page: the verb, its
+    conjugations grouped by mood in display order and its prev/next
+    neighbours, as JSON. Derived from the tables above by
+    conjugator.read_model, never edited directly.
+    """
+    verb = models.OneToOneField(Verb, primary_key=True, on_delete=models.CASCADE)
+    lookup_key = models.CharField(max_length=40, db_index=True)
+    payload = models.TextField()
+
+    def __str__(self):
+        return self.verb_id
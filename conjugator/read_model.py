@@ -0,0 +1,172 @@
+"""
+The VerbPage read model: one row per verb holding everything its
+conjugation page shows, so that a page costs a single indexed fetch. The
+Verb and Conjugation tables stay the source of truth; pages are rebuilt
+from them by rebuild(), after every write while CONJUGATOR_READ_MODEL is
+set (see signals.py) and by manage.py rebuild_read_model.
+"""
+import bisect
+import json
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Q
+
+from . import cache
+from .models import Conjugation, Verb, VerbPage, normalize_infinitive
+from .snapshot import SnapshotConjugation
+from .store import PERSONS, group_by_mood
+
+VERB_FIELDS = ('infinitive', 'frequency', 'translation', 'present_participle', 'past_participle')
+# Rows per query, below SQLite's limit on query parameters.
+CHUNK_SIZE = 500
+
+PageVerb = namedtuple('PageVerb', VERB_FIELDS)
+
+# A verb's conjugation page: the verb, its conjugations as (mood,
+# conjugations) pairs (see store.group_by_mood()) and the infinitives of the
+# previous and next verbs by frequency.
+Page = namedtuple('Page', ['verb', 'conjugations_grouped_by_mood', 'previous', 'next'])
+
+
+def encode(verb, conjugations, previous, following):
+    """Returns the payload of a verb's page."""
+    return json.dumps({
+        'verb': [getattr(verb, field) for field in VERB_FIELDS],
+        'previous': previous,
+        'next': following,
+        'moods': [
+            [mood, [[conjugation.id, conjugation.tense_id] + [getattr(conjugation, person) for person in PERSONS]
+                    for conjugation in mood_conjugations]]
+            for mood, mood_conjugations in group_by_mood(conjugations)
+        ],
+    }, ensure_ascii=False, separators=(',', ':'))
+
+
+def decode(payload):
+    """Returns the Page of a payload."""
+    data = json.loads(payload)
+    verb = PageVerb(*data['verb'])
+    grouped = tuple(
+        (mood, tuple(SnapshotConjugation(id, verb.infinitive, mood, tense, *forms)
+                     for id, tense, *forms in conjugations))
+        for mood, conjugations in data['moods']
+    )
+    return Page(verb, grouped, data['previous'], data['next'])
+
+
+def get_page(infinitive):
+    """
+    Returns the Page of the verb matching infinitive, ignoring case and
+    umlaut/ß spelling, or None. Mirrors Verb.lookup() with a single query.
+    """
+    pages = list(VerbPage.objects.filter(Q(pk=infinitive) | Q(lookup_key=normalize_infinitive(infinitive))))
+    for page in pages:
+        if page.verb_id == infinitive:
+            return decode(page.payload)
+    return decode(pages[0].payload) if pages else None
+
+
+def neighbours_of(order, frequency):
+    """
+    Returns the infinitives on either side of frequency in order, a list of
+    (frequency, infinitive) sorted by frequency, wrapping around at the ends
+    like ConjugationStore.neighbours().
+    """
+    low = bisect.bisect_left(order, (frequency,))
+    high = bisect.bisect_right(order, (frequency, '\U0010ffff'))
+    return order[low - 1][1], order[high % len(order)][1]
+
+
+def chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def rebuild(infinitives=None, frequencies=()):
+    """
+    Rebuilds the pages of infinitives, which may include verbs that no longer
+    exist, and of the verbs on either side of each of frequencies (whose
+    neighbours change when a verb is added there, moved from or to there or
+    deleted). Rebuilds every page if infinitives is None. Returns the number
+    of pages written.
+    """
+    order = sorted((frequency, infinitive) for infinitive, frequency
+                   in Verb.objects.values_list('infinitive', 'frequency'))
+    if not order:
+        VerbPage.objects.all().delete()
+        return 0
+    position = {infinitive: i for i, (_, infinitive) in enumerate(order)}
+    if infinitives is None:
+        targets = [infinitive for _, infinitive in order]
+    else:
+        targets = set(infinitive for infinitive in infinitives if infinitive in position)
+        for frequency in frequencies:
+            targets.update(neighbours_of(order, frequency))
+        targets = sorted(targets)
+
+    written = 0
+    with transaction.atomic(using=router.db_for_write(VerbPage)):
+        if infinitives is None:
+            VerbPage.objects.all().delete()
+        for chunk in chunks(targets):
+            verbs = Verb.objects.in_bulk(chunk)
+            by_verb = {infinitive: [] for infinitive in chunk}
+            for conjugation in Conjugation.objects.filter(verb__in=chunk).order_by('id'):
+                by_verb[conjugation.verb_id].append(conjugation)
+            pages = []
+            for infinitive in chunk:
+                i = position[infinitive]
+                previous, following = order[i - 1][1], order[(i + 1) % len(order)][1]
+                verb = verbs[infinitive]
+                pages.append(VerbPage(verb=verb, lookup_key=verb.lookup_key,
+                                      payload=encode(verb, by_verb[infinitive], previous, following)))
+            if infinitives is not None:
+                VerbPage.objects.filter(verb__in=chunk).delete()
+            VerbPage.objects.bulk_create(pages)
+            written += len(pages)
+    return written
+
+
+_pending = threading.local()
+
+
+def schedule(infinitives=(), frequencies=(), using=None):
+    """
+    Rebuilds the pages of infinitives and around frequencies (see
+    rebuild()) once the current transaction commits, if
+    CONJUGATOR_READ_MODEL is set. Writes within one transaction are
+    rebuilt together.
+    """
+    if not settings.CONJUGATOR_READ_MODEL:
+        return
+    if getattr(_pending, 'infinitives', None) is None:
+        _pending.infinitives, _pending.frequencies = set(), set()
+    _pending.infinitives.update(infinitives)
+    _pending.frequencies.update(frequencies)
+    transaction.on_commit(flush, using=using)
+
+
+def flush():
+    """
+    Rebuilds the pages scheduled so far. Pages scheduled in a transaction
+    that was rolled back are rebuilt too, which is harmless since every page
+    is rebuilt from the committed tables.
+    """
+    infinitives, frequencies = getattr(_pending, 'infinitives', None), getattr(_pending, 'frequencies', None)
+    _pending.infinitives = _pending.frequencies = None
+    if infinitives or frequencies:
+        rebuild(infinitives, frequencies)
+        # Pages rendered between the commit and now may have been cached
+        # under the new dataset version.
+        cache.bump_dataset_version()
+
+
+def refresh():
+    """Rebuilds every page after bulk writes, if CONJUGATOR_READ_MODEL is set."""
+    if settings.CONJUGATOR_READ_MODEL:
+        rebuild()
+        cache.bump_dataset_version()
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import databases, read_model, store
+from .models import Conjugation, Mood, Tense, Verb, normalize_infinitive
+
+
+@receiver(pre_save, sender=Verb)
+def set_lookup_key(sender, instance, **kwargs):
+    """
+    Keeps Verb.lookup_key in sync with the infinitive. Uses pre_save rather
+    than Verb.save() so that raw saves made by loaddata are covered too.
+    """
+    instance.lookup_key = normalize_infinitive(instance.infinitive)
+
+
+@receiver([post_save, post_delete], sender=Verb)
+@receiver([post_save, post_delete], sender=Mood)
+@receiver([post_save, post_delete], sender=Tense)
+@receiver([post_save, post_delete], sender=Conjugation)
+def schedule_dataset_changed(sender, **kwargs):
+    """
+    Marks every cached page and every worker's store as stale after a write
+    to the verb tables, including by loaddata (see store.dataset_changed()):
+    right away outside a transaction, or else once on commit however many
+    rows the transaction writes, so that nothing reloads uncommitted data.
+    """
+    connection = transaction.get_connection(kwargs.get('using'))
+    if not connection.in_atomic_block:
+        store.dataset_changed()
+    elif not any(function is store.dataset_changed for _, function in connection.run_on_commit):
+        transaction.on_commit(store.dataset_changed, using=kwargs.get('using'))
+
+
+@receiver(pre_save, sender=Verb)
+@receiver(pre_save, sender=Conjugation)
+def schedule_read_model_for_old_row(sender, instance, raw=False, **kwargs):
+    """
+    Schedules the pages a row belonged to before an update: a verb's old
+    neighbours, or the verb a conjugation is moved away from.
+    """
+    if not settings.CONJUGATOR_READ_MODEL or instance.pk is None or raw:
+        return
+    if sender is Verb:
+        old = Verb.objects.filter(pk=instance.pk).values_list('frequency', flat=True).first()
+        if old is not None and old != instance.frequency:
+            read_model.schedule(frequencies=[old], using=kwargs.get('using'))
+    else:
+        old = Conjugation.objects.filter(pk=instance.pk).values_list('verb', flat=True).first()
+        if old is not None and old != instance.verb_id:
+            read_model.schedule([old], using=kwargs.get('using'))
+
+
+@receiver([post_save, post_delete], sender=Verb)
+@receiver([post_save, post_delete], sender=Conjugation)
+def schedule_read_model(sender, instance, **kwargs):
+    """
+    Rebuilds the VerbPage rows of the written verb or conjugation's verb on
+    commit, and for verbs those of the verbs around its frequency.
+    """
+    if sender is Verb:
+        read_model.schedule([instance.infinitive], [instance.frequency], using=kwargs.get('using'))
+    else:
+        read_model.schedule([instance.verb_id], using=kwargs.get('using'))
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    """Tunes read-only SQLite connections, see german_verb_project.databases.SQLITE_PRAGMAS."""
+    databases.configure_connection(connection)
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Has broken persistent connections dropped when a request first uses them."""
+    databases.check_connections()
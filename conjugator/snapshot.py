@@ -0,0 +1,413 @@
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+import weakref
+from collections import namedtuple
+from collections.abc import Sequence
+
+from . import fuzzy
+from .models import Conjugation, Mood, Tense, Verb, normalize_infinitive
+from .store import PERSONS, FormMatch, group_by_mood, mood_sort_key, normalize_form
+
+MAGIC = b'CONJSNAP'
+FORMAT_VERSION = 2
+
+# Header: magic, format version, vocabulary hash, then the number of strings,
+# verbs, conjugations, indexed forms, form matches and fuzzy index entries.
+HEADER = struct.Struct('<8sI40s6I')
+U32 = struct.Struct('<I')
+# Fuzzy index entry, see fuzzy.build_index().
+U64 = struct.Struct('<Q')
+# Verb: infinitive, lookup key, translation, present and past participle
+# (string ids), frequency, first conjugation and number of conjugations.
+VERB = struct.Struct('<8I')
+# Conjugation: id, verb rank, mood and tense (string ids), then one string id
+# per person.
+CONJUGATION = struct.Struct('<4I6I')
+# Form: normalized form (string id), first match and number of matches.
+FORM = struct.Struct('<3I')
+# Match: verb rank, mood and tense (string ids, NONE for participles) and
+# person (index into MATCH_PERSONS).
+MATCH = struct.Struct('<4I')
+NONE = 0xffffffff
+
+MATCH_PERSONS = PERSONS + ('present participle', 'past participle')
+
+SnapshotVerb = namedtuple('SnapshotVerb', [
+    'infinitive', 'lookup_key', 'translation', 'present_participle', 'past_participle', 'frequency', 'rank',
+])
+
+
+class SnapshotConjugation(namedtuple('SnapshotConjugation', ('id', 'verb_id', 'mood_id', 'tense_id') + PERSONS)):
+    __slots__ = ()
+
+    @property
+    def mood(self):
+        return Mood(name=self.mood_id)
+
+    @property
+    def tense(self):
+        return Tense(name=self.tense_id)
+
+
+def write_snapshot(path, verbs, conjugations):
+    """
+    Writes verbs and conjugations to path as a snapshot, replacing any
+    existing file atomically: a new file is written next to it and renamed
+    over it, so processes that have the old one mapped keep reading it.
+    """
+    verbs = sorted(verbs, key=lambda verb: verb.frequency)
+    ranks = {verb.infinitive: rank for rank, verb in enumerate(verbs)}
+    conjugations = sorted(conjugations, key=lambda conjugation: conjugation.id)
+    strings = {}
+
+    def string_id(value):
+        return strings.setdefault(value, len(strings))
+
+    by_verb = [[] for _ in verbs]
+    for conjugation in conjugations:
+        by_verb[ranks[conjugation.verb_id]].append(conjugation)
+
+    verb_records = []
+    conjugation_records = []
+    for verb, verb_conjugations in zip(verbs, by_verb):
+        verb_records.append(VERB.pack(
+            string_id(verb.infinitive), string_id(verb.lookup_key), string_id(verb.translation),
+            string_id(verb.present_participle), string_id(verb.past_participle), verb.frequency,
+            len(conjugation_records), len(verb_conjugations),
+        ))
+        for conjugation in verb_conjugations:
+            conjugation_records.append(CONJUGATION.pack(
+                conjugation.id, ranks[conjugation.verb_id], string_id(conjugation.mood_id),
+                string_id(conjugation.tense_id), *(string_id(getattr(conjugation, person)) for person in PERSONS),
+            ))
+
+    # The same matches, in the same order, as ConjugationStore's form index.
+    forms = {}
+    for rank, verb in enumerate(verbs):
+        for person in ('present participle', 'past participle'):
+            form = getattr(verb, person.replace(' ', '_'))
+            if form:
+                forms.setdefault(normalize_form(form), []).append(
+                    (rank, NONE, NONE, MATCH_PERSONS.index(person)))
+    for conjugation in conjugations:
+        mood, tense = string_id(conjugation.mood_id), string_id(conjugation.tense_id)
+        for index, person in enumerate(PERSONS):
+            form = getattr(conjugation, person)
+            if form:
+                forms.setdefault(normalize_form(form), []).append((ranks[conjugation.verb_id], mood, tense, index))
+    form_records = []
+    match_records = []
+    for form in sorted(forms, key=str.encode):
+        form_records.append(FORM.pack(string_id(form), len(match_records), len(forms[form])))
+        match_records.extend(MATCH.pack(*match) for match in forms[form])
+
+    infinitive_index = sorted(range(len(verbs)), key=lambda rank: verbs[rank].infinitive.encode())
+    key_index = sorted(range(len(verbs)), key=lambda rank: (verbs[rank].lookup_key.encode(), rank))
+    fuzzy_index = fuzzy.build_index([verb.lookup_key for verb in verbs])
+
+    encoded = [value.encode() for value in strings]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    vocabulary = '\n'.join(verb.infinitive for verb in verbs)
+    sections = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha1(vocabulary.encode()).hexdigest().encode(),
+                    len(encoded), len(verb_records), len(conjugation_records), len(form_records),
+                    len(match_records), len(fuzzy_index)),
+        b''.join(U32.pack(offset) for offset in offsets),
+        b''.join(verb_records),
+        b''.join(conjugation_records),
+        b''.join(U32.pack(rank) for rank in infinitive_index),
+        b''.join(U32.pack(rank) for rank in key_index),
+        b''.join(form_records),
+        b''.join(match_records),
+        b''.join(U64.pack(entry) for entry in fuzzy_index),
+        b''.join(encoded),
+    ]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.writelines(sections)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_snapshot_from_database(path):
+    write_snapshot(path, Verb.objects.all(), Conjugation.objects.all())
+
+
+class _Keys(Sequence):
+    """The strings of a sorted index of verb ranks, as bytes, for bisect."""
+
+    def __init__(self, snapshot, offset, field):
+        self.snapshot = snapshot
+        self.offset = offset
+        self.field = field
+
+    def __len__(self):
+        return self.snapshot.verb_count
+
+    def __getitem__(self, index):
+        return self.snapshot.verb_string(self.snapshot.index_rank(self.offset, index), self.field)
+
+
+class _Forms(Sequence):
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.form_count
+
+    def __getitem__(self, index):
+        return self.snapshot.string_bytes(self.snapshot.form(index)[0])
+
+
+class _FuzzyIndex(Sequence):
+
+    def __init__(self, snapshot, count):
+        self.snapshot = snapshot
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return U64.unpack_from(self.snapshot._mmap, self.snapshot._fuzzy + U64.size * index)[0]
+
+
+class SnapshotVerbs(Sequence):
+    """The snapshot's verbs in frequency order, decoded on access."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.verb_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.snapshot.verb(index)
+
+
+class SnapshotStore:
+    """
+    Read-only view of a snapshot file written by write_snapshot(), memory
+    mapped so that every process serving from the same file shares one
+    physical copy of it. Lookups binary search the file's sorted indexes and
+    only decode the records they return. Has the same interface as
+    ConjugationStore. Whether the file has been replaced is checked at most
+    once every check_interval seconds.
+    """
+
+    def __init__(self, path, check_interval=0):
+        self.path = path
+        self.check_interval = check_interval
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._file_id = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        self._checked = time.monotonic()
+
+        magic, version, vocabulary_hash, *counts = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} conjugation snapshot.')
+        self.vocabulary_hash = vocabulary_hash.decode()
+        string_count, self.verb_count, conjugation_count, self.form_count, match_count, fuzzy_count = counts
+
+        self._strings = HEADER.size
+        self._verbs = self._strings + U32.size * (string_count + 1)
+        self._conjugations = self._verbs + VERB.size * self.verb_count
+        self._infinitive_index = self._conjugations + CONJUGATION.size * conjugation_count
+        self._key_index = self._infinitive_index + U32.size * self.verb_count
+        self._forms = self._key_index + U32.size * self.verb_count
+        self._matches = self._forms + FORM.size * self.form_count
+        self._fuzzy = self._matches + MATCH.size * match_count
+        self._heap = self._fuzzy + U64.size * fuzzy_count
+
+        # Weak references, so that the store is freed, and the file unmapped,
+        # as soon as the last request reading it is done with it.
+        proxy = weakref.proxy(self)
+        self._infinitive_keys = _Keys(proxy, self._infinitive_index, 0)
+        self._lookup_keys = _Keys(proxy, self._key_index, 1)
+        self._form_keys = _Forms(proxy)
+        self._fuzzy_index = _FuzzyIndex(proxy, fuzzy_count)
+        self._initial_ranks = {}
+
+    @property
+    def verbs(self):
+        return SnapshotVerbs(self)
+
+    def is_outdated(self):
+        """
+        Returns True if the snapshot file has been replaced since it was
+        opened, as of the last check.
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_dev, stat.st_ino, stat.st_mtime_ns) != self._file_id
+
+    def string_bytes(self, string_id):
+        start, end = struct.unpack_from('<2I', self._mmap, self._strings + U32.size * string_id)
+        return self._mmap[self._heap + start:self._heap + end]
+
+    def string(self, string_id):
+        if string_id == NONE:
+            return None
+        return self.string_bytes(string_id).decode()
+
+    def string_length(self, string_id):
+        """Returns the encoded length of a string, without reading it."""
+        start, end = struct.unpack_from('<2I', self._mmap, self._strings + U32.size * string_id)
+        return end - start
+
+    def verb_string(self, rank, field):
+        return self.string_bytes(U32.unpack_from(self._mmap, self._verbs + VERB.size * rank + U32.size * field)[0])
+
+    def index_rank(self, offset, index):
+        return U32.unpack_from(self._mmap, offset + U32.size * index)[0]
+
+    def form(self, index):
+        return FORM.unpack_from(self._mmap, self._forms + FORM.size * index)
+
+    def verb(self, rank):
+        record = VERB.unpack_from(self._mmap, self._verbs + VERB.size * rank)
+        return SnapshotVerb(*map(self.string, record[:5]), record[5], rank)
+
+    def _find(self, keys, offset, key):
+        index = bisect.bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return self.verb(self.index_rank(offset, index))
+        return None
+
+    def get_verb(self, infinitive):
+        """
+        Returns the verb matching infinitive, ignoring case and umlaut/ß
+        spelling, or None. Mirrors Verb.lookup().
+        """
+        verb = self._find(self._infinitive_keys, self._infinitive_index, infinitive.encode())
+        if verb is None:
+            verb = self._find(self._lookup_keys, self._key_index, normalize_infinitive(infinitive).encode())
+        return verb
+
+    def find_form(self, form):
+        """
+        Returns a tuple of FormMatch for every verb, mood, tense and person
+        whose stored form matches form, ignoring case and umlaut/ß spelling.
+        """
+        key = normalize_form(form).encode()
+        index = bisect.bisect_left(self._form_keys, key)
+        if index == len(self._form_keys) or self._form_keys[index] != key:
+            return ()
+        _, start, count = self.form(index)
+        matches = []
+        for position in range(start, start + count):
+            rank, mood, tense, person = MATCH.unpack_from(self._mmap, self._matches + MATCH.size * position)
+            matches.append(FormMatch(self.verb_string(rank, 0).decode(), self.string(mood), self.string(tense),
+                                     MATCH_PERSONS[person]))
+        return tuple(matches)
+
+    def complete(self, prefix, limit):
+        """
+        Returns up to limit infinitives whose normalized form starts with the
+        normalized prefix, most frequent first.
+        """
+        key = normalize_infinitive(prefix).encode()
+        start = bisect.bisect_left(self._lookup_keys, key)
+        # 0xff never occurs in UTF-8, so it sorts after every continuation.
+        stop = bisect.bisect_left(self._lookup_keys, key + b'\xff', start)
+        ranks = heapq.nsmallest(limit, (self.index_rank(self._key_index, index) for index in range(start, stop)))
+        return [self.verb_string(rank, 0).decode() for rank in ranks]
+
+    def suggest(self, query, limit):
+        """
+        Returns up to limit verbs whose infinitive is a typo away from query,
+        ignoring case and umlaut/ß spelling, closest and then most frequent
+        first.
+        """
+        ranks = fuzzy.suggest(self._fuzzy_index, lambda rank: self.verb_string(rank, 1).decode(), query, limit)
+        return [self.verb(rank) for rank in ranks]
+
+    def initial_ranks(self, letter):
+        """
+        Returns the ranks, in order, of the verbs whose normalized infinitive
+        starts with letter. Computed once per letter.
+        """
+        ranks = self._initial_ranks.get(letter)
+        if ranks is None:
+            key = normalize_infinitive(letter).encode()
+            start = bisect.bisect_left(self._lookup_keys, key)
+            stop = bisect.bisect_left(self._lookup_keys, key + b'\xff', start)
+            ranks = self._initial_ranks[letter] = tuple(sorted(
+                self.index_rank(self._key_index, index) for index in range(start, stop)))
+        return ranks
+
+    def neighbours(self, verb):
+        """Returns the (prev, next) infinitives of verb by frequency rank."""
+        return (self.verb_string((verb.rank - 1) % self.verb_count, 0).decode(),
+                self.verb_string((verb.rank + 1) % self.verb_count, 0).decode())
+
+    def frequencies(self):
+        """Returns the frequency of every verb, in rank order."""
+        return [U32.unpack_from(self._mmap, self._verbs + VERB.size * rank + U32.size * 5)[0]
+                for rank in range(self.verb_count)]
+
+    def drill_cells(self):
+        """
+        Yields the (rank, mood, tense, person, answer id) of every non-empty
+        person form, see ConjugationStore.drill_cells(). Answer ids are
+        string ids, so the forms themselves are only read by drill_answer().
+        """
+        names = {}
+
+        def name(string_id):
+            if string_id not in names:
+                names[string_id] = self.string(string_id)
+            return names[string_id]
+
+        for rank in range(self.verb_count):
+            start, count = struct.unpack_from('<2I', self._mmap, self._verbs + VERB.size * rank + U32.size * 6)
+            records = [CONJUGATION.unpack_from(self._mmap, self._conjugations + CONJUGATION.size * position)
+                       for position in range(start, start + count)]
+            # In the order of group_by_mood().
+            for record in sorted(records, key=lambda record: mood_sort_key(name(record[2]))):
+                for person, string_id in zip(PERSONS, record[4:]):
+                    if string_id != NONE and self.string_length(string_id):
+                        yield rank, name(record[2]), name(record[3]), person, string_id
+
+    def drill_answer(self, answer_id):
+        return self.string(answer_id)
+
+    def conjugations_grouped_by_mood(self, verb):
+        """Returns verb's conjugations as (mood, conjugations) pairs, see group_by_mood()."""
+        start, count = struct.unpack_from('<2I', self._mmap, self._verbs + VERB.size * verb.rank + U32.size * 6)
+        conjugations = []
+        for position in range(start, start + count):
+            record = CONJUGATION.unpack_from(self._mmap, self._conjugations + CONJUGATION.size * position)
+            conjugations.append(SnapshotConjugation(
+                record[0], verb.infinitive, *map(self.string, record[2:])))
+        return group_by_mood(conjugations)
@@ -0,0 +1,320 @@
+import bisect
+import hashlib
+import heapq
+import os
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+
+from . import cache, fuzzy
+from .models import Conjugation, Verb, normalize_infinitive
+
+# Display order of the moods on the conjugation page. Any other mood is shown
+# after these, by name.
+MOOD_ORDER = ('indicative', 'subjunctive I', 'subjunctive II', 'imperative')
+
+# Conjugation person fields, in display order.
+PERSONS = ('ich', 'du', 'er', 'wir', 'ihr', 'sie')
+
+# A page of the verb index: its verbs, the frequency to pass as after to get
+# the previous page (None for the first page, see has_previous) and the
+# frequency to pass as after to get the next page (None on the last page).
+IndexPage = namedtuple('IndexPage', ['verbs', 'has_previous', 'previous_after', 'next_after'])
+
+# A verb form found by ConjugationStore.find_form(). mood and tense are None
+# for participles, whose person is 'present participle' or 'past participle'.
+FormMatch = namedtuple('FormMatch', ['infinitive', 'mood', 'tense', 'person'])
+
+
+def normalize_form(form):
+    """Returns the index key of a verb form, with whitespace collapsed."""
+    return ' '.join(normalize_infinitive(form).split())
+
+
+def mood_sort_key(mood):
+    if mood in MOOD_ORDER:
+        return MOOD_ORDER.index(mood), ''
+    return len(MOOD_ORDER), mood
+
+
+def group_by_mood(conjugations):
+    """
+    Returns conjugations as a tuple of (mood, conjugations) pairs, one for
+    every mood that has any, in display order. Conjugations keep their order
+    within a mood.
+    """
+    grouped = {}
+    for conjugation in conjugations:
+        grouped.setdefault(conjugation.mood_id, []).append(conjugation)
+    return tuple((mood, tuple(grouped[mood])) for mood in sorted(grouped, key=mood_sort_key))
+
+
+class ConjugationStore:
+    """
+    Read-only, in-memory copy of the Verb and Conjugation tables. Holds every
+    verb keyed by its infinitive and by its normalized lookup key, a prev/next
+    ring ordered by frequency and each verb's conjugations already grouped by
+    mood, plus an inverted index from every stored verb form back to the
+    verbs, moods, tenses and persons it belongs to and a fuzzy index of the
+    infinitives (see fuzzy.py).
+    """
+
+    def __init__(self, verbs, conjugations):
+        self.verbs = tuple(sorted(verbs, key=lambda verb: verb.frequency))
+        self._by_infinitive = MappingProxyType({verb.infinitive: verb for verb in self.verbs})
+        by_key = {}
+        for verb in self.verbs:
+            by_key.setdefault(verb.lookup_key, verb)
+        self._by_key = MappingProxyType(by_key)
+
+        vocabulary = '\n'.join(verb.infinitive for verb in self.verbs)
+        self.vocabulary_hash = hashlib.sha1(vocabulary.encode()).hexdigest()
+
+        # Prefix index: normalized keys in sorted order, each paired with the
+        # verb's position in self.verbs (i.e. its frequency rank).
+        prefix_index = sorted((verb.lookup_key, rank) for rank, verb in enumerate(self.verbs))
+        self._prefix_keys = tuple(key for key, _ in prefix_index)
+        self._prefix_ranks = tuple(rank for _, rank in prefix_index)
+        self._initial_ranks = {}
+        self._fuzzy_index = fuzzy.build_index([verb.lookup_key for verb in self.verbs])
+
+        count = len(self.verbs)
+        self._neighbours = MappingProxyType({
+            verb.infinitive: (self.verbs[i - 1].infinitive, self.verbs[(i + 1) % count].infinitive)
+            for i, verb in enumerate(self.verbs)
+        })
+
+        # In id order; drill answer ids point into it.
+        self._conjugations = tuple(sorted(conjugations, key=lambda conjugation: conjugation.id))
+        by_verb = {verb.infinitive: [] for verb in self.verbs}
+        for conjugation in self._conjugations:
+            if conjugation.verb_id in by_verb:
+                by_verb[conjugation.verb_id].append(conjugation)
+        self._grouped = MappingProxyType({
+            infinitive: group_by_mood(verb_conjugations) for infinitive, verb_conjugations in by_verb.items()
+        })
+
+        forms = {}
+        for verb in self.verbs:
+            for person in ('present participle', 'past participle'):
+                form = getattr(verb, person.replace(' ', '_'))
+                if form:
+                    forms.setdefault(normalize_form(form), []).append(
+                        FormMatch(verb.infinitive, None, None, person))
+        for conjugation in self._conjugations:
+            for person in PERSONS:
+                form = getattr(conjugation, person)
+                if form:
+                    forms.setdefault(normalize_form(form), []).append(
+                        FormMatch(conjugation.verb_id, conjugation.mood_id, conjugation.tense_id, person))
+        self._forms = MappingProxyType({form: tuple(matches) for form, matches in forms.items()})
+
+    @classmethod
+    def from_database(cls):
+        verbs = list(Verb.objects.all())
+        conjugations = list(Conjugation.objects.select_related('mood', 'tense'))
+        return cls(verbs, conjugations)
+
+    def is_outdated(self):
+        return False
+
+    def get_verb(self, infinitive):
+        """
+        Returns the verb matching infinitive, ignoring case and umlaut/ß
+        spelling, or None. Mirrors Verb.lookup().
+        """
+        verb = self._by_infinitive.get(infinitive)
+        if verb is None:
+            verb = self._by_key.get(normalize_infinitive(infinitive))
+        return verb
+
+    def find_form(self, form):
+        """
+        Returns a tuple of FormMatch for every verb, mood, tense and person
+        whose stored form matches form, ignoring case and umlaut/ß spelling.
+        """
+        return self._forms.get(normalize_form(form), ())
+
+    def complete(self, prefix, limit):
+        """
+        Returns up to limit infinitives whose normalized form starts with the
+        normalized prefix, most frequent first.
+        """
+        key = normalize_infinitive(prefix)
+        start = bisect.bisect_left(self._prefix_keys, key)
+        stop = bisect.bisect_left(self._prefix_keys, key + '\U0010ffff', start)
+        ranks = heapq.nsmallest(limit, self._prefix_ranks[start:stop])
+        return [self.verbs[rank].infinitive for rank in ranks]
+
+    def suggest(self, query, limit):
+        """
+        Returns up to limit verbs whose infinitive is a typo away from query,
+        ignoring case and umlaut/ß spelling, closest and then most frequent
+        first.
+        """
+        ranks = fuzzy.suggest(self._fuzzy_index, lambda rank: self.verbs[rank].lookup_key, query, limit)
+        return [self.verbs[rank] for rank in ranks]
+
+    def initial_ranks(self, letter):
+        """
+        Returns the ranks, in order, of the verbs whose normalized infinitive
+        starts with letter. Computed once per letter.
+        """
+        ranks = self._initial_ranks.get(letter)
+        if ranks is None:
+            key = normalize_infinitive(letter)
+            start = bisect.bisect_left(self._prefix_keys, key)
+            stop = bisect.bisect_left(self._prefix_keys, key + '\U0010ffff', start)
+            ranks = self._initial_ranks[letter] = tuple(sorted(self._prefix_ranks[start:stop]))
+        return ranks
+
+    def neighbours(self, verb):
+        """Returns the (prev, next) infinitives of verb by frequency rank."""
+        return self._neighbours[verb.infinitive]
+
+    def conjugations_grouped_by_mood(self, verb):
+        """Returns verb's conjugations as (mood, conjugations) pairs, see group_by_mood()."""
+        return self._grouped[verb.infinitive]
+
+    def frequencies(self):
+        """Returns the frequency of every verb, in rank order."""
+        return [verb.frequency for verb in self.verbs]
+
+    def drill_cells(self):
+        """
+        Yields the (rank, mood, tense, person, answer id) of every non-empty
+        person form, verb by verb in rank order and then in display order.
+        drill_answer() returns the form of an answer id.
+        """
+        positions = {id(conjugation): position for position, conjugation in enumerate(self._conjugations)}
+        for rank, verb in enumerate(self.verbs):
+            for mood, conjugations in self._grouped[verb.infinitive]:
+                for conjugation in conjugations:
+                    for index, person in enumerate(PERSONS):
+                        if getattr(conjugation, person):
+                            yield (rank, mood, conjugation.tense_id, person,
+                                   positions[id(conjugation)] * len(PERSONS) + index)
+
+    def drill_answer(self, answer_id):
+        position, index = divmod(answer_id, len(PERSONS))
+        return getattr(self._conjugations[position], PERSONS[index])
+
+
+def index_page(conjugation_store, letter=None, after=None, limit=100):
+    """
+    Returns the IndexPage of up to limit verbs, most frequent first, that
+    follow the verb with frequency after (keyset pagination), optionally
+    only those starting with letter. Binary searches the frequency ordered
+    verbs, so the cost doesn't depend on how deep the page is.
+    """
+    verbs = conjugation_store.verbs
+    ranks = conjugation_store.initial_ranks(letter) if letter else range(len(verbs))
+    start = 0
+    if after is not None:
+        high = len(ranks)
+        while start < high:
+            middle = (start + high) // 2
+            if verbs[ranks[middle]].frequency <= after:
+                start = middle + 1
+            else:
+                high = middle
+    stop = min(start + limit, len(ranks))
+    previous = start - limit
+    return IndexPage(
+        [verbs[rank] for rank in ranks[start:stop]],
+        start > 0,
+        verbs[ranks[previous - 1]].frequency if previous > 0 else None,
+        verbs[ranks[stop - 1]].frequency if stop < len(ranks) else None,
+    )
+
+
+_store = None
+_stale = False
+# The dataset version _store was loaded at.
+_version = None
+_lock = threading.Lock()
+
+
+def load(rebuild=False):
+    """
+    Returns a new store. With CONJUGATOR_SNAPSHOT_PATH set it is memory mapped
+    from that snapshot file, which is (re)written from the database first if
+    it doesn't exist or rebuild is True. Otherwise it is read from the
+    database.
+    """
+    path = settings.CONJUGATOR_SNAPSHOT_PATH
+    if not path:
+        return ConjugationStore.from_database()
+    from . import snapshot
+    if rebuild or not os.path.exists(path):
+        snapshot.write_snapshot_from_database(path)
+    return snapshot.SnapshotStore(path, check_interval=settings.CONJUGATOR_SNAPSHOT_CHECK_INTERVAL)
+
+
+def get_store():
+    """
+    Returns the process-wide store, loading it on first use, whenever the
+    dataset version changed (see cache.get_dataset_version()), so after a
+    write made through any process, and whenever another process has
+    replaced its snapshot file. Only the process that wrote the data rewrites
+    the snapshot (see dataset_changed()), the others just map it again.
+    A replaced store is unmapped once the requests still reading it are done
+    with it.
+    """
+    global _store, _stale, _version
+    version = cache.get_dataset_version()
+    store = _store
+    if store is None or _version != version or store.is_outdated():
+        with _lock:
+            # Unless another thread replaced it meanwhile.
+            if _store is store:
+                _store = load(rebuild=_stale)
+                _stale = False
+                _version = version
+            store = _store
+    return store
+
+
+def is_loaded():
+    """Returns True if the store is loaded and current, so get_store() won't query."""
+    return _store is not None and cache.is_dataset_version_current() and _version == cache.get_dataset_version()
+
+
+def reload():
+    """
+    Rebuilds the store, and its snapshot file if any, from the database. Must
+    be called whenever the underlying tables change.
+    """
+    global _store, _stale, _version
+    with _lock:
+        _version = cache.get_dataset_version()
+        _store = load(rebuild=True)
+        _stale = False
+    return _store
+
+
+def dataset_changed():
+    """
+    Marks every cached page and every worker's store as stale after a
+    committed write to the verb tables. A snapshot file is rewritten first,
+    so that the other workers map the new file when they see the new version.
+    """
+    if settings.CONJUGATOR_SNAPSHOT_PATH:
+        reload()
+        cache.bump_dataset_version()
+    else:
+        cache.bump_dataset_version()
+        invalidate()
+
+
+def invalidate():
+    """
+    Drops the store so that the next get_store() reloads it, and its snapshot
+    file if any, from the database lazily.
+    """
+    global _store, _stale
+    with _lock:
+        _store = None
+        _stale = True
@@ -1,9 +1,39 @@
-from django.db.utils import IntegrityError
-from django.test import Client, TestCase
+import asyncio
+import copy
+import csv
+import gzip
+import importlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import weakref
+from datetime import timedelta
+from io import StringIO
+
+from django.apps import apps
+from django.core import serializers
+from django.core.asgi import get_asgi_application
+from django.core.signals import request_finished, request_started
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.core.management import CommandError, call_command
+from django.db import close_old_connections, connection, connections
+from django.db.utils import ConnectionHandler, IntegrityError, OperationalError
+from django.contrib.auth.models import User
+from django.templatetags.static import static
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import ignore_warnings
 from django.urls import resolve, reverse
+from django.utils import timezone
 
-from . import views
-from .models import Conjugation, Mood, Tense, Verb
+from german_verb_project import databases as project_databases
+
+from . import (assets, benchmarks, cache, databases, drill, engine, fuzzy, importer, read_model, store, timing, views,
+               warmup)
+from .snapshot import SnapshotStore, write_snapshot_from_database
+from .models import Conjugation, DatasetVersion, Mood, Tense, Verb, VerbPage, normalize_infinitive
+from .urls import urlpatterns
 
 
 class VerbModelTest(TestCase):
@@ -15,6 +45,49 @@ class VerbModelTest(TestCase):
         verb = Verb.objects.get(infinitive='test_infinitive')
         self.assertEqual(verb.__str__(), verb.infinitive)
 
+    def test_verb_lookup_key_set_on_save(self):
+        verb = Verb.objects.create(infinitive='Mögen', frequency=2)
+        self.assertEqual(verb.lookup_key, 'moegen')
+        verb.lookup_key = ''
+        verb.save()
+        self.assertEqual(Verb.objects.get(infinitive='Mögen').lookup_key, 'moegen')
+
+    def test_verb_lookup_key_set_by_raw_fixture_save(self):
+        fixture = '[{"model": "conjugator.verb", "pk": "müssen", "fields": {"frequency": 2}}]'
+        for obj in serializers.deserialize('json', fixture):
+            obj.save()
+        self.assertEqual(Verb.objects.get(infinitive='müssen').lookup_key, 'muessen')
+
+    def test_normalize_infinitive(self):
+        self.assertEqual(normalize_infinitive('Größer'), 'groesser')
+        self.assertEqual(normalize_infinitive('FÜHLEN'), 'fuehlen')
+
+    def test_verb_lookup_ignores_case_and_umlaut_spelling(self):
+        Verb.objects.create(infinitive='mögen', frequency=2)
+        self.assertEqual(Verb.lookup('MOEGEN').infinitive, 'mögen')
+        self.assertEqual(Verb.lookup('Mögen').infinitive, 'mögen')
+        self.assertIsNone(Verb.lookup('does_not_exist'))
+
+    def test_verb_lookup_prefers_exact_match(self):
+        Verb.objects.create(infinitive='fassen', frequency=2)
+        Verb.objects.create(infinitive='faßen', frequency=3)
+        self.assertEqual(Verb.lookup('faßen').infinitive, 'faßen')
+
+    def test_verb_lookup_uses_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('query plan assertion is SQLite specific')
+        plan = Verb.objects.filter(lookup_key='test_infinitive').explain()
+        self.assertIn('verb_lookup_key_idx', plan)
+
+    def test_migration_fills_lookup_keys(self):
+        Verb.objects.update(lookup_key='')
+        migration = importlib.import_module('conjugator.migrations.0002_verb_lookup_key')
+        migration.fill_lookup_keys(apps, connection.schema_editor())
+        self.assertEqual(Verb.objects.get().lookup_key, 'test_infinitive')
+
+    def test_migrations_are_up_to_date(self):
+        call_command('makemigrations', 'conjugator', check=True, dry_run=True, stdout=StringIO())
+
 
 class MoodModelTest(TestCase):
 
@@ -58,18 +131,397 @@ class ConjugationModelTest(TestCase):
             Conjugation.objects.create(verb=verb, mood=mood, tense=tense)
 
 
-class HomeViewTest(TestCase):
+def commit_writes(using='default'):
+    """
+    Runs the on_commit callbacks of the test transaction as if it had been
+    committed, e.g. store.dataset_changed(). Django 3.0's TestCase never runs
+    them.
+    """
+    connection = connections[using]
+    callbacks, connection.run_on_commit = connection.run_on_commit, []
+    for _, callback in callbacks:
+        callback()
+
+
+# Long enough that the dataset version isn't read again in the middle of a
+# test counting its queries.
+@override_settings(CONJUGATOR_DATASET_CHECK_INTERVAL=3600)
+class CachedDataTestCase(TestCase):
+    """
+    Drops the in-memory conjugation store and the page cache before each test,
+    since rows written by other tests are rolled back without sending any
+    signal.
+    """
+
+    def setUp(self):
+        store.invalidate()
+        cache.get_cache().clear()
+
+
+class DatasetVersionTest(CachedDataTestCase):
+
+    def write_from_another_worker(self):
+        """Bumps the version in the database without this process noticing."""
+        DatasetVersion.objects.filter(pk=1).update(modified=timezone.now() + timedelta(seconds=10))
+
+    def test_bump_dataset_version_writes_the_shared_row(self):
+        cache.bump_dataset_version()
+        self.assertEqual(cache.get_dataset_version(), DatasetVersion.objects.get(pk=1).modified.timestamp())
+
+    def test_writes_in_a_transaction_change_the_dataset_once_on_commit(self):
+        version = cache.get_dataset_version()
+        store.get_store()
+        for i in range(1, 4):
+            Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i)
+        self.assertEqual(cache.get_dataset_version(), version)
+        self.assertTrue(store.is_loaded())
+        self.assertEqual([callback for _, callback in connection.run_on_commit], [store.dataset_changed])
+        commit_writes()
+        self.assertEqual(cache.get_dataset_version(), DatasetVersion.objects.get(pk=1).modified.timestamp())
+        self.assertNotEqual(cache.get_dataset_version(), version)
+        self.assertEqual(len(store.get_store().verbs), 3)
+
+    def test_version_written_by_another_worker_is_read_after_the_interval(self):
+        version = cache.get_dataset_version()
+        self.write_from_another_worker()
+        self.assertEqual(cache.get_dataset_version(), version)
+        self.assertTrue(cache.is_dataset_version_current())
+        with self.settings(CONJUGATOR_DATASET_CHECK_INTERVAL=0):
+            self.assertFalse(cache.is_dataset_version_current())
+            self.assertGreater(cache.get_dataset_version(), version)
+
+    def test_store_reloads_after_another_worker_writes(self):
+        Verb.objects.create(infinitive='test_infinitive1', frequency=1)
+        self.assertEqual(len(store.get_store().verbs), 1)
+        # Not sending the post_save signal, as if written by another worker.
+        Verb.objects.bulk_create([Verb(infinitive='test_infinitive2', lookup_key='test_infinitive2', frequency=2)])
+        self.write_from_another_worker()
+        self.assertEqual(len(store.get_store().verbs), 1)
+        with self.settings(CONJUGATOR_DATASET_CHECK_INTERVAL=0):
+            self.assertFalse(store.is_loaded())
+            self.assertEqual(len(store.get_store().verbs), 2)
+
+    def test_pages_written_by_another_worker_are_not_served_from_the_cache(self):
+        Verb.objects.create(infinitive='test_infinitive1', frequency=1)
+        last_modified = self.client.get(reverse('home'))['Last-Modified']
+        Verb.objects.bulk_create([Verb(infinitive='test_infinitive2', lookup_key='test_infinitive2', frequency=2)])
+        self.write_from_another_worker()
+        with self.settings(CONJUGATOR_DATASET_CHECK_INTERVAL=0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'test_infinitive2')
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+
+class ConjugationStoreTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        indicative = Mood.objects.create(name='indicative')
+        subjunctive_II = Mood.objects.create(name='subjunctive II')
+        present = Tense.objects.create(name='present')
+        preterite = Tense.objects.create(name='preterite')
+        for i in range(1, 4):
+            verb = Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i)
+            Conjugation.objects.create(verb=verb, mood=subjunctive_II, tense=preterite)
+            Conjugation.objects.create(verb=verb, mood=indicative, tense=present)
+            Conjugation.objects.create(verb=verb, mood=indicative, tense=preterite)
+
+    def test_store_get_verb_is_case_insensitive(self):
+        verb = store.get_store().get_verb('Test_Infinitive2')
+        self.assertEqual(verb.infinitive, 'test_infinitive2')
+
+    def test_store_get_verb_returns_none_for_unknown_verb(self):
+        self.assertIsNone(store.get_store().get_verb('does_not_exist'))
+
+    def test_store_neighbours_wrap_around(self):
+        conjugation_store = store.get_store()
+        first = conjugation_store.get_verb('test_infinitive1')
+        last = conjugation_store.get_verb('test_infinitive3')
+        self.assertEqual(conjugation_store.neighbours(first), ('test_infinitive3', 'test_infinitive2'))
+        self.assertEqual(conjugation_store.neighbours(last), ('test_infinitive2', 'test_infinitive1'))
+
+    def test_store_groups_conjugations_by_mood(self):
+        conjugation_store = store.get_store()
+        verb = conjugation_store.get_verb('test_infinitive1')
+        grouped = conjugation_store.conjugations_grouped_by_mood(verb)
+        self.assertEqual([mood for mood, _ in grouped], ['indicative', 'subjunctive II'])
+        self.assertEqual([c.tense.name for c in grouped[0][1]], ['present', 'preterite'])
+        self.assertEqual([c.tense.name for c in grouped[1][1]], ['preterite'])
+
+    def test_store_groups_every_mood_in_display_order(self):
+        verb = Verb.objects.get(infinitive='test_infinitive1')
+        present = Tense.objects.get(name='present')
+        for name in ('optative', 'imperative'):
+            Conjugation.objects.create(verb=verb, mood=Mood.objects.create(name=name), tense=present, du=name)
+        conjugation_store = store.get_store()
+        grouped = conjugation_store.conjugations_grouped_by_mood(conjugation_store.get_verb('test_infinitive1'))
+        self.assertEqual([mood for mood, _ in grouped], ['indicative', 'subjunctive II', 'imperative', 'optative'])
+        self.assertEqual(grouped[2][1][0].du, 'imperative')
+
+    def test_store_find_form(self):
+        Verb.objects.filter(infinitive='test_infinitive1').update(past_participle='Getestet')
+        Conjugation.objects.filter(verb='test_infinitive1', tense='present').update(du='testest  ab')
+        conjugation_store = store.reload()
+        self.assertEqual(conjugation_store.find_form('getestet'),
+                         (store.FormMatch('test_infinitive1', None, None, 'past participle'),))
+        self.assertEqual(conjugation_store.find_form('TESTEST ab'),
+                         (store.FormMatch('test_infinitive1', 'indicative', 'present', 'du'),))
+        self.assertEqual(conjugation_store.find_form('does_not_exist'), ())
+
+    def test_store_suggest(self):
+        Verb.objects.create(infinitive='fahren', frequency=5)
+        Verb.objects.create(infinitive='fahnen', frequency=4)
+        Verb.objects.create(infinitive='mögen', frequency=6)
+        conjugation_store = store.reload()
+        suggest = lambda query: [verb.infinitive for verb in conjugation_store.suggest(query, 5)]
+        # Ranked by distance, then by frequency.
+        self.assertEqual(suggest('farhen'), ['fahren', 'fahnen'])
+        self.assertEqual(suggest('FAHREN'), ['fahren', 'fahnen'])
+        self.assertEqual(suggest('mogen'), ['mögen'])
+        self.assertEqual(suggest('Moegen'), ['mögen'])
+        self.assertEqual(suggest('test_infinitive'), ['test_infinitive1', 'test_infinitive2', 'test_infinitive3'])
+        self.assertEqual(conjugation_store.suggest('Test_Infinitive', 1)[0].infinitive, 'test_infinitive1')
+        self.assertEqual(suggest('xyzzy'), [])
+        self.assertEqual(suggest('fa'), [])
+
+    def test_store_index_page(self):
+        conjugation_store = store.get_store()
+        page = store.index_page(conjugation_store, limit=2)
+        self.assertEqual([verb.infinitive for verb in page.verbs], ['test_infinitive1', 'test_infinitive2'])
+        self.assertEqual(page[1:], (False, None, 2))
+        page = store.index_page(conjugation_store, after=2, limit=2)
+        self.assertEqual([verb.infinitive for verb in page.verbs], ['test_infinitive3'])
+        self.assertEqual(page[1:], (True, None, None))
+        page = store.index_page(conjugation_store, 'T', after=1, limit=1)
+        self.assertEqual([verb.infinitive for verb in page.verbs], ['test_infinitive2'])
+        self.assertEqual(page[1:], (True, None, 2))
+        self.assertEqual(store.index_page(conjugation_store, 'x').verbs, [])
+
+    def test_store_is_invalidated_on_write(self):
+        store.get_store()
+        Verb.objects.create(infinitive='test_infinitive4', frequency=4)
+        commit_writes()
+        self.assertIsNotNone(store.get_store().get_verb('test_infinitive4'))
+
+    def test_store_reload(self):
+        conjugation_store = store.get_store()
+        self.assertIsNot(store.reload(), conjugation_store)
+
+
+class SnapshotStoreTest(ConjugationStoreTest):
+    """Runs the store tests against a memory mapped snapshot."""
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.addCleanup(store.invalidate)
+        self.path = os.path.join(tmp_dir, 'verbs.snapshot')
+        settings_override = override_settings(CONJUGATOR_SNAPSHOT_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
+
+    def test_store_is_built_from_snapshot(self):
+        self.assertIsInstance(store.get_store(), SnapshotStore)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_snapshot_matches_database_store(self):
+        Verb.objects.filter(infinitive='test_infinitive2').update(past_participle='getestet')
+        snapshot_store = store.reload()
+        database_store = store.ConjugationStore.from_database()
+        self.assertEqual(snapshot_store.vocabulary_hash, database_store.vocabulary_hash)
+        self.assertEqual([verb.infinitive for verb in snapshot_store.verbs],
+                         [verb.infinitive for verb in database_store.verbs])
+        self.assertEqual(snapshot_store.complete('TEST', 2), database_store.complete('TEST', 2))
+        self.assertEqual(snapshot_store.find_form('Getestet'), database_store.find_form('Getestet'))
+        self.assertEqual([verb.infinitive for verb in snapshot_store.suggest('test_infinitive', 2)],
+                         [verb.infinitive for verb in database_store.suggest('test_infinitive', 2)])
+        for infinitive in ('test_infinitive1', 'test_infinitive3'):
+            snapshot_verb = snapshot_store.get_verb(infinitive)
+            database_verb = database_store.get_verb(infinitive)
+            self.assertEqual(snapshot_store.neighbours(snapshot_verb), database_store.neighbours(database_verb))
+            self.assertEqual(
+                [(mood, [(c.id, c.tense.name, c.ich) for c in conjugations])
+                 for mood, conjugations in snapshot_store.conjugations_grouped_by_mood(snapshot_verb)],
+                [(mood, [(c.id, c.tense.name, c.ich) for c in conjugations])
+                 for mood, conjugations in database_store.conjugations_grouped_by_mood(database_verb)])
+
+    @override_settings(CONJUGATOR_SNAPSHOT_CHECK_INTERVAL=0)
+    def test_replaced_snapshot_is_picked_up(self):
+        conjugation_store = store.get_store()
+        Verb.objects.filter(infinitive='test_infinitive1').update(translation='to test')
+        # Another process writing a new snapshot.
+        write_snapshot_from_database(self.path)
+        self.assertTrue(conjugation_store.is_outdated())
+        new_store = store.get_store()
+        self.assertIsNot(new_store, conjugation_store)
+        self.assertEqual(new_store.get_verb('test_infinitive1').translation, 'to test')
+        # The old mapping stays readable as long as it is referenced.
+        write_snapshot_from_database(self.path)
+        store.get_store()
+        self.assertEqual(conjugation_store.get_verb('test_infinitive1').translation, '')
+        self.assertEqual(new_store.get_verb('test_infinitive1').translation, 'to test')
+        # And is freed with the last reference, without waiting for the
+        # garbage collector.
+        released = weakref.ref(conjugation_store)
+        del conjugation_store
+        self.assertIsNone(released())
+
+    @override_settings(CONJUGATOR_SNAPSHOT_CHECK_INTERVAL=0, CONJUGATOR_DATASET_CHECK_INTERVAL=0)
+    def test_version_change_remaps_without_rewriting_snapshot(self):
+        store.get_store()
+        modified = os.stat(self.path).st_mtime_ns
+        # Another worker writing a verb: it rewrites the snapshot, not this one.
+        Verb.objects.bulk_create([Verb(infinitive='test_infinitive4', lookup_key='test_infinitive4', frequency=4)])
+        DatasetVersion.objects.filter(pk=1).update(modified=timezone.now() + timedelta(seconds=10))
+        self.assertIsNone(store.get_store().get_verb('test_infinitive4'))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, modified)
+        write_snapshot_from_database(self.path)
+        self.assertIsNotNone(store.get_store().get_verb('test_infinitive4'))
+
+    def test_write_rewrites_snapshot_on_commit(self):
+        store.get_store()
+        Verb.objects.create(infinitive='test_infinitive4', frequency=4)
+        commit_writes()
+        self.assertIsNotNone(SnapshotStore(self.path).get_verb('test_infinitive4'))
+
+    @override_settings(CONJUGATOR_SNAPSHOT_CHECK_INTERVAL=3600)
+    def test_replaced_snapshot_is_checked_once_per_interval(self):
+        conjugation_store = store.get_store()
+        write_snapshot_from_database(self.path)
+        self.assertFalse(conjugation_store.is_outdated())
+        self.assertIs(store.get_store(), conjugation_store)
+        conjugation_store.check_interval = 0
+        self.assertTrue(conjugation_store.is_outdated())
+
+    def test_snapshot_drill_deck_matches_database_store(self):
+        for conjugation in Conjugation.objects.all():
+            for person in store.PERSONS:
+                setattr(conjugation, person, f'{conjugation.verb_id}_{conjugation.tense_id}_{person}')
+            conjugation.save()
+        Conjugation.objects.filter(verb='test_infinitive2', tense='present').update(du='')
+
+        def draw(conjugation_store, **options):
+            return [(item.verb.infinitive, item.mood, item.tense, item.person, item.answer)
+                    for item in drill.Deck(conjugation_store).draw(random.Random(1), 50, **options)]
+
+        snapshot_store = store.reload()
+        database_store = store.ConjugationStore.from_database()
+        for options in ({}, {'weighted': True}, {'persons': {'du'}}):
+            self.assertEqual(draw(snapshot_store, **options), draw(database_store, **options))
+        # Every cell of the 9 conjugations but the empty one.
+        self.assertEqual(sum(len(segment.ranks) for segment in drill.Deck(snapshot_store).segments.values()), 53)
+
+    def test_build_snapshot_command(self):
+        out = StringIO()
+        call_command('build_snapshot', self.path, stdout=out)
+        self.assertIn('Wrote 3 verbs', out.getvalue())
+        self.assertEqual(len(SnapshotStore(self.path).verbs), 3)
+
+
+@override_settings(CONJUGATOR_READ_MODEL=True)
+class ReadModelTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        indicative = Mood.objects.create(name='indicative')
+        subjunctive_II = Mood.objects.create(name='subjunctive II')
+        present = Tense.objects.create(name='present')
+        preterite = Tense.objects.create(name='preterite')
+        for i in range(1, 5):
+            verb = Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i, translation=f'to test {i}')
+            Conjugation.objects.create(verb=verb, mood=subjunctive_II, tense=preterite, ich=f'ich_{i}')
+            Conjugation.objects.create(verb=verb, mood=indicative, tense=present, du=f'du_{i}')
+        Verb.objects.create(infinitive='mögen', frequency=10)
+
+    def setUp(self):
+        super().setUp()
+        read_model.flush()
+        call_command('rebuild_read_model', stdout=StringIO())
+
+    def neighbours(self):
+        pages = (read_model.get_page(verb.infinitive) for verb in Verb.objects.all())
+        return {page.verb.infinitive: (page.previous, page.next) for page in pages}
+
+    def test_rebuild_read_model_command(self):
+        out = StringIO()
+        call_command('rebuild_read_model', stdout=out)
+        self.assertEqual(out.getvalue(), 'Wrote 5 verb pages\n')
+        self.assertEqual(VerbPage.objects.count(), 5)
+
+    def test_page_matches_store(self):
+        conjugation_store = store.ConjugationStore.from_database()
+        for infinitive in ('test_infinitive1', 'mögen'):
+            page = read_model.get_page(infinitive)
+            verb = conjugation_store.get_verb(infinitive)
+            self.assertEqual(tuple(page.verb), tuple(getattr(verb, field) for field in read_model.VERB_FIELDS))
+            self.assertEqual((page.previous, page.next), conjugation_store.neighbours(verb))
+            self.assertEqual(
+                [(mood, [(c.id, c.tense.name) + tuple(getattr(c, person) for person in store.PERSONS)
+                         for c in conjugations]) for mood, conjugations in page.conjugations_grouped_by_mood],
+                [(mood, [(c.id, c.tense.name) + tuple(getattr(c, person) for person in store.PERSONS)
+                         for c in conjugations])
+                 for mood, conjugations in conjugation_store.conjugations_grouped_by_mood(verb)])
+
+    def test_get_page_ignores_case_and_umlaut_spelling(self):
+        self.assertEqual(read_model.get_page('Moegen').verb.infinitive, 'mögen')
+        self.assertIsNone(read_model.get_page('does_not_exist'))
+
+    def test_conjugation_view_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('conjugation', kwargs={'infinitive': 'test_infinitive2'}))
+        self.assertContains(response, 'to test 2')
+        self.assertContains(response, 'ich_2')
+        self.assertContains(response, reverse('conjugation', kwargs={'infinitive': 'test_infinitive3'}))
+        with override_settings(CONJUGATOR_READ_MODEL=False):
+            cache.get_cache().clear()
+            expected = self.client.get(reverse('conjugation', kwargs={'infinitive': 'test_infinitive2'}))
+        self.assertEqual(response.content, expected.content)
+
+    def test_conjugation_write_rebuilds_page_on_commit(self):
+        conjugation = Conjugation.objects.get(verb='test_infinitive1', tense='present')
+        conjugation.du = 'du_edited'
+        conjugation.save()
+        self.assertNotIn('du_edited', VerbPage.objects.get(pk='test_infinitive1').payload)
+        read_model.flush()
+        self.assertIn('du_edited', VerbPage.objects.get(pk='test_infinitive1').payload)
+
+    def test_verb_writes_rebuild_neighbours(self):
+        verb = Verb.objects.get(pk='test_infinitive2')
+        verb.frequency = 20
+        verb.save()
+        Verb.objects.create(infinitive='test_infinitive0', frequency=0)
+        Verb.objects.get(pk='test_infinitive4').delete()
+        read_model.flush()
+        self.assertEqual(self.neighbours(), {
+            'test_infinitive0': ('test_infinitive2', 'test_infinitive1'),
+            'test_infinitive1': ('test_infinitive0', 'test_infinitive3'),
+            'test_infinitive3': ('test_infinitive1', 'mögen'),
+            'mögen': ('test_infinitive3', 'test_infinitive2'),
+            'test_infinitive2': ('mögen', 'test_infinitive0'),
+        })
+        self.assertFalse(VerbPage.objects.filter(pk='test_infinitive4').exists())
+
+    def test_writes_are_not_tracked_when_disabled(self):
+        with override_settings(CONJUGATOR_READ_MODEL=False):
+            Verb.objects.filter(pk='test_infinitive1').get().save()
+        self.assertFalse(getattr(read_model._pending, 'infinitives', None))
+
+
+class HomeViewTest(CachedDataTestCase):
 
     @classmethod
     def setUpTestData(cls):
         Verb.objects.create(infinitive='test_infinitive1', frequency=1)
 
     def setUp(self):
+        super().setUp()
         self.response = self.client.get(reverse('home'))
 
     def create_x_verbs(self, stop):
         for i in range(2, stop + 1):
             Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i)
+        commit_writes()
 
     def home_view_renders_verbs(self):
         response = self.client.get(reverse('home'))
@@ -111,8 +563,87 @@ class HomeViewTest(TestCase):
         self.create_x_verbs(100)
         self.home_view_renders_verbs()
 
+    def create_verbs(self, infinitives):
+        Verb.objects.bulk_create([Verb(infinitive=infinitive, lookup_key=normalize_infinitive(infinitive),
+                                       frequency=frequency)
+                                  for frequency, infinitive in enumerate(infinitives, 2)])
+        store.invalidate()
+        cache.bump_dataset_version()
+
+    def test_home_view_paginates_by_frequency(self):
+        self.create_verbs(f'test_infinitive{i}' for i in range(2, 251))
+        response = self.client.get(reverse('home'))
+        self.assertEqual(sum(len(col) for col in response.context['col_list']), 100)
+        self.assertContains(response, '<span class="badge">100</span>')
+        self.assertNotContains(response, '<span class="badge">101</span>')
+        self.assertNotContains(response, 'rel="prev"')
+        next_url = reverse('home_after', kwargs={'after': 100})
+        self.assertContains(response, f'href="{next_url}" rel="next"')
+
+        response = self.client.get(next_url)
+        self.assertEqual([col[0][0] for col in response.context['col_list']][::5], [101, 151])
+        self.assertContains(response, f'href="{reverse("home")}" rel="prev"')
+        self.assertContains(response, f'href="{reverse("home_after", kwargs={"after": 200})}" rel="next"')
+
+        response = self.client.get(reverse('home_after', kwargs={'after': 200}))
+        self.assertEqual(response.context['col_list'][-1][-1][0], 250)
+        self.assertContains(response, f'href="{next_url}" rel="prev"')
+        self.assertNotContains(response, 'rel="next"')
+
+    def test_home_view_deep_page_makes_no_queries(self):
+        self.create_verbs(f'test_infinitive{i}' for i in range(2, 1001))
+        store.get_store()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home_after', kwargs={'after': 900}))
+        self.assertEqual(response.context['col_list'][0][0][1], 'test_infinitive901')
+
+    def test_home_view_filters_by_initial_letter(self):
+        self.create_verbs(['ändern', 'arbeiten', 'bleiben'])
+        response = self.client.get(reverse('home_letter', kwargs={'letter': 'a'}))
+        self.assertEqual([row[1] for col in response.context['col_list'] for row in col], ['ändern', 'arbeiten'])
+        self.assertEqual([letter for letter, _ in response.context['letters']], ['a', 'b', 't'])
+        response = self.client.get(reverse('home_letter', kwargs={'letter': 'q'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_home_view_precomputed_urls_match_reverse(self):
+        self.create_verbs(['ändern', 'weiß es'])
+        response = self.client.get(reverse('home'))
+        for infinitive in ('ändern', 'weiß es'):
+            self.assertContains(response, f'href="{reverse("conjugation", kwargs={"infinitive": infinitive})}"')
+
+    def test_home_view_sends_validators(self):
+        self.assertTrue(self.response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', self.response)
+        self.assertIn('public', self.response['Cache-Control'])
+
+    def test_home_view_served_from_cache(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.content, self.response.content)
+        self.assertEqual(response['ETag'], self.response['ETag'])
+
+    def test_home_view_not_modified(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=self.response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(reverse('home'), HTTP_IF_MODIFIED_SINCE=self.response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_home_view_cache_invalidated_on_write(self):
+        Verb.objects.create(infinitive='test_infinitive2', frequency=2)
+        commit_writes()
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=self.response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'test_infinitive2')
+
+    def test_home_view_bypasses_cache_with_messages_cookie(self):
+        self.client.cookies['messages'] = 'x'
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=self.response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'conjugator/home.html')
 
-class AutocompleteViewTest(TestCase):
+
+class AutocompleteViewTest(CachedDataTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -120,6 +651,7 @@ class AutocompleteViewTest(TestCase):
             Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i)
 
     def setUp(self):
+        super().setUp()
         self.response = self.client.get(reverse('autocomplete'))
 
     def test_autocomplete_url_resolves_to_autocomplete_view(self):
@@ -137,7 +669,47 @@ class AutocompleteViewTest(TestCase):
         for i in range(verbs.count()):
             self.assertEqual(self.response.json()[i], f'{verbs[i].infinitive}')
 
+    def test_autocomplete_view_prefix_query_ranked_by_frequency(self):
+        response = self.client.get(reverse('autocomplete'), {'q': 'Test_Infinitive1', 'limit': 4})
+        self.assertEqual(response.json(), ['test_infinitive1', 'test_infinitive10',
+                                           'test_infinitive11', 'test_infinitive12'])
+
+    def test_autocomplete_view_prefix_query_default_limit(self):
+        response = self.client.get(reverse('autocomplete'), {'q': 'test'})
+        self.assertEqual(len(response.json()), views.AUTOCOMPLETE_LIMIT)
+
+    def test_autocomplete_view_prefix_query_limit_is_clamped(self):
+        response = self.client.get(reverse('autocomplete'), {'q': 'test', 'limit': 1000})
+        self.assertEqual(len(response.json()), views.AUTOCOMPLETE_MAX_LIMIT)
+        response = self.client.get(reverse('autocomplete'), {'q': 'test', 'limit': 'abc'})
+        self.assertEqual(len(response.json()), views.AUTOCOMPLETE_LIMIT)
+
+    def test_autocomplete_view_prefix_query_without_matches(self):
+        response = self.client.get(reverse('autocomplete'), {'q': 'xyz'})
+        self.assertEqual(response.json(), [])
+
+    def test_autocomplete_view_sends_vocabulary_etag(self):
+        self.assertEqual(self.response['ETag'], f'"{store.get_store().vocabulary_hash}"')
+
+    def test_autocomplete_view_not_modified(self):
+        response = self.client.get(reverse('autocomplete'), HTTP_IF_NONE_MATCH=self.response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_autocomplete_view_etag_changes_with_vocabulary(self):
+        Verb.objects.create(infinitive='test_infinitive101', frequency=101)
+        commit_writes()
+        response = self.client.get(reverse('autocomplete'), HTTP_IF_NONE_MATCH=self.response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.response['ETag'])
+
+    def test_autocomplete_view_prefix_query_makes_no_queries(self):
+        store.get_store()
+        with self.assertNumQueries(0):
+            self.client.get(reverse('autocomplete'), {'q': 'test'})
+
 
+@override_settings(CONJUGATOR_DATASET_CHECK_INTERVAL=3600)
 class ConjugationViewTest(TestCase):
 
     @classmethod
@@ -330,12 +902,42 @@ class ConjugationViewTest(TestCase):
 
         cls.client = Client()
         cls.url = reverse('conjugation', kwargs={'infinitive': f'{cls.verb.infinitive}'})
+        commit_writes()
         cls.response = cls.client.get(cls.url)
 
     def test_conjugation_url_resolves_to_conjugation_view(self):
         view = resolve(self.url)
         self.assertEqual(view.func, views.conjugation)
 
+    def test_conjugation_view_makes_no_queries(self):
+        store.get_store()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conjugation_view_renders_imperative_without_extra_queries(self):
+        Conjugation.objects.create(verb=self.verb, mood=Mood.objects.create(name='imperative'),
+                                   tense_id='present', du='imperative_present_du', ihr='imperative_present_ihr')
+        commit_writes()
+        store.get_store()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Imperative')
+        self.assertContains(response, 'imperative_present_ihr')
+        # Forms the imperative lacks get no row.
+        self.assertContains(response, '<th>ich</th>', count=14)
+        content = response.content.decode()
+        self.assertLess(content.index('Subjunctive II'), content.index('Imperative'))
+
+    def test_conjugation_view_caches_conjugation_tables_fragment(self):
+        # A messages cookie bypasses the page cache, but not the fragment cache.
+        self.client.cookies['messages'] = 'x'
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'conjugator/conjugation.html')
+        self.assertTemplateNotUsed(response, 'conjugator/conjugation_tables.html')
+        self.assertEqual(response.content, self.response.content)
+
     def test_conjugation_view_not_found_status_code(self):
         url = reverse('conjugation', kwargs={'infinitive': 'does_not_exist'})
         no_response = self.client.get(url)
@@ -483,6 +1085,47 @@ class SearchViewTest(ConjugationViewTest):
         url = reverse('conjugation', kwargs={'infinitive': self.verb.infinitive})
         self.assertRedirects(response, url)
 
+    def test_search_view_redirects_inflected_form_to_its_verb(self):
+        response = self.client.get(reverse('search'), {'q': 'Indicative_Preterite_Wir'})
+        url = reverse('conjugation', kwargs={'infinitive': self.verb.infinitive})
+        self.assertRedirects(response, url)
+
+    def test_search_view_redirects_participle_to_its_verb(self):
+        response = self.client.get(reverse('search'), {'q': self.verb.past_participle})
+        url = reverse('conjugation', kwargs={'infinitive': self.verb.infinitive})
+        self.assertRedirects(response, url)
+
+    def test_search_view_lists_all_matches_of_ambiguous_form(self):
+        other_verb = Verb.objects.create(infinitive='other_infinitive', frequency=2)
+        Conjugation.objects.create(verb=other_verb, mood_id='subjunctive II', tense_id='preterite',
+                                   ich='indicative_present_ich')
+        commit_writes()
+        response = self.client.get(reverse('search'), {'q': 'indicative_present_ich'})
+        self.assertTemplateUsed(response, 'conjugator/search.html')
+        self.assertEqual([match.infinitive for match in response.context['matches']],
+                         ['test_infinitive', 'other_infinitive'])
+        self.assertContains(response, reverse('conjugation', kwargs={'infinitive': 'other_infinitive'}))
+        self.assertContains(response, 'Subjunctive II')
+
+    @override_settings(CONJUGATOR_GENERATED_VERBS=True)
+    def test_search_view_suggests_verbs_for_typo(self):
+        Verb.objects.create(infinitive='fahren', frequency=2, translation='to drive')
+        commit_writes()
+        response = self.client.get(reverse('search'), {'q': 'Farhen'})
+        self.assertTemplateUsed(response, 'conjugator/search.html')
+        self.assertEqual([verb.infinitive for verb in response.context['suggestions']], ['fahren'])
+        self.assertContains(response, 'Did you mean')
+        self.assertContains(response, reverse('conjugation', kwargs={'infinitive': 'fahren'}))
+        self.assertContains(response, 'to drive')
+        # 'farhen' could be an infinitive outside the top 100 too.
+        self.assertContains(response, reverse('conjugation', kwargs={'infinitive': 'farhen'}))
+
+    def test_search_view_suggests_verbs_for_typo_without_generated_conjugation(self):
+        response = self.client.get(reverse('search'), {'q': 'test_infinitve'})
+        self.assertEqual([verb.infinitive for verb in response.context['suggestions']], ['test_infinitive'])
+        self.assertIsNone(response.context['generated_infinitive'])
+        self.assertNotContains(response, 'generated conjugation')
+
     def test_search_view_redirected_to_home_view_success_status_code(self):
         response = self.client.get(reverse('search'), {'q': 'does_not_exist'}, follow=True)
         self.assertEqual(response.status_code, 200)
@@ -499,3 +1142,1009 @@ class SearchViewTest(ConjugationViewTest):
     def test_search_view_error_message_rendered_after_redirect(self):
         response = self.client.get(reverse('search'), {'q': 'does_not_exist'}, follow=True)
         self.assertContains(response, 'No verb found matching search query. Please try again.')
+
+
+class FuzzyTest(TestCase):
+
+    def test_edit_distance(self):
+        self.assertEqual(fuzzy.edit_distance('fahren', 'fahren', 2), 0)
+        self.assertEqual(fuzzy.edit_distance('farhen', 'fahren', 2), 1)
+        self.assertEqual(fuzzy.edit_distance('mogen', 'moegen', 2), 1)
+        self.assertEqual(fuzzy.edit_distance('fhren', 'fahrn', 2), 2)
+        self.assertEqual(fuzzy.edit_distance('gehen', 'sprechen', 2), 3)
+
+    def test_suggest_only_compares_candidates(self):
+        keys = ['sein', 'fahren', 'fahnen', 'gehen']
+        index = fuzzy.build_index(keys)
+        compared = []
+
+        def lookup_key(rank):
+            compared.append(keys[rank])
+            return keys[rank]
+
+        self.assertEqual(fuzzy.suggest(index, lookup_key, 'Farhen', 5), [1, 2])
+        self.assertEqual(sorted(compared), ['fahnen', 'fahren'])
+
+
+class EngineTest(TestCase):
+
+    # (verb, mood, tense) cells in which the fixture departs from the standard
+    # forms the engine generates.
+    FIXTURE_ERRATA = {
+        ('entwickeln', 'subjunctive I', 'present'), ('erinnern', 'subjunctive I', 'present'),
+        ('handeln', 'subjunctive I', 'present'), ('müssen', 'subjunctive II', 'preterite'),
+        ('spielen', 'indicative', 'present'), ('schaffen', None, 'past participle'),
+    } | {('schaffen', mood, tense) for mood, tense in (
+        ('indicative', 'present perfect'), ('indicative', 'plusquamperfect'), ('indicative', 'future perfect'),
+        ('subjunctive I', 'present perfect'), ('subjunctive I', 'future perfect'),
+        ('subjunctive II', 'plusquamperfect'), ('subjunctive II', 'future perfect'),
+    )}
+
+    def test_engine_agrees_with_fixture(self):
+        with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'conjugator.json')) as f:
+            fixture = json.load(f)
+        generated = {obj['pk']: engine.generate(obj['pk']) for obj in fixture if obj['model'] == 'conjugator.verb'}
+        mismatches = set()
+        for obj in fixture:
+            fields = obj['fields']
+            if obj['model'] == 'conjugator.verb':
+                verb = generated[obj['pk']]
+                if verb.present_participle != fields['present_participle']:
+                    mismatches.add((obj['pk'], None, 'present participle'))
+                if verb.past_participle != fields['past_participle']:
+                    mismatches.add((obj['pk'], None, 'past participle'))
+            elif obj['model'] == 'conjugator.conjugation':
+                tables = {(mood, tense): forms for mood, tense, forms in generated[fields['verb']].tables}
+                if tables[fields['mood'], fields['tense']] != tuple(fields[person] for person in store.PERSONS):
+                    mismatches.add((fields['verb'], fields['mood'], fields['tense']))
+        self.assertEqual(len(generated), 100)
+        self.assertEqual(mismatches, self.FIXTURE_ERRATA)
+
+    def forms(self, infinitive, mood, tense):
+        return {(m, t): forms for m, t, forms in engine.generate(infinitive).tables}[mood, tense]
+
+    def test_engine_conjugates_weak_verb(self):
+        verb = engine.generate('kaufen')
+        self.assertEqual(verb.past_participle, 'gekauft')
+        self.assertEqual(self.forms('kaufen', 'indicative', 'preterite'),
+                         ('kaufte', 'kauftest', 'kaufte', 'kauften', 'kauftet', 'kauften'))
+        self.assertEqual(self.forms('arbeiten', 'indicative', 'present'),
+                         ('arbeite', 'arbeitest', 'arbeitet', 'arbeiten', 'arbeitet', 'arbeiten'))
+
+    def test_engine_conjugates_separable_verb(self):
+        self.assertEqual(engine.generate('einkaufen').past_participle, 'eingekauft')
+        self.assertEqual(self.forms('einkaufen', 'indicative', 'present')[0], 'kaufe ein')
+        self.assertEqual(self.forms('aufstehen', 'indicative', 'present perfect')[0], 'bin aufgestanden')
+        self.assertEqual(self.forms('aufstehen', 'subjunctive II', 'preterite')[0], 'stände auf')
+
+    def test_engine_conjugates_inseparable_verb(self):
+        self.assertEqual(engine.generate('verbinden').past_participle, 'verbunden')
+        self.assertEqual(self.forms('verbinden', 'indicative', 'preterite')[0], 'verband')
+        self.assertEqual(self.forms('unterhalten', 'subjunctive II', 'preterite')[0], 'unterhielte')
+
+    def test_engine_splits_separable_prefix_only_off_known_verbs(self):
+        self.assertEqual(engine.analyze('fernsehen'), engine.Analysis('fern', '', 'sehen'))
+        self.assertEqual(engine.generate('fernsehen').past_participle, 'ferngesehen')
+        self.assertEqual(engine.analyze('anerkennen'), engine.Analysis('an', 'er', 'kennen'))
+        for infinitive, participle in (('ankern', 'geankert'), ('angeln', 'geangelt'), ('beichten', 'gebeichtet')):
+            self.assertEqual(engine.analyze(infinitive), engine.Analysis('', '', infinitive))
+            self.assertEqual(engine.generate(infinitive).past_participle, participle)
+
+    def test_engine_takes_dual_prefixes_as_inseparable_unless_listed(self):
+        self.assertEqual(engine.analyze('hinterlassen'), engine.Analysis('', 'hinter', 'lassen'))
+        self.assertEqual(engine.generate('übersetzen').past_participle, 'übersetzt')
+        self.assertEqual(engine.generate('umarmen').past_participle, 'umarmt')
+        self.assertEqual(engine.generate('umziehen').past_participle, 'umgezogen')
+        self.assertEqual(self.forms('umziehen', 'indicative', 'present')[0], 'ziehe um')
+        self.assertEqual(self.forms('unterbringen', 'indicative', 'preterite')[0], 'brachte unter')
+
+    def test_engine_conjugates_ieren_verb(self):
+        self.assertEqual(engine.generate('studieren').past_participle, 'studiert')
+        self.assertEqual(self.forms('studieren', 'indicative', 'present perfect')[0], 'habe studiert')
+
+    def test_engine_conjugates_imperative(self):
+        self.assertEqual(self.forms('kaufen', 'imperative', 'present'),
+                         ('', 'kauf', '', 'kaufen wir', 'kauft', 'kaufen Sie'))
+        self.assertEqual(self.forms('einkaufen', 'imperative', 'present'),
+                         ('', 'kauf ein', '', 'kaufen wir ein', 'kauft ein', 'kaufen Sie ein'))
+        self.assertEqual(self.forms('arbeiten', 'imperative', 'present')[1], 'arbeite')
+        self.assertEqual(self.forms('vergessen', 'imperative', 'present')[1], 'vergiss')
+        self.assertEqual(self.forms('fahren', 'imperative', 'present')[1], 'fahr')
+        self.assertEqual(self.forms('sein', 'imperative', 'present')[4], 'seid')
+        self.assertNotIn('imperative', [mood for mood, _, _ in engine.generate('können').tables])
+
+    def test_engine_rejects_non_infinitives(self):
+        self.assertIsNone(engine.generate('does_not_exist'))
+        self.assertIsNone(engine.generate('gekauft'))
+        self.assertIsNone(engine.conjugate('Kaufen'))
+
+    def test_engine_conjugate_groups_unsaved_conjugations_by_mood(self):
+        verb, grouped = engine.conjugate('kaufen')
+        self.assertIsNone(verb.frequency)
+        self.assertEqual([mood for mood, _ in grouped], list(store.MOOD_ORDER))
+        self.assertEqual([c.tense.name for c in grouped[0][1]][:3], ['present', 'present perfect', 'preterite'])
+        self.assertEqual(grouped[0][1][0].ich, 'kaufe')
+        self.assertFalse(Verb.objects.exists())
+
+
+@override_settings(CONJUGATOR_GENERATED_VERBS=True)
+class GeneratedConjugationViewTest(CachedDataTestCase):
+
+    def test_conjugation_view_generates_unknown_verb(self):
+        response = self.client.get(reverse('conjugation', kwargs={'infinitive': 'kaufen'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['generated'])
+        self.assertContains(response, 'is not one of the top 100 verbs')
+        self.assertContains(response, 'gekauft')
+        self.assertContains(response, 'kauftest')
+        self.assertNotContains(response, 'Prev')
+
+    def test_conjugation_view_generates_unknown_verb_case_insensitively(self):
+        response = self.client.get(reverse('conjugation', kwargs={'infinitive': 'Kaufen'}))
+        self.assertContains(response, "Conjugation for 'kaufen'")
+
+    def test_conjugation_view_raises_404_for_non_infinitive(self):
+        response = self.client.get(reverse('conjugation', kwargs={'infinitive': 'gekauft'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_view_redirects_unknown_infinitive_to_generated_conjugation(self):
+        response = self.client.get(reverse('search'), {'q': ' Kaufen '})
+        self.assertRedirects(response, reverse('conjugation', kwargs={'infinitive': 'kaufen'}))
+
+    def test_generated_pages_are_noindex_and_not_cached(self):
+        url = reverse('conjugation', kwargs={'infinitive': 'kaufen'})
+        response = self.client.get(url)
+        self.assertEqual(response['X-Robots-Tag'], 'noindex')
+        self.assertContains(response, '<meta name="robots" content="noindex">')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('ETag', response)
+        # Rendered again rather than served from the cache.
+        self.assertTrue(self.client.get(url).context['generated'])
+        Verb.objects.create(infinitive='test_infinitive', frequency=1)
+        commit_writes()
+        stored = self.client.get(reverse('conjugation', kwargs={'infinitive': 'test_infinitive'}))
+        self.assertNotIn('X-Robots-Tag', stored)
+        self.assertNotContains(stored, 'noindex')
+        self.assertIsNone(self.client.get(reverse('conjugation', kwargs={'infinitive': 'test_infinitive'})).context)
+
+    @override_settings(CONJUGATOR_GENERATED_VERBS=False)
+    def test_generated_pages_require_setting(self):
+        response = self.client.get(reverse('conjugation', kwargs={'infinitive': 'kaufen'}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('search'), {'q': 'kaufen'})
+        self.assertRedirects(response, reverse('home'))
+
+
+class ExportStaticCommandTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        indicative = Mood.objects.create(name='indicative')
+        present = Tense.objects.create(name='present')
+        for i in range(1, 4):
+            verb = Verb.objects.create(infinitive=f'test_infinitive{i}', frequency=i)
+            Conjugation.objects.create(verb=verb, mood=indicative, tense=present, ich=f'ich_{i}')
+
+    def setUp(self):
+        super().setUp()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_static', self.output_dir, workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def read(self, *path):
+        with open(os.path.join(self.output_dir, *path), 'rb') as f:
+            return f.read()
+
+    def test_export_static_renders_all_pages(self):
+        output = self.export()
+        self.assertIn('Rendered 5 of 5 pages', output)
+        home = self.read('index.html')
+        self.assertEqual(home, self.client.get(reverse('home')).content)
+        page = self.read('conjugation', 'test_infinitive2', 'index.html')
+        url = reverse('conjugation', kwargs={'infinitive': 'test_infinitive2'})
+        self.assertEqual(page, self.client.get(url).content)
+        self.assertEqual(gzip.decompress(self.read('conjugation', 'test_infinitive2', 'index.html.gz')), page)
+
+    def test_export_static_writes_manifest(self):
+        self.export()
+        manifest = json.loads(self.read('manifest.json'))
+        self.assertEqual(len(manifest['pages']), 5)
+        self.assertIn('conjugation/test_infinitive1/index.html', manifest['pages']['/conjugation/test_infinitive1/']['files'])
+
+    def test_export_static_only_rerenders_changed_pages(self):
+        self.export()
+        self.assertIn('Rendered 0 of 5 pages', self.export())
+        Conjugation.objects.filter(verb='test_infinitive2').update(ich='changed')
+        self.assertIn('Rendered 1 of 5 pages', self.export())
+        self.assertIn(b'changed', self.read('conjugation', 'test_infinitive2', 'index.html'))
+
+    def test_export_static_force(self):
+        self.export()
+        self.assertIn('Rendered 5 of 5 pages', self.export(force=True))
+
+    def test_export_static_removes_deleted_verbs(self):
+        self.export()
+        Verb.objects.get(infinitive='test_infinitive3').delete()
+        self.export()
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'conjugation', 'test_infinitive3')))
+
+
+class ConjugationApiViewTest(ConjugationViewTest):
+
+    def test_conjugation_api_url_resolves_to_conjugation_api_view(self):
+        view = resolve(reverse('conjugation_api', kwargs={'infinitive': self.verb.infinitive}))
+        self.assertEqual(view.func, views.conjugation_api)
+
+    def test_conjugation_api_renders_grouped_table(self):
+        response = self.client.get(reverse('conjugation_api', kwargs={'infinitive': 'Test_Infinitive'}))
+        data = response.json()
+        self.assertEqual(data['infinitive'], self.verb.infinitive)
+        self.assertEqual(data['frequency'], self.verb.frequency)
+        self.assertEqual(list(data['conjugations']), ['indicative', 'subjunctive I', 'subjunctive II'])
+        self.assertEqual(list(data['conjugations']['subjunctive I']),
+                         ['present', 'present perfect', 'future', 'future perfect'])
+        self.assertEqual(data['conjugations']['indicative']['preterite']['wir'], self.indicative_preterite.wir)
+
+    def test_conjugation_api_not_found(self):
+        response = self.client.get(reverse('conjugation_api', kwargs={'infinitive': 'does_not_exist'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conjugation_api_field_selection(self):
+        url = reverse('conjugation_api', kwargs={'infinitive': self.verb.infinitive})
+        response = self.client.get(url, {'moods': 'subjunctive II', 'tenses': 'future', 'persons': 'ich,sie'})
+        self.assertEqual(response.json()['conjugations'], {
+            'subjunctive II': {'future': {'ich': self.subjunctive_II_future.ich,
+                                          'sie': self.subjunctive_II_future.sie}}
+        })
+
+    def test_conjugation_api_unknown_person(self):
+        url = reverse('conjugation_api', kwargs={'infinitive': self.verb.infinitive})
+        response = self.client.get(url, {'persons': 'ich,es'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_conjugations_api_batch(self):
+        Verb.objects.create(infinitive='other_infinitive', frequency=2)
+        commit_writes()
+        store.get_store()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('conjugations_api'),
+                                       {'verbs': 'other_infinitive,does_not_exist,test_infinitive'})
+            data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([verb['infinitive'] for verb in data['verbs']], ['other_infinitive', 'test_infinitive'])
+        self.assertEqual(data['verbs'][0]['conjugations'], {})
+        self.assertEqual(data['not_found'], ['does_not_exist'])
+
+    def test_conjugations_api_requires_verbs(self):
+        response = self.client.get(reverse('conjugations_api'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_conjugations_api_batch_size_limit(self):
+        verbs = ','.join(['test_infinitive'] * (views.API_MAX_BATCH_SIZE + 1))
+        response = self.client.get(reverse('conjugations_api'), {'verbs': verbs})
+        self.assertEqual(response.status_code, 400)
+
+
+class DrillApiViewTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        indicative = Mood.objects.create(name='indicative')
+        present = Tense.objects.create(name='present')
+        preterite = Tense.objects.create(name='preterite')
+        for frequency in (1, 100):
+            verb = Verb.objects.create(infinitive=f'verb{frequency}', frequency=frequency,
+                                       translation=f'translation{frequency}')
+            for tense in (present, preterite):
+                Conjugation.objects.create(verb=verb, mood=indicative, tense=tense, **{
+                    person: f'{verb.infinitive}_{tense.name}_{person}' for person in store.PERSONS})
+        # Empty cells are never drawn.
+        Conjugation.objects.filter(verb='verb1', tense='present').update(du='')
+
+    def drill(self, **params):
+        response = self.client.get(reverse('drill_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_drill_api_returns_prompts_with_answers(self):
+        data = self.drill(count=200, seed=1)
+        self.assertEqual(data['seed'], 1)
+        self.assertEqual(len(data['drills']), 200)
+        for item in data['drills']:
+            prompt = item['prompt']
+            self.assertEqual(prompt['translation'], prompt['infinitive'].replace('verb', 'translation'))
+            self.assertEqual(item['answer'], f"{prompt['infinitive']}_{prompt['tense']}_{prompt['person']}")
+        self.assertNotIn('verb1_present_du', [item['answer'] for item in data['drills']])
+
+    def test_drill_api_is_reproducible_with_seed(self):
+        self.assertEqual(self.drill(count=50, seed=7), self.drill(count=50, seed=7))
+        self.assertNotEqual(self.drill(count=50, seed=7), self.drill(count=50, seed=8))
+        data = self.drill(count=10)
+        self.assertEqual(self.drill(count=10, seed=data['seed']), data)
+
+    def test_drill_api_filters(self):
+        data = self.drill(count=100, tenses='preterite', persons='ich,wir')
+        self.assertEqual({item['prompt']['tense'] for item in data['drills']}, {'preterite'})
+        self.assertEqual({item['prompt']['person'] for item in data['drills']}, {'ich', 'wir'})
+        self.assertEqual(self.drill(moods='imperative')['drills'], [])
+
+    def test_drill_api_weighted_by_frequency(self):
+        def share(**params):
+            drills = self.drill(count=1000, seed=3, **params)['drills']
+            return sum(item['prompt']['infinitive'] == 'verb1' for item in drills) / len(drills)
+
+        self.assertLess(abs(share() - 0.5), 0.1)
+        # Weights 1 and 1/100.
+        self.assertGreater(share(weighted=1), 0.95)
+
+    def test_drill_api_costs_no_queries(self):
+        self.drill()
+        with self.assertNumQueries(0):
+            self.drill(count=1000, weighted=1)
+
+    def test_drill_api_rejects_bad_parameters(self):
+        for params in ({'count': 0}, {'count': views.DRILL_MAX_COUNT + 1}, {'count': 'x'}, {'seed': 'x'},
+                       {'persons': 'es'}):
+            self.assertEqual(self.client.get(reverse('drill_api'), params).status_code, 400)
+
+    def test_alias_table_draws_by_weight(self):
+        probabilities, aliases = drill.alias_table([1, 2, 5])
+        # Each index's probability is spread over its own and its aliases' columns.
+        shares = [0.0] * 3
+        for index in range(3):
+            shares[index] += probabilities[index] / 3
+            shares[aliases[index]] += (1 - probabilities[index]) / 3
+        self.assertEqual([round(share, 6) for share in shares], [0.125, 0.25, 0.625])
+
+
+class ExportViewTest(ConjugationViewTest):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('staff', password='password', is_staff=True))
+
+    def get_export(self, **params):
+        response = self.client.get(reverse('export'), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_url_resolves_to_export_view(self):
+        view = resolve('/export/')
+        self.assertEqual(view.func, views.export_data)
+
+    def test_export_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('export')).status_code, 302)
+
+    def test_export_ndjson(self):
+        response, content = self.get_export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), Conjugation.objects.count())
+        self.assertEqual(rows[0]['infinitive'], self.verb.infinitive)
+        self.assertEqual(rows[0]['translation'], self.verb.translation)
+        self.assertEqual(rows[0]['ich'], self.indicative_present.ich)
+
+    def test_export_csv(self):
+        response, content = self.get_export(format='csv')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), Conjugation.objects.count())
+        self.assertEqual(rows[-1]['sie'], self.subjunctive_II_future_perfect.sie)
+
+    def test_export_filters(self):
+        _, content = self.get_export(mood='subjunctive II', tense='future')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['du'] for row in rows], [self.subjunctive_II_future.du])
+        _, content = self.get_export(min_frequency=2)
+        self.assertEqual(content, '')
+
+    def test_export_verbs_without_conjugations(self):
+        Verb.objects.create(infinitive='test_verb_only', frequency=2, translation='to test')
+        _, content = self.get_export()
+        row = json.loads(content.splitlines()[-1])
+        self.assertEqual(row['infinitive'], 'test_verb_only')
+        self.assertEqual(row['translation'], 'to test')
+        self.assertIsNone(row['mood'])
+        self.assertIsNone(row['ich'])
+        _, content = self.get_export(format='csv', min_frequency=2)
+        self.assertEqual(list(csv.DictReader(content.splitlines()))[0]['mood'], '')
+        _, content = self.get_export(mood='indicative', min_frequency=2)
+        self.assertEqual(content, '')
+
+    def test_export_gzip(self):
+        response = self.client.get(reverse('export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(content.splitlines()), Conjugation.objects.count())
+
+    def test_export_bad_parameters(self):
+        self.assertEqual(self.client.get(reverse('export'), {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export'), {'min_frequency': 'a'}).status_code, 400)
+
+    def test_export_conjugations_command(self):
+        out = StringIO()
+        call_command('export_conjugations', '--format', 'csv', '--tense', 'present', stdout=out)
+        rows = list(csv.DictReader(out.getvalue().splitlines()))
+        self.assertEqual([row['mood'] for row in rows], ['indicative', 'subjunctive I'])
+
+    def test_export_conjugations_command_gzip_file(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        path = os.path.join(output_dir, 'conjugations.ndjson.gz')
+        call_command('export_conjugations', '-o', path, '--gzip', '--max-frequency', '1')
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(len(f.readlines()), Conjugation.objects.count())
+
+
+class ImportConjugationsCommandTest(CachedDataTestCase):
+
+    FIXTURE = [
+        {'model': 'conjugator.verb', 'pk': 'sein',
+         'fields': {'frequency': 1, 'translation': 'to be', 'present_participle': 'seiend',
+                    'past_participle': 'gewesen'}},
+        {'model': 'conjugator.verb', 'pk': 'mögen', 'fields': {'frequency': 2}},
+        {'model': 'conjugator.mood', 'pk': 'indicative'},
+        {'model': 'conjugator.tense', 'pk': 'present'},
+        {'model': 'conjugator.conjugation', 'pk': 1,
+         'fields': {'verb': 'sein', 'mood': 'indicative', 'tense': 'present', 'ich': 'bin', 'du': 'bist',
+                    'er': 'ist', 'wir': 'sind', 'ihr': 'seid', 'sie': 'sind'}},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.fixture = copy.deepcopy(self.FIXTURE)
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.output_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def import_file(self, path, *args):
+        out = StringIO()
+        call_command('import_conjugations', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_fixture(self):
+        output = self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        self.assertIn('Imported 5 records', output)
+        self.assertIn('conjugation created: 1', output)
+        self.assertEqual(Conjugation.objects.get(verb='sein').wir, 'sind')
+        self.assertEqual(Verb.objects.get(infinitive='mögen').lookup_key, 'moegen')
+        self.assertEqual(store.get_store().get_verb('sein').translation, 'to be')
+
+    def test_import_is_idempotent(self):
+        path = self.write_file('verbs.json', json.dumps(self.fixture))
+        self.import_file(path)
+        output = self.import_file(path)
+        self.assertIn('verb unchanged: 2', output)
+        self.assertIn('conjugation unchanged: 1', output)
+        self.assertIn('conjugation created: 0', output)
+
+    def test_import_updates_changed_rows(self):
+        self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        self.fixture[4]['fields']['ich'] = 'changed'
+        output = self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        self.assertIn('conjugation updated: 1', output)
+        self.assertEqual(Conjugation.objects.get(verb='sein').ich, 'changed')
+
+    def test_import_swaps_frequencies(self):
+        self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        self.fixture[0]['fields']['frequency'], self.fixture[1]['fields']['frequency'] = 2, 1
+        output = self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        self.assertIn('verb updated: 2', output)
+        self.assertEqual(dict(Verb.objects.values_list('infinitive', 'frequency')), {'sein': 2, 'mögen': 1})
+
+    def test_import_reports_frequency_conflicts(self):
+        self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        path = self.write_file('verbs.json', json.dumps([{'model': 'conjugator.verb', 'pk': 'haben',
+                                                          'fields': {'frequency': 1}}]))
+        with self.assertRaisesMessage(CommandError, f'Import of {path} failed'):
+            self.import_file(path)
+        self.assertFalse(Verb.objects.filter(infinitive='haben').exists())
+
+    def test_import_exported_csv_round_trip(self):
+        self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        path = os.path.join(self.output_dir, 'verbs.csv.gz')
+        call_command('export_conjugations', '-o', path, '--format', 'csv', '--gzip')
+        Conjugation.objects.all().delete()
+        Verb.objects.filter(infinitive='mögen').delete()
+        output = self.import_file(path)
+        self.assertIn('conjugation created: 1', output)
+        self.assertEqual(Conjugation.objects.get(verb='sein').ihr, 'seid')
+        # Exported as a verb-only row.
+        self.assertEqual(Verb.objects.get(infinitive='mögen').frequency, 2)
+
+    def test_import_rejects_invalid_rows(self):
+        self.fixture[0]['fields']['frequency'] = 'often'
+        with self.assertRaisesMessage(CommandError, 'Record 1 (verb)'):
+            self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+        del self.fixture[0]
+        with self.assertRaisesMessage(CommandError, 'unknown verbs: sein'):
+            self.import_file(self.write_file('verbs.json', json.dumps(self.fixture)))
+
+    def test_iter_json_array_streams_in_chunks(self):
+        f = StringIO(json.dumps([{'a': 1}, 12345, 'x', []]))
+        self.assertEqual(list(importer.iter_json_array(f, chunk_size=3)), [{'a': 1}, 12345, 'x', []])
+
+
+class BenchmarkTest(CachedDataTestCase):
+
+    def test_synthetic_infinitives_are_unique(self):
+        infinitives = [benchmarks.synthetic_infinitive(i) for i in range(20000)]
+        self.assertEqual(len(set(infinitives)), len(infinitives))
+        self.assertTrue(all(len(infinitive) <= 30 for infinitive in infinitives))
+
+    def test_generate_dataset(self):
+        benchmarks.generate_dataset(25, batch_size=10)
+        self.assertEqual(Verb.objects.count(), 25)
+        self.assertEqual(Conjugation.objects.count(), 25 * len(benchmarks.MOOD_TENSES))
+        verb = Verb.objects.get(frequency=25)
+        self.assertEqual(verb.lookup_key, normalize_infinitive(verb.infinitive))
+
+    def test_benchmark_test_client(self):
+        benchmarks.generate_dataset(10)
+        urls = benchmarks.benchmark_urls(10, 5)
+        result = benchmarks.benchmark_test_client(urls['conjugation'], allocation_samples=2)
+        self.assertEqual(result['requests'], 5)
+        self.assertEqual(result['queries_per_request'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_compare_reports_regressions(self):
+        baseline = {'results': [{'size': 100, 'view': 'home', 'server': 'client', 'p50_ms': 1.0,
+                                 'queries_per_request': 0}]}
+        current = {'results': [{'size': 100, 'view': 'home', 'server': 'client', 'p50_ms': 1.1,
+                                'queries_per_request': 1}]}
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.2),
+                         ['100 home client: queries 0 -> 1'])
+        current['results'][0]['p50_ms'] = 1.5
+        self.assertEqual(len(benchmarks.compare(baseline, current, threshold=0.2)), 2)
+
+    def test_page_weight(self):
+        benchmarks.generate_dataset(10)
+        weight = benchmarks.page_weight(reverse('home'))
+        self.assertEqual(weight['external_assets'], [])
+        # The page, the stylesheet, the script and the icon.
+        self.assertEqual(weight['requests'], 4)
+        self.assertGreater(weight['inline_css_bytes'], 0)
+        self.assertGreater(weight['asset_bytes'], weight['asset_gzip_bytes'])
+
+    def test_compare_reports_page_weight(self):
+        weight = {'url': '/', 'requests': 4, 'html_gzip_bytes': 1000, 'asset_gzip_bytes': 1000}
+        baseline = {'results': [], 'page_weight': [weight]}
+        current = {'results': [], 'page_weight': [dict(weight, asset_gzip_bytes=1300)]}
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.2), [])
+        current['page_weight'][0].update(asset_gzip_bytes=1500, requests=5)
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.2),
+                         ['/: page weight 2000 B -> 2500 B gzipped', '/: requests 4 -> 5'])
+
+    def test_startup_time_needs_a_database_file(self):
+        if connection.vendor == 'sqlite' and connection.creation.is_in_memory_db(connection.settings_dict['NAME']):
+            self.assertIsNone(benchmarks.startup_time())
+
+    def test_compare_reports_startup(self):
+        baseline = {'results': [], 'startup': [{'size': 100, 'process_ms': 300.0,
+                                                'phases_ms': {'store': 40.0, 'urls': 2.0}}]}
+        current = {'results': [], 'startup': [{'size': 100, 'process_ms': 310.0,
+                                               'phases_ms': {'store': 60.0, 'urls': 8.0}}]}
+        # The urls phase is slower, but by less than STARTUP_NOISE_MS.
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.2),
+                         ['100 startup store: 40.0ms -> 60.0ms'])
+
+    def test_compare_databases(self):
+        result = {'size': 100, 'view': 'read_model', 'server': 'client'}
+        results = [dict(result, database='read-write', throughput_rps=1000.0),
+                   dict(result, database='read-only', throughput_rps=1250.0)]
+        self.assertEqual(benchmarks.compare_databases(results), [
+            '    100 read_model    client read-only    1250.0 req/s vs read-write    1000.0 req/s (+25%)'])
+
+    def test_compare_keeps_database_modes_apart(self):
+        result = {'size': 100, 'view': 'home', 'server': 'client', 'queries_per_request': 0}
+        baseline = {'results': [dict(result, p50_ms=1.0), dict(result, p50_ms=2.0, database='read-only')]}
+        current = {'results': [dict(result, p50_ms=1.0, database='read-write'),
+                               dict(result, p50_ms=3.0, database='read-only')]}
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.2),
+                         ['100 home client read-only: p50 2.000ms -> 3.000ms'])
+
+
+class WarmupTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Verb.objects.create(infinitive='test_infinitive', frequency=1)
+
+    def setUp(self):
+        super().setUp()
+        # Like the test client, keep the test transaction's connection open.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    @override_settings(CONJUGATOR_TIMING_SAMPLE_RATE=1)
+    def test_warm_up(self):
+        timing.registry.reset()
+        phases = warmup.warm_up(WSGIHandler())
+        self.assertEqual([phase.name for phase in phases], ['urls', 'templates', 'database', 'store', 'pages'])
+        self.assertEqual([phase.error for phase in phases], [None] * 5)
+        self.assertTrue(store.is_loaded())
+        self.assertEqual(timing.registry.snapshot(), {})
+        # The pages are cached.
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+            self.client.get(reverse('conjugation', kwargs={'infinitive': 'test_infinitive'}))
+
+    def test_resolve_urls_includes_admin(self):
+        # The admin's patterns come on top of the conjugator's.
+        self.assertGreater(warmup.resolve_urls(), len(urlpatterns) + 10)
+
+    @override_settings(TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates'}])
+    def test_failing_phase_is_reported(self):
+        with self.assertLogs('conjugator.warmup', 'ERROR'):
+            phases = dict((phase.name, phase) for phase in warmup.warm_up(WSGIHandler()))
+        self.assertIn('conjugator/base.html', phases['templates'].error)
+        self.assertIsNone(phases['store'].error)
+
+    def test_preload_reports_setup(self):
+        with self.assertLogs('conjugator.warmup', 'INFO') as logs:
+            phases = warmup.preload(WSGIHandler(), 0.25)
+        self.assertEqual(phases[0], warmup.Phase('application', 0.25, None))
+        self.assertEqual([phase.error for phase in phases], [None] * 6)
+        self.assertTrue(logs.output[0].startswith('INFO:conjugator.warmup:Started in '))
+        self.assertIn(': application 250ms, urls ', logs.output[0])
+
+    def test_wsgi_environ_decodes_path(self):
+        environ = warmup.wsgi_environ(reverse('conjugation', kwargs={'infinitive': 'mögen'}))
+        self.assertEqual(WSGIRequest(environ).path, '/conjugation/mögen/')
+
+    def test_warmup_command(self):
+        out = StringIO()
+        call_command('warmup', json=True, stdout=out)
+        phases = json.loads(out.getvalue())
+        self.assertEqual([phase['name'] for phase in phases],
+                         ['application', 'urls', 'templates', 'database', 'store', 'pages'])
+        self.assertTrue(all(phase['error'] is None for phase in phases))
+
+
+class DatabasesTest(TestCase):
+
+    SQLITE = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': '/srv/verbs db.sqlite3', 'CONN_MAX_AGE': 0}
+
+    def test_read_only_sqlite(self):
+        settings = project_databases.read_only_databases(self.SQLITE)
+        self.assertEqual(settings['default']['NAME'], 'file:/srv/verbs%20db.sqlite3?mode=ro')
+        self.assertEqual(settings['default']['PRAGMAS'], project_databases.SQLITE_PRAGMAS)
+        self.assertIsNone(settings['default']['CONN_MAX_AGE'])
+        self.assertEqual(settings[project_databases.WRITER], dict(self.SQLITE, TEST={'MIRROR': 'default'}))
+
+    def test_immutable_sqlite_has_no_writer(self):
+        settings = project_databases.read_only_databases(self.SQLITE, immutable=True)
+        self.assertEqual(list(settings), ['default'])
+        self.assertTrue(settings['default']['NAME'].endswith('?mode=ro&immutable=1'))
+
+    def test_read_only_postgres(self):
+        database = {'ENGINE': 'django.db.backends.postgresql_psycopg2', 'NAME': 'verbs', 'CONN_MAX_AGE': 500,
+                    'OPTIONS': {'options': '-c statement_timeout=5000'}}
+        reader = project_databases.read_only_database(database)
+        self.assertEqual(reader['OPTIONS']['options'], '-c statement_timeout=5000 -c default_transaction_read_only=on')
+        self.assertEqual(reader['CONN_MAX_AGE'], 500)
+        self.assertNotIn('PRAGMAS', reader)
+        self.assertEqual(database['OPTIONS']['options'], '-c statement_timeout=5000')
+
+    def test_read_only_connection(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        database = dict(self.SQLITE, NAME=os.path.join(tmp_dir, 'db'))
+        handler = ConnectionHandler(project_databases.read_only_databases(database))
+        self.addCleanup(handler.close_all)
+        with handler[project_databases.WRITER].cursor() as cursor:
+            cursor.execute('CREATE TABLE verb (infinitive TEXT)')
+            cursor.execute("INSERT INTO verb VALUES ('sein')")
+        with handler['default'].cursor() as cursor:
+            cursor.execute('SELECT infinitive FROM verb')
+            self.assertEqual(cursor.fetchall(), [('sein',)])
+            for name, value in project_databases.SQLITE_PRAGMAS:
+                cursor.execute(f'PRAGMA {name}')
+                self.assertEqual(cursor.fetchone(), (value,))
+            with self.assertRaises(OperationalError):
+                cursor.execute("INSERT INTO verb VALUES ('haben')")
+        # Writes show up on the open read-only connection.
+        with handler[project_databases.WRITER].cursor() as cursor:
+            cursor.execute("INSERT INTO verb VALUES ('haben')")
+        with handler['default'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM verb')
+            self.assertEqual(cursor.fetchone(), (2,))
+
+    def test_router_without_writer(self):
+        router = databases.ReadOnlyRouter()
+        self.assertIsNone(router.db_for_write(Verb))
+        self.assertTrue(router.allow_relation(Verb(), Conjugation()))
+        self.assertIsNone(router.allow_migrate('default', 'conjugator'))
+
+    @ignore_warnings(message='Overriding setting DATABASES')
+    def test_router_migrates_only_writer(self):
+        router = databases.ReadOnlyRouter()
+        with self.settings(DATABASES=project_databases.read_only_databases(self.SQLITE)):
+            self.assertEqual(router.db_for_write(Verb), project_databases.WRITER)
+            self.assertTrue(router.allow_migrate(project_databases.WRITER, 'conjugator'))
+            self.assertFalse(router.allow_migrate('default', 'conjugator'))
+
+    def test_check_connections_leaves_transactions_alone(self):
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+        self.addCleanup(connection.settings_dict.pop, 'CONN_HEALTH_CHECKS')
+        connection.ensure_connection()
+        databases.check_connections()
+        Verb.objects.exists()
+        self.assertIsNotNone(connection.connection)
+
+    def test_connections_are_checked_on_first_use(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        handler = ConnectionHandler({'default': dict(self.SQLITE, NAME=os.path.join(tmp_dir, 'db'),
+                                                     CONN_HEALTH_CHECKS=True)})
+        self.addCleanup(handler.close_all)
+        self.addCleanup(setattr, databases, 'connections', databases.connections)
+        databases.connections = handler
+        checked = handler['default']
+        checked.ensure_connection()
+        checks = []
+        checked.is_usable = lambda: checks.append(checked.connection) and False
+        databases.check_connections()
+        self.assertEqual(checks, [])
+        broken = checked.connection
+        with checked.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(checks, [broken])
+        self.assertIsNot(checked.connection, broken)
+        with checked.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(len(checks), 1)
+
+
+class AssetsTest(TestCase):
+
+    def test_built_assets_are_up_to_date(self):
+        out = StringIO()
+        call_command('build_assets', check=True, stdout=out)
+        self.assertEqual(out.getvalue(), 'Assets are up to date.\n')
+
+    def test_minify_css_keeps_strings(self):
+        css = '/* comment */\n.a  >  .b:hover {\n  content: "a  ;  b";\n  margin: 0 auto;\n}\n'
+        self.assertEqual(assets._minify_css(css), '.a>.b:hover{content:"a  ;  b";margin:0 auto}')
+
+    def test_minify_js_keeps_line_breaks(self):
+        js = '// comment\nconst a = 1\n\n    const url = "http://example.com"\n'
+        self.assertEqual(assets._minify_js(js), 'const a = 1\nconst url = "http://example.com"')
+
+    def test_pages_load_bundles_without_external_assets(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<style>')
+        self.assertContains(response, f'<link rel="preload" href="{static("dist/site.css")}" as="style"')
+        self.assertContains(response, f'<script src="{static("dist/site.js")}" defer>')
+        self.assertNotContains(response, 'jquery')
+        self.assertNotContains(response, 'https://')
+
+
+class ASGIApplicationTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Verb.objects.create(infinitive='test_infinitive', frequency=1, past_participle='test_participle')
+
+    def setUp(self):
+        super().setUp()
+        store.get_store()
+
+    def asgi_get(self, path, query_string=''):
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string.encode(),
+                 'headers': [(b'host', b'testserver')]}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            messages.append(message)
+
+        # Like the test client, keep the test transaction's connection open.
+        request_finished.disconnect(close_old_connections)
+        try:
+            asyncio.run(get_asgi_application()(scope, receive, send))
+        finally:
+            request_finished.connect(close_old_connections)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return messages[0]['status'], body
+
+    def test_serves_pages(self):
+        url = reverse('conjugation', kwargs={'infinitive': 'test_infinitive'})
+        status, body = self.asgi_get(url)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.client.get(url).content)
+        status, body = self.asgi_get(reverse('autocomplete'), 'q=test')
+        self.assertEqual(json.loads(body), ['test_infinitive'])
+
+
+@override_settings(CONJUGATOR_TIMING_SAMPLE_RATE=1, INTERNAL_IPS=['127.0.0.1'])
+class TimingMiddlewareTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Verb.objects.create(infinitive='test_infinitive', frequency=1)
+
+    def setUp(self):
+        super().setUp()
+        timing.registry.reset()
+
+    def server_timing(self, response):
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('search'), {'q': 'test_infinitive'})
+        metrics = self.server_timing(response)
+        # Loading the store: one query for verbs and one for conjugations.
+        self.assertEqual(metrics['db']['desc'], '"2 queries"')
+        self.assertEqual(float(metrics['tpl']['dur']), 0)
+        self.assertGreater(float(metrics['total']['dur']), 0)
+
+    def test_server_timing_measures_templates(self):
+        response = self.client.get(reverse('home'))
+        self.assertGreater(float(self.server_timing(response)['tpl']['dur']), 0)
+
+    def test_timings_aggregated_per_view(self):
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+        self.client.get(reverse('search'), {'q': 'test_infinitive'})
+        stats = timing.registry.snapshot()
+        self.assertEqual(stats['home']['requests'], 2)
+        self.assertEqual(sum(stats['home']['histogram_ms'].values()), 2)
+        self.assertEqual(stats['home']['mean_queries'], 1)
+        self.assertEqual(stats['search']['mean_queries'], 0)
+
+    @override_settings(CONJUGATOR_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(timing.registry.snapshot(), {})
+
+    def test_server_timing_only_sent_to_internal_ips(self):
+        response = self.client.get(reverse('home'), REMOTE_ADDR='203.0.113.1')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(timing.registry.snapshot()['home']['requests'], 1)
+
+    def test_streaming_responses_timed_once_sent(self):
+        self.client.force_login(User.objects.create_user('staff', password='password', is_staff=True))
+        response = self.client.get(reverse('export'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(timing.registry.snapshot(), {})
+        b''.join(response.streaming_content)
+        response.close()
+        stats = timing.registry.snapshot()['export']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreater(stats['mean_queries'], 0)
+
+    def test_timing_stats_requires_staff(self):
+        response = self.client.get(reverse('timing_stats'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_timing_stats(self):
+        self.client.get(reverse('home'))
+        user = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(user)
+        with self.assertLogs('conjugator.timing', 'INFO'):
+            response = self.client.get(reverse('timing_stats'), {'log': 1})
+        self.assertEqual(response.json()['views']['home']['requests'], 1)
+
+
+class AdminTest(CachedDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Mood.objects.bulk_create([Mood(name='indicative'), Mood(name='imperative')])
+        Tense.objects.bulk_create([Tense(name='present'), Tense(name='preterite')])
+        cls.verb = Verb.objects.create(infinitive='test_infinitive', frequency=1)
+        Conjugation.objects.bulk_create([
+            Conjugation(verb=cls.verb, mood_id='imperative', tense_id='present', du='imperative_du'),
+            Conjugation(verb=cls.verb, mood_id='indicative', tense_id='present', ich='present_ich'),
+            Conjugation(verb=cls.verb, mood_id='indicative', tense_id='preterite', ich='preterite_ich'),
+        ])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.grid_url = reverse('admin:conjugator_verb_conjugations', args=[self.verb.pk])
+
+    def add_verbs(self, count):
+        verbs = Verb.objects.bulk_create([Verb(infinitive=f'other_infinitive{i}', frequency=i + 2)
+                                          for i in range(count)])
+        Conjugation.objects.bulk_create([Conjugation(verb=verb, mood_id='indicative', tense_id='present')
+                                         for verb in verbs])
+
+    def record_queries(self, queries):
+        """Appends the SQL of every query to queries, across requests."""
+        def execute_wrapper(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        return connection.execute_wrapper(execute_wrapper)
+
+    def count_queries(self, url):
+        queries = []
+        with self.record_queries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), len(response.content)
+
+    def test_page_weight_and_queries_do_not_grow_with_verbs(self):
+        urls = [
+            reverse('admin:conjugator_verb_change', args=[self.verb.pk]),
+            self.grid_url,
+            reverse('admin:conjugator_conjugation_change', args=[Conjugation.objects.first().pk]),
+            reverse('admin:conjugator_conjugation_changelist'),
+        ]
+        for url in urls:
+            # Warms up per-process caches such as the content types.
+            self.client.get(url)
+        before = [self.count_queries(url) for url in urls]
+        self.add_verbs(60)
+        after = [self.count_queries(url) for url in urls]
+        self.assertEqual([queries for queries, _ in after], [queries for queries, _ in before])
+        # The changelist is paginated, so it grows by at most one page.
+        for (_, before_size), (_, after_size) in zip(before[:3], after[:3]):
+            self.assertEqual(after_size, before_size)
+
+    def test_conjugation_changelist_is_paginated(self):
+        self.add_verbs(60)
+        response = self.client.get(reverse('admin:conjugator_conjugation_changelist'))
+        self.assertEqual(len(response.context['cl'].result_list), 50)
+
+    def test_verb_change_page_links_to_conjugation_grid(self):
+        response = self.client.get(reverse('admin:conjugator_verb_change', args=[self.verb.pk]))
+        self.assertContains(response, self.grid_url)
+        self.assertNotContains(response, 'conjugation_set-TOTAL_FORMS')
+
+    def test_conjugation_grid_lists_conjugations_in_display_order(self):
+        response = self.client.get(self.grid_url)
+        rows = [(conjugation.mood_id, conjugation.tense_id) for conjugation, _ in response.context['form'].rows()]
+        self.assertEqual(rows, [('indicative', 'present'), ('indicative', 'preterite'), ('imperative', 'present')])
+        self.assertContains(response, 'value="imperative_du"')
+
+    def test_conjugation_grid_saves_changes_with_one_update(self):
+        response = self.client.get(self.grid_url)
+        data = {name: field.initial for name, field in response.context['form'].fields.items()}
+        present = Conjugation.objects.get(mood='indicative', tense='present')
+        preterite = Conjugation.objects.get(mood='indicative', tense='preterite')
+        data[f'{present.pk}-ich'] = 'changed_ich'
+        data[f'{preterite.pk}-sie'] = 'changed_sie'
+        store.get_store()
+        queries = []
+        with self.record_queries(queries):
+            response = self.client.post(self.grid_url, data)
+        self.assertRedirects(response, self.grid_url)
+        conjugation_queries = [sql.split()[0] for sql in queries if '"conjugator_conjugation"' in sql]
+        self.assertEqual(conjugation_queries, ['SELECT', 'UPDATE'])
+        present.refresh_from_db()
+        preterite.refresh_from_db()
+        self.assertEqual((present.ich, preterite.ich, preterite.sie), ('changed_ich', 'preterite_ich', 'changed_sie'))
+        self.assertEqual(store.get_store().find_form('changed_ich')[0].infinitive, self.verb.infinitive)
+
+    def test_conjugation_grid_rejects_too_long_forms(self):
+        present = Conjugation.objects.get(mood='indicative', tense='present')
+        response = self.client.post(self.grid_url, {f'{present.pk}-ich': 'x' * 31})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        present.refresh_from_db()
+        self.assertEqual(present.ich, 'present_ich')
+
+    def test_conjugation_grid_requires_change_permission(self):
+        user = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get(self.grid_url)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,221 @@
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger('conjugator.timing')
+
+# Upper bounds in milliseconds of the request time histogram buckets.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+_current = contextvars.ContextVar('conjugator_timing', default=None)
+
+
+class RequestTiming:
+    """Counters collected while a sampled request is processed."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+class ViewStats:
+    """Aggregated timings of one view: a request time histogram and totals."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.requests = 0
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.queries = 0
+
+    def add(self, total_time, timing):
+        self.counts[bisect.bisect_left(BUCKETS_MS, total_time * 1000)] += 1
+        self.requests += 1
+        self.total_time += total_time
+        self.db_time += timing.db_time
+        self.template_time += timing.template_time
+        self.queries += timing.queries
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'mean_ms': self.total_time / requests * 1000,
+            'mean_db_ms': self.db_time / requests * 1000,
+            'mean_template_ms': self.template_time / requests * 1000,
+            'mean_queries': self.queries / requests,
+            'histogram_ms': {str(bound): count for bound, count in zip(BUCKETS_MS, self.counts)},
+        }
+
+
+class TimingRegistry:
+    """Thread-safe per-view ViewStats of the sampled requests of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, total_time, timing):
+        with self._lock:
+            self._views.setdefault(view_name, ViewStats()).add(total_time, timing)
+
+    def snapshot(self):
+        with self._lock:
+            return {view_name: stats.as_dict() for view_name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+
+registry = TimingRegistry()
+
+
+def dump_stats():
+    """Logs the aggregated timings of every view and returns them."""
+    stats = registry.snapshot()
+    for view_name, view_stats in stats.items():
+        logger.info('%s: %d requests, mean %.2fms (db %.2fms, %.1f queries; templates %.2fms)',
+                    view_name, view_stats['requests'], view_stats['mean_ms'], view_stats['mean_db_ms'],
+                    view_stats['mean_queries'], view_stats['mean_template_ms'])
+    return stats
+
+
+class Template(django_backend.Template):
+    """A Django template that adds its render time to the sampled request."""
+
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return super().render(context, request)
+        # Templates rendered from within templates are counted once.
+        timing.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_time += time.perf_counter() - start
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    The Django template backend, timing renders for TimingMiddleware. Set it
+    as the BACKEND of TEMPLATES.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class TimedStream:
+    """
+    Streaming content that calls finish once it is exhausted or closed, so
+    that queries run while a streaming response is sent are timed too.
+    """
+
+    def __init__(self, content, finish):
+        self.content = iter(content)
+        self.finish = finish
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.finished:
+            self.finished = True
+            self.finish()
+
+
+def exposes_timing(request):
+    """Server-Timing headers are only sent in DEBUG or to INTERNAL_IPS."""
+    return settings.DEBUG or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+
+
+class TimingMiddleware:
+    """
+    Times a sample of requests (CONJUGATOR_TIMING_SAMPLE_RATE): database
+    query count and time, template render time (see DjangoTemplates) and
+    total time, aggregated per view into the process-wide registry. Sampled
+    responses get a Server-Timing header if exposes_timing(). Streaming
+    responses are recorded once their body has been sent, and get no header
+    since their queries aren't known before then. Unsampled requests only
+    cost a random draw.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = settings.CONJUGATOR_TIMING_SAMPLE_RATE
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = time.perf_counter()
+        stack = ExitStack()
+        try:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing.execute_wrapper))
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+        finally:
+            _current.reset(token)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+
+        def finish():
+            stack.close()
+            total_time = time.perf_counter() - start
+            registry.add(view_name, total_time, timing)
+            return total_time
+
+        if response.streaming:
+            response.streaming_content = TimedStream(response.streaming_content, finish)
+            return response
+        total_time = finish()
+        if exposes_timing(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timing.db_time * 1000:.3f};desc="{timing.queries} queries"',
+                f'tpl;dur={timing.template_time * 1000:.3f}',
+                f'total;dur={total_time * 1000:.3f}',
+            ])
+        return response
@@ -4,7 +4,15 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('verbs/after/<int:after>/', views.home, name='home_after'),
+    path('verbs/<str:letter>/', views.home, name='home_letter'),
+    path('verbs/<str:letter>/after/<int:after>/', views.home, name='home_letter_after'),
     path('conjugation/<str:infinitive>/', views.conjugation, name='conjugation'),
     path('search/', views.search, name='search'),
-    path('autocomplete/', views.autocomplete, name='autocomplete')
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('api/conjugations/', views.conjugations_api, name='conjugations_api'),
+    path('api/conjugations/<str:infinitive>/', views.conjugation_api, name='conjugation_api'),
+    path('api/drill/', views.drill_api, name='drill_api'),
+    path('export/', views.export_data, name='export'),
+    path('stats/timing/', views.timing_stats, name='timing_stats'),
 ]
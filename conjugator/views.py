@@ -1,67 +1,414 @@
+import json
+import random
+from urllib.parse import quote
+
+from django.conf import settings
 from django.contrib import messages
-from django.http import Http404, JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.text import compress_sequence
+from django.views.decorators.http import condition
+
+from . import drill, engine, export, read_model, store, timing
+from .cache import cached_page, get_fragment
+from .store import PERSONS
+
+PERSON_LABELS = {'er': 'er/sie/es', 'sie': 'sie/Sie'}
+
+HOME_PAGE_SIZE = 100
+HOME_COLUMN_SIZE = 10
+INDEX_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+URL_PLACEHOLDER = 'INFINITIVE'
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+SUGGESTION_LIMIT = 5
+
+API_MAX_BATCH_SIZE = 500
+
+DRILL_COUNT = 100
+DRILL_MAX_COUNT = 1000
+
 
-from .models import Conjugation, Verb
+def index_url(letter=None, after=None):
+    """Returns the URL of a page of the verb index, see home()."""
+    kwargs = {}
+    if letter:
+        kwargs['letter'] = letter
+    if after is not None:
+        kwargs['after'] = after
+    name = {(): 'home', ('after',): 'home_after', ('letter',): 'home_letter',
+            ('letter', 'after'): 'home_letter_after'}[tuple(kwargs)]
+    return reverse(name, kwargs=kwargs)
 
 
-def home(request):
+def conjugation_paths(infinitives):
     """
-    Renders home.html with a list of lists with each list representing a
-    Bootstrap column 10 verbs long.
+    Returns the conjugation page URL of every infinitive, escaped as
+    reverse() does, but reversing the URL pattern only once.
     """
-    verbs = Verb.objects.values('infinitive', 'frequency')
-    col_size = 10
-    col_list = [verbs[i:i+col_size] for i in range(0, len(verbs), col_size)]
-    return render(request, 'conjugator/home.html', {'col_list': col_list})
+    prefix, suffix = reverse('conjugation', kwargs={'infinitive': URL_PLACEHOLDER}).split(URL_PLACEHOLDER)
+    return [prefix + quote(infinitive, safe=RFC3986_SUBDELIMS + '/~:@') + suffix for infinitive in infinitives]
 
 
+def index_letters(conjugation_store):
+    """Returns the INDEX_LETTERS that some verb in the store starts with."""
+    return [letter for letter in INDEX_LETTERS if conjugation_store.initial_ranks(letter)]
+
+
+@cached_page
+def home(request, letter=None, after=None):
+    """
+    Renders home.html with a page of the verb index: the HOME_PAGE_SIZE most
+    frequent verbs after frequency after (keyset pagination), optionally
+    only those starting with letter, as a list of lists with each list
+    representing a Bootstrap column HOME_COLUMN_SIZE verbs long. Served from
+    the in-memory conjugation store and cached per page, so a page costs the
+    same however many verbs there are.
+    """
+    conjugation_store = store.get_store()
+    letters = index_letters(conjugation_store)
+    if letter is not None and letter not in letters:
+        raise Http404('No verbs start with this letter.')
+    page = store.index_page(conjugation_store, letter, after, HOME_PAGE_SIZE)
+    rows = list(zip((verb.frequency for verb in page.verbs), (verb.infinitive for verb in page.verbs),
+                    conjugation_paths(verb.infinitive for verb in page.verbs)))
+    context = {
+        'col_list': [rows[i:i + HOME_COLUMN_SIZE] for i in range(0, len(rows), HOME_COLUMN_SIZE)],
+        'letter': letter,
+        'letters': [(index_letter, index_url(index_letter)) for index_letter in letters],
+        'all_url': index_url(),
+        'first_url': index_url(letter) if page.has_previous else None,
+        'previous_url': index_url(letter, page.previous_after) if page.has_previous else None,
+        'next_url': index_url(letter, page.next_after) if page.next_after is not None else None,
+    }
+    return render(request, 'conjugator/home.html', context)
+
+
+def verb_page(infinitive):
+    """
+    Returns the read_model.Page of the stored verb matching infinitive, or
+    None. Fetched from the VerbPage read model with one query if
+    CONJUGATOR_READ_MODEL is set, or else from the in-memory store.
+    """
+    if settings.CONJUGATOR_READ_MODEL:
+        return read_model.get_page(infinitive)
+    conjugation_store = store.get_store()
+    verb = conjugation_store.get_verb(infinitive)
+    if verb is None:
+        return None
+    return read_model.Page(verb, conjugation_store.conjugations_grouped_by_mood(verb),
+                           *conjugation_store.neighbours(verb))
+
+
+def can_generate(infinitive):
+    """
+    Returns True if infinitive gets a generated conjugation page, which
+    requires CONJUGATOR_GENERATED_VERBS.
+    """
+    return settings.CONJUGATOR_GENERATED_VERBS and engine.can_conjugate(infinitive)
+
+
+@cached_page
 def conjugation(request, infinitive):
     """
-    Renders conjugation.html with the current verb's conjugation pattern.
-    """
-    verb = get_object_or_404(Verb, infinitive__iexact=infinitive)
-    next_frequency = verb.frequency + 1 if verb.frequency < Verb.objects.count() else 1
-    prev_frequency = verb.frequency - 1 if verb.frequency > 1 else Verb.objects.count()
-    next_verb = Verb.objects.get(frequency=next_frequency).infinitive
-    prev_verb = Verb.objects.get(frequency=prev_frequency).infinitive
-    conjugations = Conjugation.objects.filter(verb=verb).select_related('mood', 'tense').order_by('id')
-    indicative = conjugations.filter(mood__name='indicative')
-    subjunctive_I = conjugations.filter(mood__name='subjunctive I')
-    subjunctive_II = conjugations.filter(mood__name='subjunctive II')
-    conjugations_grouped_by_mood = [indicative, subjunctive_I, subjunctive_II]
+    Renders conjugation.html with the current verb's conjugation pattern,
+    served from the in-memory conjugation store or the VerbPage read model
+    (see verb_page()). The conjugation tables are rendered once per verb and
+    dataset version and cached as a fragment. With CONJUGATOR_GENERATED_VERBS
+    verbs not stored are conjugated by the rule-based engine instead, on
+    every request and without caching, and marked noindex.
+    """
+    page = verb_page(infinitive)
+    generated = page is None
+    if not generated:
+        verb, conjugations_grouped_by_mood, prev_verb, next_verb = page
+    else:
+        conjugated = engine.conjugate(infinitive.lower()) if can_generate(infinitive.lower()) else None
+        if conjugated is None:
+            raise Http404('No Verb matches the given query.')
+        verb, conjugations_grouped_by_mood = conjugated
+        prev_verb = next_verb = None
+
+    def render_tables():
+        return render_to_string('conjugator/conjugation_tables.html',
+                                {'conjugations_grouped_by_mood': conjugations_grouped_by_mood})
+
     context = {
         'verb': verb,
         'next_verb': next_verb,
         'prev_verb': prev_verb,
-        'conjugations_grouped_by_mood': conjugations_grouped_by_mood
+        'conjugation_tables': render_tables() if generated else get_fragment(
+            'conjugation_tables', verb.infinitive, render_tables),
+        'generated': generated,
     }
-    return render(request, 'conjugator/conjugation.html', context)
+    response = render(request, 'conjugator/conjugation.html', context)
+    if generated:
+        response['X-Robots-Tag'] = 'noindex'
+        patch_cache_control(response, private=True)
+    return response
 
 
 def search(request):
     """
-    Searches the Verb table for a verb matching the search query. If a match is
-    found redirects to the conjugation view. Otherwise redirects to home with an
-    error message.
+    Searches for a verb matching the search query. If an infinitive matches
+    redirects to the conjugation view. Otherwise looks the query up as an
+    inflected form: a form belonging to a single verb redirects to that verb's
+    conjugation view and an ambiguous form renders search.html listing every
+    match. A query that is a typo away from some infinitives renders
+    search.html suggesting them, along with the generated conjugation if the
+    query itself gets one (see can_generate()). Any other query that gets one
+    redirects to its generated conjugation. Otherwise redirects to home with
+    an error message. Served from the in-memory conjugation store.
     """
     search_query = request.GET.get('q')
     if search_query:
-        try:
-            verb = Verb.objects.get(infinitive__iexact=search_query)
-        except Verb.DoesNotExist:
+        conjugation_store = store.get_store()
+        verb = conjugation_store.get_verb(search_query)
+        if verb is not None:
+            return redirect(reverse('conjugation', kwargs={'infinitive': verb.infinitive}))
+        matches = conjugation_store.find_form(search_query)
+        if not matches:
+            infinitive = search_query.strip().lower()
+            generated = can_generate(infinitive)
+            suggestions = conjugation_store.suggest(search_query, SUGGESTION_LIMIT)
+            if suggestions:
+                context = {
+                    'search_query': search_query,
+                    'suggestions': suggestions,
+                    'generated_infinitive': infinitive if generated else None,
+                }
+                return render(request, 'conjugator/search.html', context)
+            if generated:
+                return redirect(reverse('conjugation', kwargs={'infinitive': infinitive}))
             messages.error(request, f"No verb found matching search query. Please try again.")
             return redirect('home')
-        return redirect(reverse('conjugation', kwargs={'infinitive': verb.infinitive}))
+        infinitives = {match.infinitive for match in matches}
+        if len(infinitives) == 1:
+            return redirect(reverse('conjugation', kwargs={'infinitive': infinitives.pop()}))
+        context = {
+            'search_query': search_query,
+            'matches': [match._replace(person=PERSON_LABELS.get(match.person, match.person))
+                        for match in matches],
+        }
+        return render(request, 'conjugator/search.html', context)
     else:
         raise Http404()
 
 
+def autocomplete_etag(request):
+    """Returns the content hash of the autocomplete vocabulary."""
+    return store.get_store().vocabulary_hash
+
+
+@condition(etag_func=autocomplete_etag)
 def autocomplete(request):
     """
-    Creates a list of all infinitives and renders as JSON to be consumed by the
-    the third party autocomplete feature (auto-complete.js).
+    Renders as JSON every infinitive, most frequent first, which the search
+    bar fetches once and matches against as the user types. With a 'q'
+    parameter returns up to 'limit' infinitives starting with q, most
+    frequent first, from the store's prefix index. Responses carry an ETag of
+    the vocabulary hash so clients can revalidate their cached copy.
+    """
+    conjugation_store = store.get_store()
+    term = request.GET.get('q')
+    if term is None:
+        autocomplete_list = [verb.infinitive for verb in conjugation_store.verbs]
+    else:
+        try:
+            limit = int(request.GET.get('limit', AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        limit = min(max(limit, 1), AUTOCOMPLETE_MAX_LIMIT)
+        autocomplete_list = conjugation_store.complete(term, limit)
+    response = JsonResponse(autocomplete_list, safe=False)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def split_param(request, name):
+    """Returns the comma separated values of a query parameter or None."""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def serialize_verb(conjugation_store, verb, moods, tenses, persons):
+    """
+    Returns a verb's conjugation table as compact JSON, grouped by mood and
+    tense in the same order as the conjugation view.
+    """
+    table = {}
+    for mood, conjugations in conjugation_store.conjugations_grouped_by_mood(verb):
+        if moods is not None and mood not in moods:
+            continue
+        table[mood] = {
+            conjugation.tense_id: {person: getattr(conjugation, person) for person in persons}
+            for conjugation in conjugations
+            if tenses is None or conjugation.tense_id in tenses
+        }
+    data = {
+        'infinitive': verb.infinitive,
+        'frequency': verb.frequency,
+        'translation': verb.translation,
+        'present_participle': verb.present_participle,
+        'past_participle': verb.past_participle,
+        'conjugations': table,
+    }
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_api_filters(request):
+    """
+    Returns the (moods, tenses, persons) filters of an API request. Raises
+    ValueError for an unknown person.
+    """
+    persons = split_param(request, 'persons') or list(PERSONS)
+    unknown = set(persons) - set(PERSONS)
+    if unknown:
+        raise ValueError(f"Unknown persons: {', '.join(sorted(unknown))}")
+    return split_param(request, 'moods'), split_param(request, 'tenses'), persons
+
+
+def conjugation_api(request, infinitive):
+    """
+    Renders a single verb's conjugation table as JSON. Accepts optional comma
+    separated 'moods', 'tenses' and 'persons' parameters to select fields.
+    """
+    try:
+        moods, tenses, persons = parse_api_filters(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    conjugation_store = store.get_store()
+    verb = conjugation_store.get_verb(infinitive)
+    if verb is None:
+        raise Http404('No Verb matches the given query.')
+    content = serialize_verb(conjugation_store, verb, moods, tenses, persons)
+    return HttpResponse(content, content_type='application/json')
+
+
+def conjugations_api(request):
+    """
+    Streams the conjugation tables of a batch of verbs, given as a comma
+    separated 'verbs' parameter, as one JSON document. Infinitives that don't
+    match any verb are listed under 'not_found'. Served from the in-memory
+    store, so the whole batch costs no queries.
     """
-    autocomplete_list = list(Verb.objects.values_list('infinitive', flat=True))
-    return JsonResponse(autocomplete_list, safe=False)
+    infinitives = split_param(request, 'verbs')
+    if not infinitives:
+        return HttpResponseBadRequest('The verbs parameter is required.')
+    if len(infinitives) > API_MAX_BATCH_SIZE:
+        return HttpResponseBadRequest(f'At most {API_MAX_BATCH_SIZE} verbs may be requested at once.')
+    try:
+        moods, tenses, persons = parse_api_filters(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    conjugation_store = store.get_store()
+
+    def stream():
+        not_found = []
+        separator = ''
+        yield '{"verbs":['
+        for infinitive in infinitives:
+            verb = conjugation_store.get_verb(infinitive)
+            if verb is None:
+                not_found.append(infinitive)
+                continue
+            yield separator + serialize_verb(conjugation_store, verb, moods, tenses, persons)
+            separator = ','
+        yield '],"not_found":' + json.dumps(not_found, ensure_ascii=False) + '}'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
+
+
+def drill_api(request):
+    """
+    Renders as JSON 'count' random drills, each a prompt (verb, mood, tense
+    and person) and its answer. Accepts the same 'moods', 'tenses' and
+    'persons' filters as the conjugation API, 'weighted=1' to favour frequent
+    verbs and a 'seed' to repeat a draw. The seed used is always returned.
+    Served from the in-memory store's drill deck, so it costs no queries.
+    """
+    try:
+        moods, tenses, persons = parse_api_filters(request)
+        count = int(request.GET.get('count', DRILL_COUNT))
+        seed = int(request.GET['seed']) if 'seed' in request.GET else random.randrange(2 ** 32)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if not 1 <= count <= DRILL_MAX_COUNT:
+        return HttpResponseBadRequest(f'count must be between 1 and {DRILL_MAX_COUNT}.')
+    weighted = request.GET.get('weighted') == '1'
+    deck = drill.get_deck(store.get_store())
+    drills = deck.draw(random.Random(seed), count, moods, tenses, persons, weighted)
+    data = {
+        'seed': seed,
+        'drills': [{
+            'prompt': {
+                'infinitive': cell.verb.infinitive,
+                'translation': cell.verb.translation,
+                'mood': cell.mood,
+                'tense': cell.tense,
+                'person': cell.person,
+            },
+            'answer': cell.answer,
+        } for cell in drills],
+    }
+    return HttpResponse(json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+                        content_type='application/json')
+
+
+@staff_member_required
+def export_data(request):
+    """
+    Streams every Verb and Conjugation row as NDJSON (default) or CSV, chosen
+    by the 'format' parameter, in constant memory (see export.export_rows()).
+    Accepts optional 'mood', 'tense', 'min_frequency' and 'max_frequency'
+    filters and is gzipped on the fly for clients that accept it. Staff only,
+    since every request reads the whole dataset.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.EXPORT_FORMATS:
+        return HttpResponseBadRequest(f'Unknown format: {export_format}')
+    try:
+        frequencies = {
+            name: int(request.GET[name]) if request.GET.get(name) else None
+            for name in ('min_frequency', 'max_frequency')
+        }
+    except ValueError:
+        return HttpResponseBadRequest('Frequencies must be integers.')
+    rows = export.export_rows(mood=request.GET.get('mood'), tense=request.GET.get('tense'), **frequencies)
+    lines = (line.encode() for line in export.export_lines(export_format, rows))
+    content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson'
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = StreamingHttpResponse(compress_sequence(lines), content_type=content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = f'attachment; filename="conjugations.{export_format}"'
+    return response
+
+
+@staff_member_required
+def timing_stats(request):
+    """
+    Renders as JSON the per-view timing histograms collected by
+    TimingMiddleware in this process. With a 'log' parameter also writes them
+    to the conjugator.timing logger.
+    """
+    if 'log' in request.GET:
+        stats = timing.dump_stats()
+    else:
+        stats = timing.registry.snapshot()
+    return JsonResponse({
+        'sample_rate': settings.CONJUGATOR_TIMING_SAMPLE_RATE,
+        'views': stats,
+    })
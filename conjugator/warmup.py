@@ -0,0 +1,157 @@
+"""
+Warms up a process before it serves its first request: resolves and compiles
+every URL pattern, compiles the page templates, connects to the database,
+loads the store and renders a couple of pages. Run from the WSGI module with
+gunicorn --preload, the work is done once in the master and inherited by
+every forked worker. Each phase is timed, so that the startup report shows
+where a cold start spends its time.
+"""
+import io
+import logging
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import unquote_to_bytes
+
+from django.conf import settings
+from django.db import connection, connections
+from django.template.loader import get_template
+from django.urls import URLResolver, get_resolver, reverse
+
+from . import drill, store, timing
+
+logger = logging.getLogger('conjugator.warmup')
+
+TEMPLATES = (
+    'conjugator/base.html',
+    'conjugator/critical_css.html',
+    'conjugator/home.html',
+    'conjugator/conjugation.html',
+    'conjugator/conjugation_tables.html',
+    'conjugator/search.html',
+)
+
+# A timed startup phase; error is the exception message if it failed.
+Phase = namedtuple('Phase', ['name', 'seconds', 'error'])
+
+
+def resolve_urls(resolver=None):
+    """
+    Imports every URLconf and compiles the regex of every pattern under
+    resolver, the root one by default. Returns the number of patterns.
+    """
+    resolver = resolver or get_resolver()
+    # Populating the reverse lookups of nested resolvers too, since Django
+    # only does that for namespaced ones on their first reverse().
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += resolve_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def compile_templates():
+    for name in TEMPLATES:
+        get_template(name)
+
+
+def connect():
+    connection.ensure_connection()
+
+
+def load_store():
+    drill.get_deck(store.get_store())
+
+
+def wsgi_environ(url):
+    """Returns the WSGI environ of a GET request for url from localhost."""
+    host = settings.ALLOWED_HOSTS[0].lstrip('.')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        # Servers pass the decoded path as latin-1, see PEP 3333.
+        'PATH_INFO': unquote_to_bytes(url).decode('iso-8859-1'),
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def render_pages(application):
+    """
+    Renders the home page and the most frequent verb's conjugation page
+    through the WSGI application.
+    """
+    urls = [reverse('home')]
+    conjugation_store = store.get_store()
+    if conjugation_store.verbs:
+        urls.append(reverse('conjugation', kwargs={'infinitive': conjugation_store.verbs[0].infinitive}))
+    for url in urls:
+        statuses = []
+        response = application(wsgi_environ(url), lambda status, headers, exc_info=None: statuses.append(status))
+        response.close()
+        if not statuses[0].startswith('200'):
+            raise RuntimeError(f'{url} returned {statuses[0]}')
+    # Warm-up requests aren't traffic.
+    timing.registry.reset()
+
+
+def warm_up(application):
+    """
+    Runs every warm-up phase for the WSGI application and returns their
+    Phases. A failing phase is logged and reported rather than raised, so
+    that a process still starts when, say, the database is down.
+    """
+    phases = []
+    for name, function in (
+        ('urls', resolve_urls),
+        ('templates', compile_templates),
+        ('database', connect),
+        ('store', load_store),
+        ('pages', lambda: render_pages(application)),
+    ):
+        start = time.perf_counter()
+        error = None
+        try:
+            function()
+        except Exception as e:
+            logger.exception('Warm-up phase %s failed', name)
+            error = str(e) or type(e).__name__
+        phases.append(Phase(name, time.perf_counter() - start, error))
+    return phases
+
+
+def format_report(phases):
+    """Returns a one-line summary of phases."""
+    total = sum(phase.seconds for phase in phases)
+    return 'Started in {:.0f}ms: {}'.format(total * 1000, ', '.join(
+        f'{phase.name} {phase.seconds * 1000:.0f}ms' + (' (failed)' if phase.error else '')
+        for phase in phases
+    ))
+
+
+def preload(application, setup_seconds):
+    """
+    Warms up the process loading the WSGI application and logs the startup
+    report, including the setup_seconds it took to load the application.
+    Closes the database connections afterwards, so that workers forked from
+    this process don't share them. Returns the Phases.
+    """
+    phases = [Phase('application', setup_seconds, None)] + warm_up(application)
+    connections.close_all()
+    logger.info(format_report(phases))
+    return phases
@@ -2,6 +2,9 @@
 ASGI config for german_verb_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It is only used by ``manage.py benchmark --servers asgi``: deploy through
+WSGI, since Django 3.0 iterates streaming responses such as /export/ on the
+event loop, where they can't query the database.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -0,0 +1,60 @@
+"""
+Builds the DATABASES setting for CONJUGATOR_READ_ONLY. Imported by the
+settings module, so it must not import Django. While serving, the site only
+reads the verb tables, so the default database is opened read-only, and
+writes (the admin, sessions, import_conjugations) go through a separate
+WRITER alias to the same database, see conjugator.databases.ReadOnlyRouter.
+"""
+import copy
+import os
+from urllib.parse import quote
+
+WRITER = 'writer'
+
+# Set on every read-only SQLite connection (see
+# conjugator.databases.configure_connection()): memory map up to 256MiB of
+# the database file, so that reads come straight from the OS page cache, keep
+# up to 64MiB of pages per connection (negative sizes are in KiB) and refuse
+# any write.
+SQLITE_PRAGMAS = (
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -64 * 1024),
+    ('query_only', 1),
+)
+
+
+def read_only_database(database, immutable=False):
+    """
+    Returns a copy of the DATABASES entry database that opens it read-only.
+    SQLite files are opened with mode=ro, and with immutable=1 if immutable,
+    which also skips all locking and change detection and is only safe if
+    nothing writes to the file while it is open. Since a read-only SQLite
+    connection never needs to be reopened, it is kept open. Postgres
+    sessions default to read-only transactions.
+    """
+    reader = copy.deepcopy(database)
+    if reader['ENGINE'] == 'django.db.backends.sqlite3':
+        reader['NAME'] = 'file:{}?mode=ro{}'.format(quote(os.path.abspath(database['NAME'])),
+                                                    '&immutable=1' if immutable else '')
+        reader['PRAGMAS'] = SQLITE_PRAGMAS
+        if not reader.get('CONN_MAX_AGE'):
+            reader['CONN_MAX_AGE'] = None
+    elif 'postgresql' in reader['ENGINE'] or 'postgis' in reader['ENGINE']:
+        options = reader.setdefault('OPTIONS', {})
+        options['options'] = (options.get('options', '') + ' -c default_transaction_read_only=on').strip()
+    return reader
+
+
+def read_only_databases(database, immutable=False):
+    """
+    Returns DATABASES for serving from database read-only: the default alias
+    opens it read-only and WRITER opens it as configured. There is no WRITER
+    if immutable, so that writes fail rather than change an immutable file.
+    WRITER mirrors the default alias in tests, so that both share the test
+    database and its transaction, as they share the database when serving.
+    """
+    databases = {'default': read_only_database(database, immutable)}
+    if not immutable:
+        databases[WRITER] = copy.deepcopy(database)
+        databases[WRITER]['TEST'] = dict(databases[WRITER].get('TEST', {}), MIRROR='default')
+    return databases
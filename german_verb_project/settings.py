@@ -14,6 +14,8 @@ import os
 
 import dj_database_url
 
+from .databases import read_only_databases
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'conjugator.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -58,7 +61,9 @@ ROOT_URLCONF = 'german_verb_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The Django backend, timing renders for conjugator.timing.TimingMiddleware
+        'BACKEND': 'conjugator.timing.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +90,95 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# The 'conjugator' cache holds rendered pages keyed by dataset version. It is
+# per-process by default; set CONJUGATOR_CACHE_BACKEND to
+# django.core.cache.backends.filebased.FileBasedCache and
+# CONJUGATOR_CACHE_LOCATION to a directory to share it across gunicorn workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'conjugator': {
+        'BACKEND': os.getenv('CONJUGATOR_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CONJUGATOR_CACHE_LOCATION', 'conjugator'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# How often in seconds each worker checks the dataset version in the
+# database, so how long a write made through one worker may take to show up
+# in the cached pages and in-memory store of the others
+CONJUGATOR_DATASET_CHECK_INTERVAL = float(os.getenv('CONJUGATOR_DATASET_CHECK_INTERVAL', 1))
+
+# Max age in seconds sent in the Cache-Control header of cached pages
+CONJUGATOR_CACHE_MAX_AGE = int(os.getenv('CONJUGATOR_CACHE_MAX_AGE', 0))
+
+# Snapshot file of the verb data that every worker memory maps, sharing one
+# copy of it, instead of loading the data from the database (see
+# conjugator.snapshot). Build it before starting the workers with
+# manage.py build_snapshot.
+CONJUGATOR_SNAPSHOT_PATH = os.getenv('CONJUGATOR_SNAPSHOT_PATH')
+
+# How often in seconds each worker checks whether the snapshot file has been
+# replaced by another process
+CONJUGATOR_SNAPSHOT_CHECK_INTERVAL = float(os.getenv('CONJUGATOR_SNAPSHOT_CHECK_INTERVAL', 1))
+
+# Serve conjugation pages from the denormalized VerbPage table, one query per
+# page, instead of loading every verb into the in-memory store. The table is
+# kept up to date on writes while this is set; fill it with
+# manage.py rebuild_read_model after turning it on.
+CONJUGATOR_READ_MODEL = os.getenv('CONJUGATOR_READ_MODEL', '') == '1'
+
+# Set to serve rule-generated conjugation pages for infinitives outside the
+# stored verbs (see conjugator.engine). Such pages are marked noindex and
+# bypass the page and fragment caches, since any word ending in -en has one.
+CONJUGATOR_GENERATED_VERBS = os.getenv('CONJUGATOR_GENERATED_VERBS', '') == '1'
+
+# Serve from a read-only connection to the database (see
+# german_verb_project.databases): SQLite is opened with mode=ro, Postgres
+# sessions default to read-only transactions. Writes, such as the admin's, go
+# through a separate 'writer' connection. This guards the data rather than
+# speeding anything up. Run migrations without it.
+CONJUGATOR_READ_ONLY = os.getenv('CONJUGATOR_READ_ONLY', '') == '1'
+
+# With CONJUGATOR_READ_ONLY, also open SQLite with immutable=1, skipping all
+# locking. Only safe if nothing ever writes to the file, so there is no
+# writer connection and every write fails.
+CONJUGATOR_SQLITE_IMMUTABLE = os.getenv('CONJUGATOR_SQLITE_IMMUTABLE', '') == '1'
+
+# Set to warm the process up when the WSGI application is loaded: compile the
+# URL patterns and templates, connect to the database, load the store and
+# render a couple of pages (see conjugator.warmup). Run gunicorn with
+# --preload so that this happens once, before the workers are forked.
+CONJUGATOR_WARMUP = os.getenv('CONJUGATOR_WARMUP', '') == '1'
+
+# Fraction of requests timed by conjugator.timing.TimingMiddleware, which
+# aggregates them per view and, with DEBUG or for INTERNAL_IPS, adds a
+# Server-Timing header to them (0 disables it)
+CONJUGATOR_TIMING_SAMPLE_RATE = float(os.getenv('CONJUGATOR_TIMING_SAMPLE_RATE', 0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'conjugator': {
+            'handlers': ['console'],
+            'level': os.getenv('CONJUGATOR_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -130,4 +224,11 @@ except ImportError:
     pass
 
 db_from_env = dj_database_url.config(conn_max_age=500)
+if db_from_env:
+    # Check persistent connections when each request first uses them.
+    db_from_env['CONN_HEALTH_CHECKS'] = True
 DATABASES['default'].update(db_from_env)
+
+if CONJUGATOR_READ_ONLY:
+    DATABASES = read_only_databases(DATABASES['default'], immutable=CONJUGATOR_SQLITE_IMMUTABLE)
+    DATABASE_ROUTERS = ['conjugator.databases.ReadOnlyRouter']
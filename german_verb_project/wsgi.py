@@ -2,15 +2,27 @@
 WSGI config for german_verb_project project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+With CONJUGATOR_WARMUP set, loading it warms the process up and logs a
+startup report, see conjugator.warmup; with gunicorn --preload that happens
+once, before the workers are forked.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/wsgi/
 """
 
 import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+start = time.perf_counter()
+
+from django.conf import settings  # noqa: E402 (timed)
+from django.core.wsgi import get_wsgi_application  # noqa: E402 (timed)
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'german_verb_project.settings')
 
 application = get_wsgi_application()
+
+if settings.CONJUGATOR_WARMUP:
+    from conjugator import warmup  # noqa: E402 (needs the app registry)
+
+    warmup.preload(application, time.perf_counter() - start)